@@ -64,6 +64,7 @@ CREATE TABLE IF NOT EXISTS seat_duty_assignments (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     game_id INTEGER REFERENCES games(id) ON DELETE CASCADE,
+    game_start_time TIMESTAMP, -- copy of games.start_time, kept in sync by triggers below
     seat_number VARCHAR(50),
     section VARCHAR(100),
     status VARCHAR(50) DEFAULT 'assigned', -- assigned, confirmed, completed, cancelled
@@ -96,6 +97,11 @@ CREATE INDEX IF NOT EXISTS idx_games_is_assigned ON games(is_assigned);
 CREATE INDEX IF NOT EXISTS idx_seat_duty_user_id ON seat_duty_assignments(user_id);
 CREATE INDEX IF NOT EXISTS idx_seat_duty_game_id ON seat_duty_assignments(game_id);
 CREATE INDEX IF NOT EXISTS idx_seat_duty_status ON seat_duty_assignments(status);
+-- Covering indexes for keyset pagination of /assignments on (game_start_time, id)
+CREATE INDEX IF NOT EXISTS idx_seat_duty_start_time_id ON seat_duty_assignments(game_start_time, id)
+    INCLUDE (user_id, game_id, status, assigned_at);
+CREATE INDEX IF NOT EXISTS idx_seat_duty_user_start_time_id ON seat_duty_assignments(user_id, game_start_time, id)
+    INCLUDE (game_id, status, assigned_at);
 CREATE INDEX IF NOT EXISTS idx_user_availability_user_id ON user_availability(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_availability_day ON user_availability(day_of_week);
 CREATE INDEX IF NOT EXISTS idx_user_stats_user_id ON user_stats(user_id);
@@ -187,3 +193,29 @@ CREATE TRIGGER update_games_updated_at BEFORE UPDATE ON games
 
 CREATE TRIGGER update_seat_duty_assignments_updated_at BEFORE UPDATE ON seat_duty_assignments
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Keep seat_duty_assignments.game_start_time equal to the game's start_time
+CREATE OR REPLACE FUNCTION set_assignment_game_start_time()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT start_time INTO NEW.game_start_time FROM games WHERE id = NEW.game_id;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION sync_assignment_game_start_time()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE seat_duty_assignments
+    SET game_start_time = NEW.start_time
+    WHERE game_id = NEW.id;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_seat_duty_assignments_game_start_time BEFORE INSERT OR UPDATE OF game_id ON seat_duty_assignments
+    FOR EACH ROW EXECUTE FUNCTION set_assignment_game_start_time();
+
+CREATE TRIGGER sync_games_start_time_to_assignments AFTER UPDATE OF start_time ON games
+    FOR EACH ROW WHEN (OLD.start_time IS DISTINCT FROM NEW.start_time)
+    EXECUTE FUNCTION sync_assignment_game_start_time();
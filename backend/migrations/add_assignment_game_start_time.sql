@@ -0,0 +1,52 @@
+-- Migration: Copy games.start_time onto seat_duty_assignments for keyset pagination of /assignments
+-- Date: 2026-10-19
+
+BEGIN;
+
+ALTER TABLE seat_duty_assignments ADD COLUMN IF NOT EXISTS game_start_time TIMESTAMP;
+
+-- Keep seat_duty_assignments.game_start_time equal to the game's start_time
+CREATE OR REPLACE FUNCTION set_assignment_game_start_time()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT start_time INTO NEW.game_start_time FROM games WHERE id = NEW.game_id;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION sync_assignment_game_start_time()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE seat_duty_assignments
+    SET game_start_time = NEW.start_time
+    WHERE game_id = NEW.id;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS set_seat_duty_assignments_game_start_time ON seat_duty_assignments;
+CREATE TRIGGER set_seat_duty_assignments_game_start_time BEFORE INSERT OR UPDATE OF game_id ON seat_duty_assignments
+    FOR EACH ROW EXECUTE FUNCTION set_assignment_game_start_time();
+
+DROP TRIGGER IF EXISTS sync_games_start_time_to_assignments ON games;
+CREATE TRIGGER sync_games_start_time_to_assignments AFTER UPDATE OF start_time ON games
+    FOR EACH ROW WHEN (OLD.start_time IS DISTINCT FROM NEW.start_time)
+    EXECUTE FUNCTION sync_assignment_game_start_time();
+
+-- Existing rows; without this they stay NULL and /assignments never returns them.
+-- The copy is not a change to the assignment, so updated_at is left alone.
+ALTER TABLE seat_duty_assignments DISABLE TRIGGER update_seat_duty_assignments_updated_at;
+UPDATE seat_duty_assignments sda
+SET game_start_time = g.start_time
+FROM games g
+WHERE g.id = sda.game_id
+  AND sda.game_start_time IS DISTINCT FROM g.start_time;
+ALTER TABLE seat_duty_assignments ENABLE TRIGGER update_seat_duty_assignments_updated_at;
+
+-- Covering indexes for keyset pagination of /assignments on (game_start_time, id)
+CREATE INDEX IF NOT EXISTS idx_seat_duty_start_time_id ON seat_duty_assignments(game_start_time, id)
+    INCLUDE (user_id, game_id, status, assigned_at);
+CREATE INDEX IF NOT EXISTS idx_seat_duty_user_start_time_id ON seat_duty_assignments(user_id, game_start_time, id)
+    INCLUDE (game_id, status, assigned_at);
+
+COMMIT;
@@ -1,8 +1,13 @@
 from flask import Flask, request, jsonify
 import requests
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import base64
+import binascii
 import json
+import threading
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
@@ -31,6 +36,25 @@ DEFAULT_PARAMS = {
     "topBookmaker": 1
 }
 
+# Games cache configuration
+GAMES_CACHE_TTL_SECONDS = int(os.getenv('GAMES_CACHE_TTL_SECONDS', '60'))
+GAMES_CACHE_MAX_ENTRIES = int(os.getenv('GAMES_CACHE_MAX_ENTRIES', '32'))
+
+# team_id -> (fetched_at, [(start_time, game), ...]) sorted by start time
+_games_cache: "OrderedDict[int, Tuple[float, List[Tuple[datetime, Dict[str, Any]]]]]" = OrderedDict()
+_games_cache_lock = threading.Lock()
+
+# /assignments pagination
+ASSIGNMENTS_PAGE_SIZE = 50
+ASSIGNMENTS_MAX_PAGE_SIZE = 200
+
+# Advisory lock namespace (first key of pg_advisory_xact_lock(int, int))
+GAME_ASSIGNMENT_LOCK_NS = 1
+
+# team_id -> webhook sync currently running in this process
+_sync_runs: Dict[int, "_SyncRun"] = {}
+_sync_runs_lock = threading.Lock()
+
 def get_db_connection():
     """Get database connection"""
     try:
@@ -117,7 +141,7 @@ def fetch_games_data() -> Optional[Dict[str, Any]]:
         print(f"Error fetching data from API: {e}")
         return None
 
-def get_home_games(api_data: Dict[str, Any], team_id: int = 579, limit: int = 6) -> List[Dict[str, Any]]:
+def get_home_games(api_data: Dict[str, Any], team_id: int = 579, limit: Optional[int] = 6) -> List[Dict[str, Any]]:
     """
     Filter and return home games for the specified team
     Equivalent to the JavaScript logic provided
@@ -149,6 +173,42 @@ def get_home_games(api_data: Dict[str, Any], team_id: int = 579, limit: int = 6)
     home_games.sort(key=lambda x: x['startTime'])
     return home_games[:limit]
 
+def get_cached_home_games(team_id: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+    """
+    Return upcoming home games for a team from a short-lived cache.
+    The full sorted list is cached per team and `limit` is applied as a slice,
+    so different limits share one upstream call. Returns (games, cache_age_seconds)
+    or None if the upstream fetch failed.
+    """
+    now = time.monotonic()
+    with _games_cache_lock:
+        entry = _games_cache.get(team_id)
+        if entry and now - entry[0] < GAMES_CACHE_TTL_SECONDS:
+            _games_cache.move_to_end(team_id)
+        else:
+            entry = None
+
+    if entry is None:
+        api_data = fetch_games_data()
+        if not api_data:
+            return None
+        games = get_home_games(api_data, team_id=team_id, limit=None)
+        parsed = [
+            (datetime.fromisoformat(game['startTime'].replace('Z', '+00:00')), game)
+            for game in games
+        ]
+        entry = (time.monotonic(), parsed)
+        with _games_cache_lock:
+            _games_cache[team_id] = entry
+            _games_cache.move_to_end(team_id)
+            while len(_games_cache) > GAMES_CACHE_MAX_ENTRIES:
+                _games_cache.popitem(last=False)
+
+    # Drop games that kicked off since the entry was cached
+    current_time = datetime.now(timezone.utc)
+    upcoming = [game for start_time, game in entry[1] if start_time > current_time]
+    return upcoming[:limit], time.monotonic() - entry[0]
+
 def store_game_in_db(game_data: Dict[str, Any]) -> bool:
     """Store game data in database"""
     conn = get_db_connection()
@@ -254,47 +314,139 @@ def get_available_users_for_game(game_start_time: datetime) -> List[Dict[str, An
     finally:
         conn.close()
 
-def assign_users_to_game(game_id: int, user_ids: List[int]) -> bool:
-    """Assign users to a game"""
+def write_assignments(cur, game_ids: List[int], user_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Insert (game_id, user_id) pairs and update user_stats in one set-based statement.
+    The pairs are passed as two parallel arrays and expanded with unnest, so the
+    number of round trips does not grow with the number of games or users.
+    Only rows that were actually inserted count towards user_stats.
+    Returns the inserted (user_id, game_id) rows.
+    """
+    cur.execute("""
+        WITH pairs AS (
+            SELECT * FROM unnest(%s::int[], %s::int[]) AS p(game_id, user_id)
+        ), new_rows AS (
+            INSERT INTO seat_duty_assignments (user_id, game_id, status)
+            SELECT user_id, game_id, 'assigned' FROM pairs
+            ON CONFLICT (user_id, game_id) DO NOTHING
+            RETURNING user_id, game_id
+        ), per_user AS (
+            SELECT nr.user_id, COUNT(*) AS games_assigned,
+                   (array_agg(nr.game_id ORDER BY g.start_time DESC, nr.game_id DESC))[1] AS last_game_id
+            FROM new_rows nr
+            JOIN games g ON g.id = nr.game_id
+            GROUP BY nr.user_id
+        ), stats AS (
+            INSERT INTO user_stats (user_id, total_games_assigned, last_assigned_game_id, last_assigned_at)
+            SELECT user_id, games_assigned, last_game_id, CURRENT_TIMESTAMP FROM per_user
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_games_assigned = user_stats.total_games_assigned + EXCLUDED.total_games_assigned,
+                last_assigned_game_id = EXCLUDED.last_assigned_game_id,
+                last_assigned_at = EXCLUDED.last_assigned_at
+        ), marked AS (
+            UPDATE games SET is_assigned = true
+            WHERE id IN (SELECT DISTINCT game_id FROM pairs)
+        )
+        SELECT user_id, game_id FROM new_rows
+    """, (game_ids, user_ids))
+    return cur.fetchall()
+
+def plan_season_assignments(games: List[Tuple[int, datetime]], required: int = 2) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Fill every given game up to `required` assignees and return the newly
+    assigned users per game id.
+    All games are locked with per-game advisory locks for the transaction, so
+    overlapping runs (threads or worker processes) cannot both see an
+    under-assigned game. Current assignments and candidates are read with one
+    query each, users are picked greedily in kickoff order (least assigned
+    first, as before) and everything is written with write_assignments.
+    """
+    if not games:
+        return {}
     conn = get_db_connection()
     if not conn:
-        return False
+        return {}
+    
+    games = sorted(games, key=lambda g: g[1])
+    game_ids = sorted({game_id for game_id, _ in games})
     
     try:
-        with conn.cursor() as cur:
-            # Insert assignments
-            for user_id in user_ids:
-                cur.execute("""
-                    INSERT INTO seat_duty_assignments (user_id, game_id, status)
-                    VALUES (%s, %s, 'assigned')
-                    ON CONFLICT (user_id, game_id) DO NOTHING
-                """, (user_id, game_id))
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            # Lock in ascending id order so overlapping plans cannot deadlock
+            cur.execute("""
+                SELECT pg_advisory_xact_lock(%s, game_id) FROM unnest(%s::int[]) AS game_id
+            """, (GAME_ASSIGNMENT_LOCK_NS, game_ids))
             
-            # Update user stats
-            for user_id in user_ids:
-                cur.execute("""
-                    INSERT INTO user_stats (user_id, total_games_assigned, last_assigned_game_id, last_assigned_at)
-                    VALUES (%s, 1, %s, CURRENT_TIMESTAMP)
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        total_games_assigned = user_stats.total_games_assigned + 1,
-                        last_assigned_game_id = %s,
-                        last_assigned_at = CURRENT_TIMESTAMP
-                """, (user_id, game_id, game_id))
+            cur.execute("""
+                SELECT game_id, array_agg(user_id) AS user_ids
+                FROM seat_duty_assignments
+                WHERE game_id = ANY(%s)
+                GROUP BY game_id
+            """, (game_ids,))
+            current = {row['game_id']: set(row['user_ids']) for row in cur.fetchall()}
             
-            # Mark game as assigned
+            # Convert to our format: 0=Sunday, 1=Monday, ..., 6=Saturday
+            days = sorted({(start.weekday() + 1) % 7 for _, start in games})
             cur.execute("""
-                UPDATE games SET is_assigned = true WHERE id = %s
-            """, (game_id,))
+                SELECT u.id, u.name, ua.day_of_week, us.total_games_assigned, us.last_assigned_at
+                FROM users u
+                JOIN user_availability ua ON u.id = ua.user_id
+                LEFT JOIN user_stats us ON u.id = us.user_id
+                WHERE u.is_active = true 
+                AND ua.day_of_week = ANY(%s) 
+                AND ua.is_available = true
+            """, (days,))
+            users: Dict[int, Dict[str, Any]] = {}
+            available_by_day: Dict[int, List[int]] = {}
+            for row in cur.fetchall():
+                users[row['id']] = row
+                available_by_day.setdefault(row['day_of_week'], []).append(row['id'])
+            
+            def fairness_key(user_id: int):
+                # Same order as "total ASC, last_assigned_at ASC NULLS FIRST" (NULL totals last)
+                user = users[user_id]
+                total = user['total_games_assigned']
+                last = user['last_assigned_at']
+                return (total is None, total or 0, last is not None, last or datetime.min, user_id)
+            
+            now = datetime.now()
+            plan: Dict[int, List[Dict[str, Any]]] = {}
+            for game_id, start in games:
+                assigned = current.setdefault(game_id, set())
+                needed_users = required - len(assigned)
+                if needed_users <= 0:
+                    continue
+                candidates = [
+                    user_id for user_id in available_by_day.get((start.weekday() + 1) % 7, [])
+                    if user_id not in assigned
+                ]
+                # Keep the previous behaviour: only assign when the game can be filled
+                if len(candidates) < needed_users:
+                    continue
+                selected = sorted(candidates, key=fairness_key)[:needed_users]
+                for user_id in selected:
+                    assigned.add(user_id)
+                    users[user_id]['total_games_assigned'] = (users[user_id]['total_games_assigned'] or 0) + 1
+                    users[user_id]['last_assigned_at'] = now
+                plan[game_id] = [{'id': user_id, 'name': users[user_id]['name']} for user_id in selected]
+            
+            pairs = [(game_id, user['id']) for game_id, selected in plan.items() for user in selected]
+            if pairs:
+                write_assignments(cur, [p[0] for p in pairs], [p[1] for p in pairs])
             
             conn.commit()
-            return True
+            return plan
     except psycopg2.Error as e:
-        print(f"Error assigning users to game: {e}")
+        print(f"Error assigning users to games: {e}")
         conn.rollback()
-        return False
+        return {}
     finally:
         conn.close()
 
+def assign_users_to_game(game_id: int, game_start_time: datetime, required: int = 2) -> List[Dict[str, Any]]:
+    """Fill a single game up to `required` assignees and return the newly assigned users"""
+    return plan_season_assignments([(game_id, game_start_time)], required).get(game_id, [])
+
 def get_game_assignments(game_id: int) -> List[Dict[str, Any]]:
     """Get assigned users for a specific game"""
     conn = get_db_connection()
@@ -322,67 +474,108 @@ def is_game_fully_assigned(game_id: int) -> bool:
     assignments = get_game_assignments(game_id)
     return len(assignments) >= 2
 
+def sync_home_games(team_id: int = 579) -> Optional[Dict[str, Any]]:
+    """Fetch home games, store them and assign users. Returns None if the API fetch failed."""
+    # Fetch data from 365scores API
+    api_data = fetch_games_data()
+    
+    if not api_data:
+        return None
+    
+    # Get home games for the team
+    home_games = get_home_games(api_data, team_id=team_id, limit=6)
+    
+    # Store games in database
+    for game in home_games:
+        store_game_in_db(game)
+    
+    # Assign users to every game with less than 2 (checked under the game locks)
+    plan = plan_season_assignments([
+        (game['id'], datetime.fromisoformat(game['startTime'].replace('Z', '+00:00')))
+        for game in home_games
+    ])
+    
+    assignments_made = []
+    enhanced_games = []
+    
+    for game in home_games:
+        selected_users = plan.get(game['id'])
+        if selected_users:
+            assignments_made.append({
+                'game_id': game['id'],
+                'game_time': game['startTime'],
+                'assigned_users': selected_users
+            })
+        
+        current_assignments = get_game_assignments(game['id'])
+        
+        # Add assigned users info to game data
+        game_with_assignments = game.copy()
+        game_with_assignments['assigned_user_names'] = [assignment['name'] for assignment in current_assignments]
+        game_with_assignments['assignedUserId'] = [assignment['user_id'] for assignment in current_assignments]
+        enhanced_games.append(game_with_assignments)
+    
+    return {
+        'data': enhanced_games,
+        'total_games': len(enhanced_games),
+        'team_id': team_id,
+        'assignments_made': assignments_made
+    }
+
+class _SyncRun:
+    """A webhook sync in progress that concurrent callers can wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+def run_sync_shared(team_id: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Run sync_home_games once per team at a time within this process.
+    Callers arriving while a run is in progress wait for it and share its
+    result. Returns (result, shared).
+    """
+    with _sync_runs_lock:
+        run = _sync_runs.get(team_id)
+        is_leader = run is None
+        if is_leader:
+            run = _SyncRun()
+            _sync_runs[team_id] = run
+    
+    if not is_leader:
+        run.done.wait()
+        if run.error is not None:
+            raise run.error
+        return run.result, True
+    
+    try:
+        run.result = sync_home_games(team_id)
+    except Exception as e:
+        run.error = e
+        raise
+    finally:
+        with _sync_runs_lock:
+            _sync_runs.pop(team_id, None)
+        run.done.set()
+    return run.result, False
+
 @app.route('/webhook', methods=['POST', 'GET'])
 def webhook():
     """Webhook endpoint for seat duty"""
     try:
-        # Fetch data from 365scores API
-        api_data = fetch_games_data()
+        # Overlapping calls share one run for Hapoel Beer Sheva (team ID 579)
+        result, shared = run_sync_shared(579)
         
-        if not api_data:
+        if result is None:
             return jsonify({
                 'success': False,
                 'error': 'Failed to fetch data from 365scores API'
             }), 500
         
-        # Get home games for Hapoel Beer Sheva (team ID 579)
-        home_games = get_home_games(api_data, team_id=579, limit=6)
-        
-        # Store games in database and handle assignments
-        assignments_made = []
-        enhanced_games = []
-        
-        for game in home_games:
-            # Store game in database
-            store_game_in_db(game)
-            
-            # Get current assignments for this game
-            current_assignments = get_game_assignments(game['id'])
-            
-            # Check if game needs assignment (less than 2 users)
-            if len(current_assignments) < 2:
-                game_start_time = datetime.fromisoformat(game['startTime'].replace('Z', '+00:00'))
-                available_users = get_available_users_for_game(game_start_time)
-                
-                # If we have enough available users, assign them
-                if len(available_users) >= (2 - len(current_assignments)):
-                    # Get the users with least assignments (fairness algorithm)
-                    needed_users = 2 - len(current_assignments)
-                    selected_users = available_users[:needed_users]
-                    user_ids = [user['id'] for user in selected_users]
-                    
-                    # Assign users to game
-                    if assign_users_to_game(game['id'], user_ids):
-                        assignments_made.append({
-                            'game_id': game['id'],
-                            'game_time': game['startTime'],
-                            'assigned_users': [{'id': u['id'], 'name': u['name']} for u in selected_users]
-                        })
-                        # Refresh assignments after new assignment
-                        current_assignments = get_game_assignments(game['id'])
-            
-            # Add assigned users info to game data
-            game_with_assignments = game.copy()
-            game_with_assignments['assigned_user_names'] = [assignment['name'] for assignment in current_assignments]
-            game_with_assignments['assignedUserId'] = [assignment['user_id'] for assignment in current_assignments]
-            enhanced_games.append(game_with_assignments)
-        
         return jsonify({
             'success': True,
-            'data': enhanced_games,
-            'total_games': len(enhanced_games),
-            'team_id': 579,
-            'assignments_made': assignments_made,
+            **result,
+            'shared_run': shared,
             'timestamp': datetime.now(timezone.utc).isoformat()
         })
         
@@ -408,23 +601,23 @@ def get_games():
         team_id = request.args.get('team_id', 579, type=int)
         limit = request.args.get('limit', 6, type=int)
         
-        # Fetch data from API
-        api_data = fetch_games_data()
+        # Get home games (served from cache while fresh)
+        cached = get_cached_home_games(team_id, limit)
         
-        if not api_data:
+        if cached is None:
             return jsonify({
                 'success': False,
                 'error': 'Failed to fetch data from 365scores API'
             }), 500
         
-        # Get home games
-        home_games = get_home_games(api_data, team_id=team_id, limit=limit)
+        home_games, cache_age = cached
         
         return jsonify({
             'success': True,
             'games': home_games,
             'total_games': len(home_games),
             'team_id': team_id,
+            'cache_age_seconds': round(cache_age, 3),
             'timestamp': datetime.now(timezone.utc).isoformat()
         })
         
@@ -463,30 +656,85 @@ def get_users():
     finally:
         conn.close()
 
+def encode_assignments_cursor(start_time: datetime, assignment_id: int) -> str:
+    """Encode the (start_time, id) position of the last returned row"""
+    raw = json.dumps([start_time.isoformat(), assignment_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_assignments_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_assignments_cursor; raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        start_time, assignment_id = json.loads(raw)
+        return datetime.fromisoformat(start_time), int(assignment_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 @app.route('/assignments', methods=['GET'])
 def get_assignments():
-    """Get all current assignments"""
+    """
+    Get current assignments, ordered by game start time.
+    Paginated with an opaque cursor on (start_time, id); filters: user_id, status.
+    """
+    limit = min(max(request.args.get('limit', ASSIGNMENTS_PAGE_SIZE, type=int), 1), ASSIGNMENTS_MAX_PAGE_SIZE)
+    user_id = request.args.get('user_id', type=int)
+    status = request.args.get('status')
+    cursor = request.args.get('cursor')
+    
+    # The inner query only touches the covering (…, game_start_time, id) indexes
+    conditions = ["game_start_time > CURRENT_TIMESTAMP"]
+    params: List[Any] = []
+    if cursor:
+        try:
+            after_start_time, after_id = decode_assignments_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        conditions.append("(game_start_time, id) > (%s, %s)")
+        params.extend([after_start_time, after_id])
+    if user_id is not None:
+        conditions.append("user_id = %s")
+        params.append(user_id)
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    # Fetch one extra row to know whether another page exists
+    params.append(limit + 1)
+    
     conn = get_db_connection()
     if not conn:
         return jsonify({'success': False, 'error': 'Database connection failed'}), 500
     
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT sda.id, sda.user_id, u.name as user_name, sda.game_id,
-                       g.start_time, g.home_competitor_name, g.away_competitor_name,
+                       sda.game_start_time AS start_time, g.home_competitor_name, g.away_competitor_name,
                        sda.status, sda.assigned_at
-                FROM seat_duty_assignments sda
+                FROM (
+                    SELECT id, user_id, game_id, game_start_time, status, assigned_at
+                    FROM seat_duty_assignments
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY game_start_time ASC, id ASC
+                    LIMIT %s
+                ) sda
                 JOIN users u ON sda.user_id = u.id
                 JOIN games g ON sda.game_id = g.id
-                WHERE g.start_time > CURRENT_TIMESTAMP
-                ORDER BY g.start_time ASC
-            """)
+                ORDER BY sda.game_start_time ASC, sda.id ASC
+            """, params)
             assignments = cur.fetchall()
             
+            has_more = len(assignments) > limit
+            assignments = assignments[:limit]
+            next_cursor = None
+            if has_more:
+                last = assignments[-1]
+                next_cursor = encode_assignments_cursor(last['start_time'], last['id'])
+            
             return jsonify({
                 'success': True,
                 'assignments': [dict(assignment) for assignment in assignments],
+                'next_cursor': next_cursor,
+                'has_more': has_more,
                 'timestamp': datetime.now(timezone.utc).isoformat()
             })
     except psycopg2.Error as e:
@@ -503,7 +751,7 @@ def root():
             'webhook': '/webhook (POST/GET) - Main webhook with auto-assignment',
             'games': '/games (GET) - ?team_id=579&limit=6',
             'users': '/users (GET) - Get all users with stats',
-            'assignments': '/assignments (GET) - Get current assignments',
+            'assignments': '/assignments (GET) - ?limit=50&cursor=&user_id=&status= - Get current assignments',
             'health': '/health (GET)'
         },
         'default_team_id': 579,
@@ -0,0 +1,125 @@
+"""
+Tests for GET /assignments keyset pagination.
+
+Cursor handling is checked without a database. The paging tests run against
+the PostgreSQL database configured via DB_* env vars (with init.sql or
+migrations/add_assignment_game_start_time.sql applied) and are skipped when it
+is not reachable. Their rows carry a status of their own, so filtering on it
+keeps whatever else is stored out of the pages.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+TEST_GAME_IDS = [990000101, 990000102, 990000103]
+TEST_STATUS = 'test-paging'
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+class TestAssignmentsCursor:
+    def test_round_trip(self):
+        start = datetime(2026, 11, 7, 18, 30)
+        cursor = server.encode_assignments_cursor(start, 42)
+
+        assert '=' not in cursor
+        assert server.decode_assignments_cursor(cursor) == (start, 42)
+
+    @pytest.mark.parametrize('cursor', [
+        'not base64!',
+        base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+        base64.urlsafe_b64encode(json.dumps(['not a date', 1]).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps(['2026-11-07T18:30:00', 'x']).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps([1, 2, 3]).encode()).decode(),
+    ])
+    def test_malformed_cursor_is_rejected(self, client, cursor):
+        with pytest.raises(ValueError):
+            server.decode_assignments_cursor(cursor)
+
+        # Rejected before any database access
+        response = client.get('/assignments', query_string={'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+@pytest.fixture
+def paged_assignments():
+    """Six assignments on three games that all start at the same time."""
+    conn = server.get_db_connection()
+    if conn is None:
+        pytest.skip("PostgreSQL is not available")
+    start = (datetime.now() + timedelta(days=30)).replace(microsecond=0)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM games WHERE id = ANY(%s)", (TEST_GAME_IDS,))
+            cur.execute("SELECT id FROM users ORDER BY id LIMIT 2")
+            user_ids = [row[0] for row in cur.fetchall()]
+            if len(user_ids) < 2:
+                pytest.skip("Needs the seeded users")
+            for game_id in TEST_GAME_IDS:
+                cur.execute("""
+                    INSERT INTO games (id, start_time, home_competitor_id, away_competitor_id)
+                    VALUES (%s, %s, 579, 1)
+                """, (game_id, start))
+                for user_id in user_ids:
+                    # game_start_time is filled in by the trigger
+                    cur.execute("""
+                        INSERT INTO seat_duty_assignments (user_id, game_id, status)
+                        VALUES (%s, %s, %s)
+                    """, (user_id, game_id, TEST_STATUS))
+        conn.commit()
+        yield user_ids
+    finally:
+        with conn.cursor() as cur:
+            # Assignments go with their games (ON DELETE CASCADE)
+            cur.execute("DELETE FROM games WHERE id = ANY(%s)", (TEST_GAME_IDS,))
+        conn.commit()
+        conn.close()
+
+
+def _walk(client, **params):
+    pages, cursor = [], None
+    while True:
+        query = {'status': TEST_STATUS, **params, **({'cursor': cursor} if cursor else {})}
+        data = client.get('/assignments', query_string=query).get_json()
+        assert data['success'] is True
+        pages.append([a['id'] for a in data['assignments']])
+        cursor = data['next_cursor']
+        assert data['has_more'] is (cursor is not None)
+        if cursor is None:
+            return pages, data
+
+
+class TestAssignmentsPaging:
+    def test_pages_split_rows_with_equal_start_time(self, client, paged_assignments):
+        pages, _ = _walk(client, limit=4)
+
+        assert [len(page) for page in pages] == [4, 2]
+        ids = sum(pages, [])
+        # Ties on start_time are broken by id: nothing repeated, nothing skipped
+        assert ids == sorted(ids) and len(set(ids)) == 6
+
+    def test_user_filter(self, client, paged_assignments):
+        user_id = paged_assignments[1]
+
+        pages, _ = _walk(client, user_id=user_id, limit=2)
+
+        data = client.get('/assignments', query_string={'status': TEST_STATUS, 'user_id': user_id, 'limit': 10}).get_json()
+        assert {a['user_id'] for a in data['assignments']} == {user_id}
+        assert [len(page) for page in pages] == [2, 1]
+        assert sum(pages, []) == [a['id'] for a in data['assignments']]
+
+    def test_limit_is_clamped(self, client, paged_assignments, monkeypatch):
+        data = client.get('/assignments', query_string={'status': TEST_STATUS, 'limit': 0}).get_json()
+        assert len(data['assignments']) == 1 and data['has_more'] is True
+
+        monkeypatch.setattr(server, 'ASSIGNMENTS_MAX_PAGE_SIZE', 5)
+        data = client.get('/assignments', query_string={'status': TEST_STATUS, 'limit': 1000}).get_json()
+        assert len(data['assignments']) == 5 and data['has_more'] is True
@@ -0,0 +1,105 @@
+"""
+Tests for the per-team cache behind GET /games.
+
+The upstream fetch and the monotonic clock are replaced, so these need
+neither the 365scores API nor a database.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+def _game(game_id: int, days: int, home_id: int = 579) -> dict:
+    start = datetime.now(timezone.utc) + timedelta(days=days)
+    return {
+        'id': game_id,
+        'startTime': start.replace(microsecond=0).isoformat(),
+        'homeCompetitor': {'id': home_id, 'name': 'Home'},
+        'awayCompetitor': {'id': 1, 'name': 'Away'},
+    }
+
+
+class FakeUpstream:
+    """Stands in for fetch_games_data and counts the calls."""
+
+    def __init__(self, games):
+        self.games = games
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return None if self.games is None else {'games': self.games}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def upstream(monkeypatch, clock):
+    fake = FakeUpstream([_game(days, days) for days in range(5, 0, -1)] + [_game(100, 3, home_id=2)])
+    monkeypatch.setattr(server, 'fetch_games_data', fake)
+    monkeypatch.setattr(server, '_games_cache', OrderedDict())
+    return fake
+
+
+class TestGamesCache:
+    def test_hit_within_ttl(self, upstream, clock):
+        games, _ = server.get_cached_home_games(579, 6)
+        clock[0] += server.GAMES_CACHE_TTL_SECONDS - 1
+        cached, age = server.get_cached_home_games(579, 6)
+
+        assert upstream.calls == 1
+        assert [g['id'] for g in cached] == [g['id'] for g in games] == [1, 2, 3, 4, 5]
+        assert age == server.GAMES_CACHE_TTL_SECONDS - 1
+
+    def test_expired_entry_is_refetched(self, upstream, clock):
+        server.get_cached_home_games(579, 6)
+        clock[0] += server.GAMES_CACHE_TTL_SECONDS
+        _, age = server.get_cached_home_games(579, 6)
+
+        assert upstream.calls == 2
+        assert age == 0
+
+    def test_limit_slices_one_cached_entry(self, upstream):
+        results = {limit: server.get_cached_home_games(579, limit)[0] for limit in (1, 3, 10)}
+
+        assert upstream.calls == 1
+        assert list(server._games_cache) == [579]
+        assert {limit: [g['id'] for g in games] for limit, games in results.items()} == {
+            1: [1],
+            3: [1, 2, 3],
+            10: [1, 2, 3, 4, 5],
+        }
+
+    def test_least_recently_used_team_is_evicted(self, upstream, monkeypatch):
+        monkeypatch.setattr(server, 'GAMES_CACHE_MAX_ENTRIES', 2)
+        server.get_cached_home_games(1, 6)
+        server.get_cached_home_games(2, 6)
+        # A hit makes team 1 the most recently used, so team 2 goes
+        server.get_cached_home_games(1, 6)
+        server.get_cached_home_games(3, 6)
+
+        assert list(server._games_cache) == [1, 3]
+        assert upstream.calls == 3
+        server.get_cached_home_games(2, 6)
+        assert upstream.calls == 4
+        assert list(server._games_cache) == [3, 2]
+
+    def test_failed_fetch_is_not_cached(self, upstream):
+        games = upstream.games
+        upstream.games = None
+
+        assert server.get_cached_home_games(579, 6) is None
+        assert not server._games_cache
+
+        upstream.games = games
+        cached, _ = server.get_cached_home_games(579, 6)
+        assert upstream.calls == 2
+        assert len(cached) == 5
@@ -0,0 +1,132 @@
+"""
+Concurrency tests for the webhook assignment flow.
+
+These run against the PostgreSQL database configured via DB_* env vars
+(e.g. `docker-compose up postgres` with init.sql applied) and are skipped
+when it is not reachable.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+TEST_GAME_IDS = [990000001, 990000002]
+
+
+def _future_game(game_id: int, days: int) -> dict:
+    # Saturday kickoffs: five of the six seeded users (all but Noam) are available, more than a game needs
+    start = datetime.now(timezone.utc) + timedelta(days=days)
+    start += timedelta(days=(5 - start.weekday()) % 7)
+    return {
+        'id': game_id,
+        'startTime': start.replace(microsecond=0).isoformat(),
+        'homeCompetitor': {'id': 579, 'name': 'Home'},
+        'awayCompetitor': {'id': 1, 'name': 'Away'},
+    }
+
+
+def _total_games_assigned(cur) -> int:
+    cur.execute("SELECT COALESCE(SUM(total_games_assigned), 0) FROM user_stats")
+    return cur.fetchone()[0]
+
+
+def _assignment_counts(cur) -> dict:
+    cur.execute("""
+        SELECT game_id, COUNT(*) FROM seat_duty_assignments
+        WHERE game_id = ANY(%s) GROUP BY game_id
+    """, (TEST_GAME_IDS,))
+    return dict(cur.fetchall())
+
+
+STATS_COLUMNS = ('total_games_assigned', 'total_games_completed', 'last_assigned_game_id', 'last_assigned_at', 'updated_at')
+
+
+@pytest.fixture
+def db_conn():
+    """
+    Connection to the test database. user_stats is snapshotted first and put
+    back afterwards, so runs do not skew the fairness order of the seeded users.
+    """
+    conn = server.get_db_connection()
+    if conn is None:
+        pytest.skip("PostgreSQL is not available")
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM games WHERE id = ANY(%s)", (TEST_GAME_IDS,))
+        cur.execute(f"SELECT user_id, {', '.join(STATS_COLUMNS)} FROM user_stats")
+        snapshot = cur.fetchall()
+    conn.commit()
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM user_stats WHERE NOT (user_id = ANY(%s))", ([row[0] for row in snapshot],))
+        cur.executemany(
+            f"UPDATE user_stats SET {', '.join(f'{column} = %s' for column in STATS_COLUMNS)} WHERE user_id = %s",
+            [(*row[1:], row[0]) for row in snapshot],
+        )
+        cur.execute("DELETE FROM games WHERE id = ANY(%s)", (TEST_GAME_IDS,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    games = [_future_game(TEST_GAME_IDS[0], 30), _future_game(TEST_GAME_IDS[1], 60)]
+    monkeypatch.setattr(server, 'fetch_games_data', lambda: {'games': games})
+    return games
+
+
+def _run_parallel(target, count: int = 8):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker():
+        try:
+            barrier.wait()
+            target()
+        except Exception as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+
+def test_parallel_webhooks_assign_each_game_once(db_conn, fake_api):
+    with db_conn.cursor() as cur:
+        before = _total_games_assigned(cur)
+
+    def call_webhook():
+        response = server.app.test_client().post('/webhook')
+        assert response.status_code == 200
+
+    _run_parallel(call_webhook)
+
+    with db_conn.cursor() as cur:
+        counts = _assignment_counts(cur)
+        assert counts == {game_id: 2 for game_id in TEST_GAME_IDS}
+        assert _total_games_assigned(cur) - before == sum(counts.values())
+
+
+def test_parallel_assignment_is_serialized_per_game(db_conn, fake_api):
+    """Bypass the in-process run sharing so only the advisory lock protects the writes."""
+    for game in fake_api:
+        server.store_game_in_db(game)
+    with db_conn.cursor() as cur:
+        before = _total_games_assigned(cur)
+
+    def assign_all():
+        for game in fake_api:
+            start = datetime.fromisoformat(game['startTime'])
+            server.assign_users_to_game(game['id'], start)
+
+    _run_parallel(assign_all)
+
+    with db_conn.cursor() as cur:
+        counts = _assignment_counts(cur)
+        assert counts == {game_id: 2 for game_id in TEST_GAME_IDS}
+        assert _total_games_assigned(cur) - before == sum(counts.values())
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.deps import get_current_user
 from app.users.models import User
+from app.core.principal import Principal
 from app.users.schemas import (
     UserCreate, UserOut, UserList, UserSearch,
-    UserBulkDelete, UserBulkUpdate, AdminUserUpdate,
+    UserBulkDelete, UserBulkUpdate, UserBulkJob, AdminUserUpdate, UserImportResult, user_out_list,
 )
 from app.users.crud import user_crud
+from app.users.search import InvalidCursor
+from app.users.bulk import bulk_jobs, start_job, USER_BULK_JOB_THRESHOLD
+from app.users.bulk_import import import_users, ImportTooLarge, IMPORT_FORMATS
+from app.users.export import stream_export, EXPORT_FORMATS, EXPORT_MEDIA_TYPES
 from app.core.init_db import create_superuser, reset_admin_password
 from pydantic import BaseModel, EmailStr
-from typing import List
+from typing import List, Literal
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Largest import body accepted, in bytes
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(5 * 1024 * 1024)))
+
 
 class CreateAdminRequest(BaseModel):
     email: EmailStr
@@ -30,7 +41,7 @@ class ResetPasswordRequest(BaseModel):
 def create_admin_user(
     request: CreateAdminRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new admin user (superuser only)."""
     if not current_user.is_superuser:
@@ -63,7 +74,7 @@ def create_admin_user(
 @router.post("/reset-admin-password")
 def reset_admin_password_endpoint(
     request: ResetPasswordRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Reset admin user password (superuser only)."""
     if not current_user.is_superuser:
@@ -82,7 +93,7 @@ def reset_admin_password_endpoint(
 @router.get("/list-admins")
 def list_admin_users(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all admin users (superuser only)."""
     if not current_user.is_superuser:
@@ -114,7 +125,7 @@ def list_admin_users(
 @router.get("/system-info")
 def get_system_info(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get system information (superuser only)."""
     if not current_user.is_superuser:
@@ -142,7 +153,7 @@ def get_system_info(
 def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new user (admin only)."""
     if not current_user.is_superuser:
@@ -156,15 +167,54 @@ def create_user(
     return user_crud.create(db, user_data)
 
 
+@router.post("/users/import", response_model=UserImportResult)
+async def import_users_endpoint(
+    request: Request,
+    format: str = Query(None, description="csv or ndjson; defaults from Content-Type"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Create users from a raw CSV (header: email,password,name,phone) or NDJSON
+    body (admin only). Conflicts and invalid rows are reported per row.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    
+    fmt = format or ("ndjson" if "json" in request.headers.get("content-type", "") else "csv")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Format must be one of {', '.join(IMPORT_FORMATS)}")
+    
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Import file too large")
+    try:
+        lines = body.decode("utf-8-sig").splitlines()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import must be UTF-8")
+    
+    try:
+        # Hashing and inserting block; keep them off the event loop
+        return await run_in_threadpool(import_users, db, lines, fmt)
+    except ImportTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+
 @router.get("/users", response_model=UserList)
 def get_users(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
     email: str = Query(None, description="Filter by email"),
     name: str = Query(None, description="Filter by name"),
+    q: str = Query(None, description="Search email or name"),
     is_active: bool = Query(None, description="Filter by active status"),
+    sort: Literal["created_at", "-created_at", "name", "-name"] = Query(None, description="Keyset pagination order; use next_cursor for further pages"),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    total: Literal["exact", "estimate", "none"] = Query("exact", description="How to compute total"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get users list with pagination and filtering (admin only)."""
     if not current_user.is_superuser:
@@ -173,18 +223,113 @@ def get_users(
     search = UserSearch(
         email=email,
         name=name,
+        q=q,
         is_active=is_active,
         page=page,
-        limit=limit
+        limit=limit,
+        sort=sort,
+        cursor=cursor,
+        total=total,
     )
     
-    users, total = user_crud.search(db, search)
+    try:
+        result = user_crud.search(db, search)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return UserList(
-        users=users,
-        total=total,
-        page=page,
-        limit=limit
+    return Response(result.to_json(page, limit), media_type="application/json")
+
+
+# Declared before /users/{user_id}, which would otherwise match them
+
+@router.post("/users/bulk-delete")
+def bulk_delete_users(
+    bulk_data: UserBulkDelete,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Delete multiple users (admin only). Large deletes run as a job; poll /admin/users/jobs/{job_id}."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    
+    # Prevent self-deletion
+    if current_user.id in bulk_data.user_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete your own account")
+    
+    user_ids = bulk_data.user_ids
+    if len(user_ids) > USER_BULK_JOB_THRESHOLD:
+        job = start_job(db, "delete", len(user_ids), lambda job_db, progress: user_crud.bulk_delete(job_db, user_ids, progress))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": f"Deleting {len(user_ids)} users", "job_id": job.id}
+    
+    deleted_count = user_crud.bulk_delete(db, user_ids)
+    return {"message": f"Successfully deleted {deleted_count} users"}
+
+
+@router.put("/users/bulk-update")
+def bulk_update_users(
+    bulk_data: UserBulkUpdate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Update multiple users (admin only). Large updates run as a job; poll /admin/users/jobs/{job_id}."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    
+    update_data = bulk_data.dict(exclude={"user_ids"}, exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No update data provided")
+    
+    user_ids = bulk_data.user_ids
+    if len(user_ids) > USER_BULK_JOB_THRESHOLD:
+        job = start_job(db, "update", len(user_ids), lambda job_db, progress: user_crud.bulk_update(job_db, user_ids, update_data, progress))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": f"Updating {len(user_ids)} users", "job_id": job.id}
+    
+    updated_count = user_crud.bulk_update(db, user_ids, update_data)
+    return {"message": f"Successfully updated {updated_count} users"}
+
+
+@router.get("/users/jobs/{job_id}", response_model=UserBulkJob)
+def get_bulk_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Progress of a bulk user job (admin only)."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/users/export")
+def export_users(
+    format: str = Query("csv", description="csv or ndjson"),
+    email: str = Query(None, description="Filter by email"),
+    name: str = Query(None, description="Filter by name"),
+    q: str = Query(None, description="Search email or name"),
+    is_active: bool = Query(None, description="Filter by active status"),
+    sort: Literal["created_at", "-created_at", "name", "-name"] = Query(None, description="Export order; by id when not given"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream every user matching the filters as CSV or NDJSON (admin only)."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Format must be one of {', '.join(EXPORT_FORMATS)}")
+    
+    search = UserSearch(email=email, name=name, q=q, is_active=is_active, sort=sort)
+    return StreamingResponse(
+        stream_export(db, search, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
     )
 
 
@@ -192,13 +337,13 @@ def get_users(
 def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get user by ID (admin only)."""
     if not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     
-    user = user_crud.get_by_id(db, user_id)
+    user = user_crud.read(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
@@ -209,7 +354,7 @@ def update_user(
     user_id: int,
     user_data: AdminUserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update user by ID (admin only)."""
     if not current_user.is_superuser:
@@ -225,7 +370,7 @@ def update_user(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete user by ID (admin only)."""
     if not current_user.is_superuser:
@@ -242,47 +387,11 @@ def delete_user(
     return {"message": "User deleted successfully"}
 
 
-@router.post("/users/bulk-delete")
-def bulk_delete_users(
-    bulk_data: UserBulkDelete,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Delete multiple users (admin only)."""
-    if not current_user.is_superuser:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    
-    # Prevent self-deletion
-    if current_user.id in bulk_data.user_ids:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete your own account")
-    
-    deleted_count = user_crud.bulk_delete(db, bulk_data.user_ids)
-    return {"message": f"Successfully deleted {deleted_count} users"}
-
-
-@router.put("/users/bulk-update")
-def bulk_update_users(
-    bulk_data: UserBulkUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Update multiple users (admin only)."""
-    if not current_user.is_superuser:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    
-    update_data = bulk_data.dict(exclude={"user_ids"}, exclude_unset=True)
-    if not update_data:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No update data provided")
-    
-    updated_count = user_crud.bulk_update(db, bulk_data.user_ids, update_data)
-    return {"message": f"Successfully updated {updated_count} users"}
-
-
 @router.patch("/users/{user_id}/toggle-active")
 def toggle_user_active(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Toggle user active status (admin only)."""
     if not current_user.is_superuser:
@@ -292,26 +401,21 @@ def toggle_user_active(
     if user_id == current_user.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot deactivate your own account")
     
-    user = user_crud.get_by_id(db, user_id)
+    user = user_crud.toggle_active(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    user.is_active = not user.is_active
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    
     return {"message": f"User {'activated' if user.is_active else 'deactivated'} successfully"}
 
 
 @router.get("/users/stats/active")
 def get_active_users_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get active users statistics (admin only)."""
     if not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     
     active_users = user_crud.get_active_users(db)
-    return {"active_users": active_users}
+    return {"active_users": user_out_list.dump_python(user_out_list.validate_python(active_users, from_attributes=True), mode="json")}
@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, Index
+from app.core.database import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all workers when RATE_LIMIT_BACKEND=database (see app/core/ratelimit.py)."""
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = (
+        UniqueConstraint("key", name="uq_rate_limit_buckets_key"),
+        Index("ix_rate_limit_buckets_updated_at", "updated_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(128), nullable=False)
+    tokens = Column(Float, nullable=False)
+    # Unix time of the last take; workers share a wall clock, not a monotonic one
+    updated_at = Column(Float, nullable=False)
+
+
+class UserSession(Base):
+    """One logged-in device. Holds the SHA-256 of its current refresh token, never the token itself."""
+    __tablename__ = "user_sessions"
+    __table_args__ = (
+        UniqueConstraint("token_hash", name="uq_user_sessions_token_hash"),
+        Index("ix_user_sessions_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False)
+    user_agent = Column(String(255), nullable=True)
+    ip_address = Column(String(64), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class PasswordResetToken(Base):
+    """An outstanding password reset, stored as the SHA-256 of the token. Deleted when used."""
+    __tablename__ = "password_reset_tokens"
+    __table_args__ = (
+        UniqueConstraint("token_hash", name="uq_password_reset_tokens_token_hash"),
+        Index("ix_password_reset_tokens_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.auth.models import PasswordResetToken
+from app.core.security import create_password_reset_token, hash_token, RESET_TOKEN_EXPIRE_HOURS
+
+
+class InvalidResetToken(Exception):
+    """The token is unknown, already used, or expired (`expired` tells which)."""
+
+    def __init__(self, expired: bool = False):
+        super().__init__("Reset token has expired" if expired else "Invalid reset token")
+        self.expired = expired
+
+
+def issue_reset_token(db: Session, user_id: int) -> str:
+    """Create a reset token for the user, replacing any outstanding one. Does not commit."""
+    revoke_reset_tokens(db, user_id)
+    token = create_password_reset_token()
+    now = datetime.utcnow()
+    db.add(PasswordResetToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        created_at=now,
+        expires_at=now + timedelta(hours=RESET_TOKEN_EXPIRE_HOURS),
+    ))
+    return token
+
+
+def find_reset_token(db: Session, token: str) -> PasswordResetToken:
+    """The unexpired reset token, looked up by its hash. Raises InvalidResetToken otherwise."""
+    reset = db.query(PasswordResetToken).filter(PasswordResetToken.token_hash == hash_token(token)).first()
+    if reset is None:
+        raise InvalidResetToken()
+    if reset.expires_at <= datetime.utcnow():
+        raise InvalidResetToken(expired=True)
+    return reset
+
+
+def consume_reset_token(db: Session, reset: PasswordResetToken) -> None:
+    """
+    Delete the token along with the user's other reset tokens. Raises InvalidResetToken
+    if a concurrent request consumed it first, so each token resets a password once.
+    Does not commit.
+    """
+    consumed = db.query(PasswordResetToken).filter(PasswordResetToken.id == reset.id).delete(synchronize_session=False)
+    if consumed != 1:
+        raise InvalidResetToken()
+    revoke_reset_tokens(db, reset.user_id)
+
+
+def revoke_reset_tokens(db: Session, user_id: int) -> int:
+    """Delete every outstanding reset token of the user. Does not commit."""
+    return db.query(PasswordResetToken).filter(PasswordResetToken.user_id == user_id).delete(synchronize_session=False)
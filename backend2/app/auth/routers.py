@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta, timezone
+from typing import List
+from datetime import datetime
 from app.core.database import get_db
 from app.users.models import User
 from app.users.schemas import UserCreate, UserOut
 from app.auth.schemas import (
     LoginRequest, Token, RefreshTokenRequest, ForgotPasswordRequest,
-    ResetPasswordRequest, LogoutRequest
+    ResetPasswordRequest, LogoutRequest, SessionOut
 )
+from app.auth.models import UserSession
+from app.auth.sessions import open_session, find_session, rotate_session, revoke_user_sessions
+from app.auth.reset_tokens import issue_reset_token, find_reset_token, consume_reset_token, InvalidResetToken
 from app.core.security import (
-    get_password_hash, verify_password, create_access_token, 
-    create_refresh_token, create_password_reset_token,
-    decode_token, is_token_expired
+    create_access_token, decode_token, is_token_expired, RESET_TOKEN_EXPIRE_HOURS
+)
+from app.core.hashing import hash_password, check_password_and_rehash, PasswordHashingBusy
+from app.core.ratelimit import enforce_rate_limit
+from app.core.deps import get_current_user
+from app.core.principal import (
+    Principal, invalidate_principals, access_token_claims, bump_token_version, record_token_versions,
 )
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -25,7 +33,7 @@ def register(payload: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
     user = User(
         email=payload.email,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=hash_password(payload.password),
         name=payload.name,
         phone=payload.phone,
     )
@@ -36,42 +44,47 @@ def register(payload: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)):
     """Login user and return tokens."""
+    # Before any lookup or hashing, so refused attempts cost next to nothing
+    enforce_rate_limit("login", request, payload.email)
     user = db.query(User).filter(User.email == payload.email).first()
-    if user is None or not verify_password(payload.password, user.hashed_password):
+    if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = check_password_and_rehash(payload.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash is not None:
+        # Stored with an old scheme or cost; upgrade it in the same commit as the session
+        user.hashed_password = new_hash
+        db.add(user)
     
-    access_token = create_access_token(subject=str(user.id))
-    refresh_token = create_refresh_token(subject=str(user.id))
-    
-    # Store refresh token in database
-    user.refresh_token = refresh_token
-    db.add(user)
+    access_token = create_access_token(subject=str(user.id), claims=access_token_claims(user))
+    # One session per device; logging in elsewhere leaves the others alone
+    refresh_token = open_session(db, user.id, request)
     db.commit()
     
     return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+def refresh_token(payload: RefreshTokenRequest, request: Request, db: Session = Depends(get_db)):
     """Refresh access token using refresh token."""
     # Verify refresh token
     token_data = decode_token(payload.refresh_token)
     if not token_data or token_data.get("type") != "refresh" or is_token_expired(token_data):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
     
-    user = db.query(User).filter(User.id == int(token_data["sub"])).first()
-    if not user or user.refresh_token != payload.refresh_token:
+    session = find_session(db, payload.refresh_token)
+    if not session or session.user_id != int(token_data["sub"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    user = db.query(User).filter(User.id == session.user_id).first()
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
     
-    # Generate new tokens
-    access_token = create_access_token(subject=str(user.id))
-    new_refresh_token = create_refresh_token(subject=str(user.id))
-    
-    # Update refresh token in database
-    user.refresh_token = new_refresh_token
-    db.add(user)
+    # Generate new tokens; the presented refresh token stops working
+    access_token = create_access_token(subject=str(user.id), claims=access_token_claims(user))
+    new_refresh_token = rotate_session(session, request)
     db.commit()
     
     return {"access_token": access_token, "token_type": "bearer", "refresh_token": new_refresh_token}
@@ -79,30 +92,48 @@ def refresh_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
 
 @router.post("/logout")
 def logout(payload: LogoutRequest, db: Session = Depends(get_db)):
-    """Logout user by invalidating refresh token."""
-    user = db.query(User).filter(User.refresh_token == payload.refresh_token).first()
-    if user:
-        user.refresh_token = None
-        db.add(user)
-        db.commit()
+    """Logout the device the refresh token belongs to."""
+    session = find_session(db, payload.refresh_token, include_expired=True)
+    if not session:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    db.delete(session)
+    db.commit()
     return {"message": "Logged out successfully"}
 
 
+@router.get("/sessions", response_model=List[SessionOut])
+def list_sessions(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Devices the current user is logged in on, most recently used first."""
+    return db.query(UserSession).filter(
+        UserSession.user_id == current_user.id,
+        UserSession.expires_at > datetime.utcnow(),
+    ).order_by(UserSession.last_used_at.desc()).all()
+
+
+@router.delete("/sessions/{session_id}")
+def revoke_session(session_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Log one of the current user's devices out."""
+    session = db.query(UserSession).filter(
+        UserSession.id == session_id, UserSession.user_id == current_user.id
+    ).first()
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    db.delete(session)
+    db.commit()
+    return {"message": "Session revoked"}
+
+
 @router.post("/forgot-password")
-def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(get_db)):
+def forgot_password(payload: ForgotPasswordRequest, request: Request, db: Session = Depends(get_db)):
     """Send password reset token."""
+    enforce_rate_limit("forgot-password", request, payload.email)
     user = db.query(User).filter(User.email == payload.email).first()
     if not user:
         # Don't reveal if email exists
         return {"message": "If the email exists, a password reset link has been sent"}
     
-    # Generate reset token
-    reset_token = create_password_reset_token()
-    reset_expires = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
-    
-    user.reset_token = reset_token
-    user.reset_token_expires = reset_expires
-    db.add(user)
+    # Generate reset token; only its hash is stored and any earlier one stops working
+    reset_token = issue_reset_token(db, user.id)
     db.commit()
     
     # In production, send email here
@@ -110,7 +141,7 @@ def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(get_db
     return {
         "message": "Password reset token generated",
         "reset_token": reset_token,  # Remove in production
-        "expires_in": "1 hour"
+        "expires_in": f"{RESET_TOKEN_EXPIRE_HOURS} hour" + ("s" if RESET_TOKEN_EXPIRE_HOURS != 1 else "")
     }
 
 
@@ -118,26 +149,26 @@ def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(get_db
 def reset_password(payload: ResetPasswordRequest, db: Session = Depends(get_db)):
     """Reset password using reset token."""
     try:
-        user = db.query(User).filter(User.reset_token == payload.token).first()
+        reset = find_reset_token(db, payload.token)
+        user = db.query(User).filter(User.id == reset.user_id).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid reset token")
         
-        if not user.reset_token_expires:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reset token has expired")
-        
-        if user.reset_token_expires < datetime.now(timezone.utc).replace(tzinfo=None):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reset token has expired")
-        
-        # Update password and clear reset token
-        user.hashed_password = get_password_hash(payload.new_password)
-        user.reset_token = None
-        user.reset_token_expires = None
-        user.refresh_token = None  # Invalidate all sessions
+        # Update password and use up the reset token
+        user.hashed_password = hash_password(payload.new_password)
+        consume_reset_token(db, reset)
+        revoke_user_sessions(db, [user.id])  # Log out every device
+        bump_token_version(user)
         db.add(user)
         db.commit()
+        invalidate_principals([user.id])
+        record_token_versions(db, [user.id])
         
         return {"message": "Password reset successfully"}
-    except HTTPException:
+    except InvalidResetToken as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (HTTPException, PasswordHashingBusy):
         raise
     except Exception as e:
         db.rollback()
@@ -0,0 +1,72 @@
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from fastapi import Request
+from sqlalchemy.orm import Session
+from app.auth.models import UserSession
+from app.core.security import create_refresh_token, hash_token, REFRESH_TOKEN_EXPIRE_DAYS
+from app.core.ratelimit import client_ip
+
+# Devices a user can stay logged in on; logging in on one more ends the least recently used session
+MAX_SESSIONS_PER_USER = int(os.getenv("MAX_SESSIONS_PER_USER", "20"))
+
+
+def _device(session: UserSession, request: Optional[Request]) -> None:
+    if request is None:
+        return
+    user_agent = request.headers.get("user-agent")
+    session.user_agent = user_agent[:255] if user_agent else None
+    session.ip_address = client_ip(request)
+
+
+def open_session(db: Session, user_id: int, request: Optional[Request] = None) -> str:
+    """Start a session for a new device and return its refresh token. Does not commit."""
+    stale = [
+        session_id for (session_id,) in
+        db.query(UserSession.id).filter(UserSession.user_id == user_id)
+        .order_by(UserSession.last_used_at.desc(), UserSession.id.desc())
+        .offset(max(MAX_SESSIONS_PER_USER - 1, 0)).all()
+    ]
+    if stale:
+        db.query(UserSession).filter(UserSession.id.in_(stale)).delete(synchronize_session=False)
+
+    token = create_refresh_token(subject=str(user_id))
+    now = datetime.utcnow()
+    session = UserSession(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        created_at=now,
+        last_used_at=now,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    _device(session, request)
+    db.add(session)
+    return token
+
+
+def find_session(db: Session, refresh_token: str, include_expired: bool = False) -> Optional[UserSession]:
+    """The session a refresh token belongs to; one lookup on the unique token hash."""
+    query = db.query(UserSession).filter(UserSession.token_hash == hash_token(refresh_token))
+    if not include_expired:
+        query = query.filter(UserSession.expires_at > datetime.utcnow())
+    return query.first()
+
+
+def rotate_session(session: UserSession, request: Optional[Request] = None) -> str:
+    """Issue the session's next refresh token; the previous one stops working on commit."""
+    token = create_refresh_token(subject=str(session.user_id))
+    now = datetime.utcnow()
+    session.token_hash = hash_token(token)
+    session.last_used_at = now
+    session.expires_at = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    _device(session, request)
+    return token
+
+
+def revoke_user_sessions(db: Session, user_ids: Iterable[int]) -> int:
+    """Log these users out on every device. Does not commit."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    return db.query(UserSession).filter(UserSession.user_id.in_(user_ids)).delete(synchronize_session=False)
+
@@ -0,0 +1,74 @@
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.auth.models import UserSession, PasswordResetToken
+
+logger = logging.getLogger(__name__)
+
+# How often each worker deletes expired auth rows; 0 disables the sweeper
+AUTH_SWEEP_MINUTES = float(os.getenv("AUTH_SWEEP_MINUTES", "60"))
+# Expired rows deleted per statement, so a sweep never holds long locks
+AUTH_SWEEP_BATCH_SIZE = int(os.getenv("AUTH_SWEEP_BATCH_SIZE", "1000"))
+
+# Tables with an indexed expires_at whose expired rows are useless
+SWEPT_MODELS = [UserSession, PasswordResetToken]
+
+
+def purge_expired(db: Session, model, batch_size: int = AUTH_SWEEP_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """Delete rows of `model` past their expires_at, committing every `batch_size` rows. Returns the number deleted."""
+    now = now or datetime.utcnow()
+    deleted = 0
+    while True:
+        ids = [row_id for (row_id,) in db.query(model.id).filter(model.expires_at <= now).limit(batch_size).all()]
+        if not ids:
+            break
+        deleted += db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        if len(ids) < batch_size:
+            break
+    if deleted:
+        logger.info(f"Purged {deleted} expired rows from {model.__tablename__}")
+    return deleted
+
+
+def sweep_expired(db: Session) -> dict:
+    """Delete expired auth rows in batches. Returns the number deleted per table."""
+    return {model.__tablename__: purge_expired(db, model) for model in SWEPT_MODELS}
+
+
+def run_sweeper(stop_event: threading.Event, session_factory: Callable[[], Session] = SessionLocal,
+                interval_seconds: float = AUTH_SWEEP_MINUTES * 60) -> None:
+    """Sweep until stop_event is set. Several workers sweeping at once only repeat each other's deletes."""
+    while not stop_event.is_set():
+        db = session_factory()
+        try:
+            sweep_expired(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Auth sweeper error: {e}")
+        finally:
+            db.close()
+        stop_event.wait(interval_seconds)
+
+
+_sweeper_thread: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+
+
+def start_sweeper() -> None:
+    """Start the background sweeper thread (once per process)."""
+    global _sweeper_thread
+    if AUTH_SWEEP_MINUTES <= 0 or (_sweeper_thread is not None and _sweeper_thread.is_alive()):
+        return
+    _sweeper_stop.clear()
+    _sweeper_thread = threading.Thread(target=run_sweeper, args=(_sweeper_stop,), name="auth-sweeper", daemon=True)
+    _sweeper_thread.start()
+    logger.info("Auth sweeper started")
+
+
+def stop_sweeper() -> None:
+    _sweeper_stop.set()
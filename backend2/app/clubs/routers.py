@@ -8,7 +8,7 @@ from pathlib import Path
 from typing import Optional
 from app.core.database import get_db
 from app.core.deps import get_current_user
-from app.users.models import User
+from app.core.principal import Principal
 from app.groups.models import Club
 from app.groups.schemas import ClubOut, CountryOut, CompetitionOut, TeamOut
 
@@ -58,7 +58,7 @@ def write_cache(cache_file: Path, data):
 @router.get("/countries", response_model=list[CountryOut])
 def get_countries(
     force_refresh: bool = Query(False, description="Force refresh from API"),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get list of countries with football leagues.
@@ -105,7 +105,7 @@ def get_countries(
 def get_competitions(
     country_id: int = Query(..., description="Country ID to filter competitions"),
     force_refresh: bool = Query(False, description="Force refresh from API"),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get list of competitions for a specific country.
@@ -160,7 +160,7 @@ def get_teams(
     season_num: Optional[int] = Query(None, description="Season number (optional, uses current if not provided)"),
     stage_num: Optional[int] = Query(None, description="Stage number (optional, uses current if not provided)"),
     force_refresh: bool = Query(False, description="Force refresh from API"),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get list of teams from competition standings.
@@ -279,7 +279,7 @@ def create_club_from_team(
     color: Optional[str] = Query(None, description="Team primary color"),
     away_color: Optional[str] = Query(None, description="Team away color"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create or update a club from team selection.
@@ -334,7 +334,7 @@ def create_club_from_team(
 @router.get("", response_model=list[ClubOut])
 def list_clubs(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get all clubs stored in the database."""
     clubs = db.query(Club).all()
@@ -345,7 +345,7 @@ def list_clubs(
 def get_club(
     club_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific club by ID."""
     club = db.query(Club).filter(Club.id == club_id).first()
@@ -358,7 +358,7 @@ def get_club(
 
 
 @router.delete("/cache/clear")
-def clear_cache(current_user: User = Depends(get_current_user)):
+def clear_cache(current_user: Principal = Depends(get_current_user)):
     """Clear all cached data. Useful after code changes."""
     import shutil
     try:
@@ -17,3 +17,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(db):
+    """insert() of the session's dialect, which supports ON CONFLICT (Postgres and SQLite only)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+    return insert
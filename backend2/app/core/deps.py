@@ -1,25 +1,62 @@
+import os
+import hashlib
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from .database import get_db
-from app.users.models import User
+from .cache import TTLCache
+from .principal import Principal, resolve_principal
 from .security import decode_token
 
 
 auth_scheme = HTTPBearer(auto_error=False)
 
+# Verified claims by token digest, so a burst of requests with one token verifies it once
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+token_claims_cache = TTLCache(TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_TTL_SECONDS)
 
-def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(auth_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    if credentials is None:
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    """decode_token with verified claims cached until the token's own exp at the latest."""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_claims_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = decode_token(token)
+    # Tokens without exp never expire in jose, so they are not worth keeping either
+    if payload is not None and "exp" in payload:
+        token_claims_cache.set(key, payload, expires_at=payload["exp"])
+    return payload
+
+
+def _authenticate(token: Optional[str], db: Session) -> Principal:
+    if token is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    payload = decode_token(credentials.credentials)
+    payload = decode_token_cached(token)
     if payload is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.id == int(payload.get("sub"))).first()
-    if user is None or not user.is_active:
+    principal = resolve_principal(db, payload)
+    if principal is None or not principal.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
-    return user
+    return principal
+
+
+def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(auth_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    return _authenticate(credentials.credentials if credentials else None, db)
+
+
+def get_current_user_for_stream(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(auth_scheme),
+    access_token: Optional[str] = Query(None, description="Access token, for clients that cannot send headers (EventSource)"),
+    db: Session = Depends(get_db, scope="function"),
+) -> Principal:
+    """
+    Like get_current_user, but also accepts the token as a query parameter.
+    Its session closes when the endpoint returns, not when a streamed response ends.
+    """
+    return _authenticate(credentials.credentials if credentials else access_token, db)
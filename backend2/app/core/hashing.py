@@ -0,0 +1,152 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+from .security import get_password_hash, verify_password, verify_and_update_password
+
+logger = logging.getLogger(__name__)
+
+# Processes that hash passwords for this worker; 0 hashes inline on the calling thread
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hashes queued or running at once; beyond this, requests are turned away instead of piling up
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+# Suggested client back-off when the pool is saturated
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+# Passwords per pool job in hash_many; small, so logins queued meanwhile are not held up for long
+PASSWORD_HASH_BATCH_SIZE = int(os.getenv("PASSWORD_HASH_BATCH_SIZE", "16"))
+
+
+class PasswordHashingBusy(Exception):
+    """The hashing pool is saturated. server.py turns this into 503 with Retry-After."""
+
+    def __init__(self, retry_after: int = PASSWORD_HASH_RETRY_AFTER_SECONDS):
+        super().__init__("Password hashing is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs pbkdf2 hashing and verification in a small process pool so the GIL-bound
+    work does not stall the other requests of this worker. At most `max_pending`
+    jobs are admitted; callers past that get PasswordHashingBusy immediately.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING,
+                 timeout: float = PASSWORD_HASH_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: never fork a process that is running server threads
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                logger.info(f"Password hashing pool started with {self.workers} processes")
+            return self._pool
+
+    def _submit(self, fn: Callable, *args, wait: bool = False) -> Future:
+        """Start a job in a free slot. With `wait`, waits up to `timeout` for one instead of failing fast."""
+        acquired = self._slots.acquire(timeout=self.timeout) if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise PasswordHashingBusy()
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._slots.release()
+            return future
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job finishes, even if the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    @staticmethod
+    def _result(future: Future, timeout: float):
+        """The job's result; a job still queued or running after `timeout` is turned away like a full pool."""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy() from None
+
+    def _run(self, fn: Callable, *args):
+        return self._result(self._submit(fn, *args), self.timeout)
+
+    def hash(self, password: str) -> str:
+        return self._run(get_password_hash, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(verify_password, password, hashed_password)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return self._run(verify_and_update_password, password, hashed_password)
+
+    def hash_many(self, passwords: list[str], batch_size: int = PASSWORD_HASH_BATCH_SIZE) -> list[str]:
+        """
+        Hash passwords in batches spread over the pool's processes, in order. At
+        most one batch per process is in flight, so bulk work never takes every
+        slot from interactive requests; it waits for a slot rather than failing,
+        and raises PasswordHashingBusy only when a slot or a batch takes too long.
+        """
+        batches = [passwords[i:i + batch_size] for i in range(0, len(passwords), batch_size)]
+        in_flight = max(self.workers, 1)
+        futures: list[Future] = []
+        hashed: list[str] = []
+        try:
+            for batch in batches:
+                if len(futures) >= in_flight:
+                    hashed.extend(self._result(futures.pop(0), self.timeout * batch_size))
+                futures.append(self._submit(_hash_batch, batch, wait=True))
+            while futures:
+                hashed.extend(self._result(futures.pop(0), self.timeout * batch_size))
+        finally:
+            # Batches queued behind a failed one are not needed
+            for future in futures:
+                future.cancel()
+        return hashed
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+def _hash_batch(passwords: list[str]) -> list[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+password_hasher = PasswordHasher()
+
+
+def hash_password(password: str) -> str:
+    """get_password_hash through the hashing pool. Raises PasswordHashingBusy when saturated."""
+    return password_hasher.hash(password)
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash many passwords through the hashing pool, e.g. for a bulk import."""
+    return password_hasher.hash_many(passwords)
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """verify_password through the hashing pool. Raises PasswordHashingBusy when saturated."""
+    return password_hasher.verify(password, hashed_password)
+
+
+def check_password_and_rehash(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """verify_and_update_password through the hashing pool, in one job."""
+    return password_hasher.verify_and_update(password, hashed_password)
@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine, Base
 from app.users.models import User
 from app.core.security import get_password_hash
+from app.core.principal import invalidate_principals, bump_token_version, record_token_versions
+from app.auth.sessions import revoke_user_sessions
 
 logger = logging.getLogger(__name__)
 
@@ -109,9 +111,12 @@ def reset_admin_password(email: str, new_password: str) -> bool:
             return False
         
         admin_user.hashed_password = get_password_hash(new_password)
-        admin_user.refresh_token = None  # Invalidate all sessions
+        revoke_user_sessions(db, [admin_user.id])  # Log out every device
+        bump_token_version(admin_user)
         db.add(admin_user)
         db.commit()
+        invalidate_principals([admin_user.id])
+        record_token_versions(db, [admin_user.id])
         
         logger.info(f"✅ Admin password reset successfully: {email}")
         return True
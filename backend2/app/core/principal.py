@@ -0,0 +1,140 @@
+import os
+import time
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+from app.users.models import User
+from .cache import TTLCache
+
+# Short, so a change made through another worker is picked up quickly
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+# "cached": the principal comes from principal_cache or the users table.
+# "stateless": access tokens carry the principal and a token version, and are
+# trusted until they expire unless the version has been bumped since.
+AUTH_MODE = os.getenv("AUTH_MODE", "cached")
+# How often each worker reloads token versions bumped by other workers
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The parts of a user that authentication and authorization checks need."""
+    id: int
+    is_active: bool
+    is_superuser: bool
+    name: Optional[str] = None
+
+
+principal_cache = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+class TokenVersionTable:
+    """
+    Current token version of every user whose version was ever bumped, plus users
+    deleted through this worker. Tokens carrying an older version are stale.
+    Only bumped users are held, so the table stays small.
+    """
+
+    def __init__(self, refresh_seconds: float = TOKEN_VERSION_REFRESH_SECONDS, clock=time.monotonic):
+        self._refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._versions: dict[int, int] = {}
+        self._deleted: set[int] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        with self._lock:
+            return user_id not in self._deleted and version >= self._versions.get(user_id, 0)
+
+    def set(self, user_id: int, version: Optional[int]) -> None:
+        """Record a user's version; None means the user no longer exists."""
+        with self._lock:
+            if version is None:
+                self._deleted.add(user_id)
+            else:
+                self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+    def refresh(self, db: Session) -> None:
+        rows = db.query(User.id, User.token_version).filter(User.token_version > 0).all()
+        with self._lock:
+            for user_id, version in rows:
+                self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+            self._loaded_at = self._clock()
+
+    def maybe_refresh(self, db: Session) -> None:
+        if self._loaded_at is None or self._clock() - self._loaded_at >= self._refresh_seconds:
+            self.refresh(db)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._deleted.clear()
+            self._loaded_at = None
+
+
+token_versions = TokenVersionTable()
+
+
+def access_token_claims(user: User) -> dict:
+    """Claims create_access_token should embed for a user; none unless AUTH_MODE is stateless."""
+    if AUTH_MODE != "stateless":
+        return {}
+    return {
+        "name": user.name,
+        "active": user.is_active,
+        "superuser": user.is_superuser,
+        "ver": user.token_version or 0,
+    }
+
+
+def resolve_principal(db: Session, payload: dict) -> Optional[Principal]:
+    """
+    Principal of a verified access token. In stateless mode it is read from the
+    token's claims and only checked against the token version table; tokens
+    issued before the mode was enabled fall back to load_principal.
+    """
+    user_id = int(payload.get("sub"))
+    if AUTH_MODE == "stateless" and "ver" in payload:
+        token_versions.maybe_refresh(db)
+        if not token_versions.is_current(user_id, payload["ver"]):
+            return None
+        return Principal(id=user_id, is_active=payload["active"], is_superuser=payload["superuser"], name=payload.get("name"))
+    return load_principal(db, user_id)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """Principal of a user from the cache, or from the four columns it needs on a miss."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    row = db.query(User.id, User.is_active, User.is_superuser, User.name).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    principal = Principal(id=row.id, is_active=row.is_active, is_superuser=row.is_superuser, name=row.name)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principals(user_ids: Iterable[int]) -> None:
+    """Drop cached principals. Call after committing any change to a user's status, role or credentials."""
+    for user_id in user_ids:
+        principal_cache.delete(user_id)
+
+
+def bump_token_version(user: User) -> None:
+    """Make the user's access tokens stale once the caller commits. Call record_token_versions after."""
+    user.token_version = (user.token_version or 0) + 1
+
+
+def record_token_versions(db: Session, user_ids: Iterable[int]) -> None:
+    """Publish committed token versions (and deletions) of these users to this worker's table."""
+    user_ids = list(user_ids)
+    if AUTH_MODE != "stateless" or not user_ids:
+        return
+    versions = dict(db.query(User.id, User.token_version).filter(User.id.in_(user_ids)).all())
+    for user_id in user_ids:
+        token_versions.set(user_id, versions.get(user_id))
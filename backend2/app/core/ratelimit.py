@@ -0,0 +1,207 @@
+import os
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+from fastapi import HTTPException, Request, status
+from sqlalchemy.exc import IntegrityError
+from app.core.database import SessionLocal
+from app.auth.models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# "memory" keeps buckets in this worker; "database" shares them between workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+# Use the last X-Forwarded-For hop as the client IP; only behind a proxy that sets it
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# How often the database backend deletes buckets that have refilled
+RATE_LIMIT_PRUNE_SECONDS = float(os.getenv("RATE_LIMIT_PRUNE_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Bursts of up to `capacity` requests, refilled evenly over `period` seconds."""
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse "10/60": 10 requests per 60 seconds."""
+        capacity, period = value.split("/")
+        return cls(int(capacity), float(period))
+
+
+# route -> key kind -> limit. A request is admitted only if every one of its buckets has a token.
+RATE_LIMITS: dict[str, dict[str, Limit]] = {
+    "login": {
+        "ip": Limit.parse(os.getenv("RATE_LIMIT_LOGIN_IP", "30/60")),
+        "email": Limit.parse(os.getenv("RATE_LIMIT_LOGIN_EMAIL", "10/300")),
+    },
+    "forgot-password": {
+        "ip": Limit.parse(os.getenv("RATE_LIMIT_FORGOT_PASSWORD_IP", "10/300")),
+        "email": Limit.parse(os.getenv("RATE_LIMIT_FORGOT_PASSWORD_EMAIL", "3/900")),
+    },
+}
+
+
+def _drain(tokens: float, updated_at: float, now: float, limit: Limit) -> tuple[float, float]:
+    """Refill a bucket up to now and take one token. Returns (tokens left, seconds to wait; 0 if taken)."""
+    tokens = min(limit.capacity, tokens + max(0.0, now - updated_at) * limit.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.rate
+
+
+class MemoryBucketStore:
+    """Buckets of this worker only. The least recently used bucket is dropped past `max_buckets`."""
+
+    def __init__(self, max_buckets: int = RATE_LIMIT_MAX_BUCKETS, clock: Callable[[], float] = time.monotonic):
+        self.max_buckets = max_buckets
+        self._clock = clock
+        # key -> (tokens, updated at)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = self._clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+            tokens, retry_after = _drain(tokens, updated_at, now, limit)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBucketStore:
+    """
+    Buckets in the rate_limit_buckets table, so a client is limited across all
+    workers. Each take locks its row (SELECT ... FOR UPDATE on Postgres) in a
+    short session of its own, independent of the request's session.
+    """
+
+    def __init__(self, session_factory=SessionLocal, retention_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        self._session_factory = session_factory
+        # A bucket untouched for the longest period is full again and can be deleted
+        self.retention_seconds = retention_seconds or max(
+            limit.period for limits in RATE_LIMITS.values() for limit in limits.values()
+        )
+        self._clock = clock
+        self._pruned_at = clock()
+
+    def take(self, key: str, limit: Limit, _retry: bool = True) -> float:
+        now = self._clock()
+        db = self._session_factory()
+        try:
+            bucket = db.query(RateLimitBucket).filter(RateLimitBucket.key == key).with_for_update().first()
+            if bucket is None:
+                bucket = RateLimitBucket(key=key, tokens=limit.capacity, updated_at=now)
+                db.add(bucket)
+            bucket.tokens, retry_after = _drain(bucket.tokens, bucket.updated_at, now, limit)
+            bucket.updated_at = now
+            db.commit()
+        except IntegrityError:
+            # Another worker created the bucket first; take from theirs
+            db.rollback()
+            if not _retry:
+                raise
+            return self.take(key, limit, _retry=False)
+        finally:
+            db.close()
+        if now - self._pruned_at >= RATE_LIMIT_PRUNE_SECONDS:
+            self._pruned_at = now
+            self.prune()
+        return retry_after
+
+    def prune(self) -> int:
+        db = self._session_factory()
+        try:
+            cutoff = self._clock() - self.retention_seconds
+            deleted = db.query(RateLimitBucket).filter(RateLimitBucket.updated_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def clear(self) -> None:
+        db = self._session_factory()
+        try:
+            db.query(RateLimitBucket).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class RateLimiter:
+    """Per-route token buckets keyed by client attributes such as IP and email."""
+
+    def __init__(self, store, limits: dict[str, dict[str, Limit]] = RATE_LIMITS, enabled: bool = RATE_LIMIT_ENABLED):
+        self.store = store
+        self.limits = limits
+        self.enabled = enabled
+
+    def check(self, route: str, **keys: Optional[str]) -> float:
+        """
+        Take a token from each of the route's buckets for the given keys, stopping
+        at the first empty one. Returns 0 if admitted, else seconds until a retry can succeed.
+        """
+        if not self.enabled:
+            return 0.0
+        for kind, limit in self.limits.get(route, {}).items():
+            value = keys.get(kind)
+            if not value:
+                continue
+            # Hashed so bucket keys have a fixed size and the shared table holds no emails
+            digest = hashlib.sha256(value.strip().lower().encode()).hexdigest()[:32]
+            retry_after = self.store.take(f"{route}:{kind}:{digest}", limit)
+            if retry_after > 0:
+                logger.info(f"Rate limited {route} by {kind}")
+                return retry_after
+        return 0.0
+
+    def reset(self) -> None:
+        self.store.clear()
+
+
+def _build_store():
+    if RATE_LIMIT_BACKEND == "database":
+        return DatabaseBucketStore()
+    return MemoryBucketStore()
+
+
+rate_limiter = RateLimiter(_build_store())
+
+
+def client_ip(request: Request) -> Optional[str]:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else None
+
+
+def enforce_rate_limit(route: str, request: Request, email: Optional[str] = None) -> None:
+    """Raise 429 with Retry-After when the client or the email has used up the route's budget."""
+    retry_after = rate_limiter.check(route, ip=client_ip(request), email=email)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
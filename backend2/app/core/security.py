@@ -1,12 +1,37 @@
 import os
+import math
+import time
 import secrets
+import hashlib
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
 
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# New hashes use this scheme; hashes in any other scheme (and pbkdf2_sha256, the
+# original one) still verify and are replaced on the user's next login.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "pbkdf2_sha256")
+PASSWORD_HASH_LEGACY_SCHEMES = [
+    scheme for scheme in os.getenv("PASSWORD_HASH_LEGACY_SCHEMES", "pbkdf2_sha256").split(",")
+    if scheme and scheme != PASSWORD_HASH_SCHEME
+]
+# Unset keeps passlib's default cost for the scheme
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS")) if os.getenv("PASSWORD_HASH_ROUNDS") else None
+
+
+def build_crypt_context(scheme: str = PASSWORD_HASH_SCHEME, rounds: Optional[int] = None,
+                        legacy_schemes: Optional[list] = None) -> CryptContext:
+    """CryptContext hashing with `scheme` at `rounds`; hashes at any other cost need an update."""
+    options = {}
+    if rounds is not None:
+        # Pinning min and max makes needs_update flag hashes made at any other cost
+        options = {f"{scheme}__{key}": rounds for key in ("default_rounds", "min_rounds", "max_rounds")}
+    return CryptContext(schemes=[scheme] + list(legacy_schemes or []), deprecated="auto", **options)
+
+
+pwd_context = build_crypt_context(PASSWORD_HASH_SCHEME, PASSWORD_HASH_ROUNDS, PASSWORD_HASH_LEGACY_SCHEMES)
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-change-me")
 JWT_ALGORITHM = "HS256"
@@ -15,18 +40,24 @@ REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 RESET_TOKEN_EXPIRE_HOURS = int(os.getenv("RESET_TOKEN_EXPIRE_HOURS", "1"))
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(subject: str, expires_delta: Optional[timedelta] = None, claims: Optional[dict] = None) -> str:
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "type": "access"}
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
 def create_refresh_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    # jti keeps tokens issued to the same user in the same second distinct
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": secrets.token_urlsafe(16)}
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
+def hash_token(token: str) -> str:
+    """SHA-256 hex digest under which a token is stored and looked up."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def create_password_reset_token() -> str:
     return secrets.token_urlsafe(32)
 
@@ -39,6 +70,48 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """(valid, replacement hash or None). A replacement is returned when the stored hash uses an old scheme or cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def calibrate_rounds(scheme: str, target_ms: float, samples: int = 5) -> dict:
+    """
+    Time hashing at the scheme's default cost on this host and suggest the rounds
+    that take about `target_ms` per hash. One hash at that cost keeps one core
+    busy for target_ms, so a core verifies about 1000 / target_ms logins per second.
+    """
+    handler = get_crypt_handler(scheme)
+    if "rounds" not in handler.setting_kwds:
+        raise ValueError(f"{scheme} has no tunable rounds")
+
+    def measure(rounds: int) -> float:
+        hasher = handler.using(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            hasher.hash("calibration-password")
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)[len(timings) // 2]
+
+    base_rounds = handler.default_rounds
+    base_ms = measure(base_rounds)
+    if handler.rounds_cost == "log2":
+        suggested = base_rounds + round(math.log2(target_ms / base_ms))
+    else:
+        suggested = round(base_rounds * target_ms / base_ms)
+    suggested = max(handler.min_rounds, min(handler.max_rounds, suggested))
+    suggested_ms = measure(suggested)
+    return {
+        "scheme": scheme,
+        "base_rounds": base_rounds,
+        "base_ms": base_ms,
+        "suggested_rounds": suggested,
+        "suggested_ms": suggested_ms,
+        "logins_per_core_per_second": 1000 / suggested_ms,
+    }
+
+
 def decode_token(token: str) -> Optional[dict]:
     try:
         return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
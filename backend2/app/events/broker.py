@@ -0,0 +1,164 @@
+import os
+import json
+import select
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# "memory" delivers events inside this process only; "postgres" fans them out
+# to every worker through LISTEN/NOTIFY on the application database.
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+EVENTS_CHANNEL = "seatduty_events"
+# Per-subscriber buffer; a client that falls this far behind loses the oldest events
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Events of one group delivered to one asyncio consumer (e.g. an SSE response)."""
+
+    def __init__(self, group_id: int, loop: asyncio.AbstractEventLoop):
+        self.group_id = group_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def _put(self, event: dict) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: dict) -> None:
+        """Thread-safe hand-off into the subscriber's event loop."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed; the subscriber is going away
+            pass
+
+
+class EventBroker:
+    """In-process pub/sub of per-group change events."""
+
+    def __init__(self):
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, group_id: int) -> Subscription:
+        """Subscribe from inside a running event loop."""
+        subscription = Subscription(group_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(group_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.group_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.group_id]
+
+    def subscriber_count(self, group_id: int) -> int:
+        with self._lock:
+            return len(self._subscriptions.get(group_id, ()))
+
+    def dispatch(self, event: dict) -> None:
+        """Deliver an event to the local subscribers of its group."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(event["group_id"], ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def publish(self, group_id: int, event_type: str, data: Optional[dict] = None) -> None:
+        """Publish an event to a group. Safe to call from any thread; never raises."""
+        event = {
+            # Unique across workers, which all emit each other's events under the postgres backend
+            "id": uuid.uuid4().hex,
+            "group_id": group_id,
+            "type": event_type,
+            "data": data or {},
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        if EVENTS_BACKEND == "postgres":
+            try:
+                _notify(event)
+                return
+            except Exception as e:
+                logger.warning(f"pg_notify failed, delivering locally only: {e}")
+        self.dispatch(event)
+
+
+broker = EventBroker()
+
+
+def publish_group_event(group_id: int, event_type: str, data: Optional[dict] = None) -> None:
+    broker.publish(group_id, event_type, data)
+
+
+def _notify(event: dict) -> None:
+    from sqlalchemy import text
+    from app.core.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"), {
+            "channel": EVENTS_CHANNEL,
+            "payload": json.dumps(event, default=str),
+        })
+
+
+_listener_thread: Optional[threading.Thread] = None
+_listener_stop = threading.Event()
+
+
+def _listen(stop_event: threading.Event) -> None:
+    """Forward NOTIFY payloads from every worker to this worker's subscribers."""
+    import psycopg2
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+    from app.core.database import DATABASE_URL
+
+    while not stop_event.is_set():
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+        except psycopg2.Error as e:
+            logger.warning(f"Event listener could not connect: {e}")
+            stop_event.wait(5)
+            continue
+        try:
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {EVENTS_CHANNEL}")
+            while not stop_event.is_set():
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    try:
+                        broker.dispatch(json.loads(notification.payload))
+                    except (ValueError, KeyError) as e:
+                        logger.warning(f"Ignoring malformed event: {e}")
+        except psycopg2.Error as e:
+            logger.warning(f"Event listener connection lost: {e}")
+        finally:
+            conn.close()
+
+
+def start_listener() -> None:
+    """Start the LISTEN thread when the postgres backend is configured."""
+    global _listener_thread
+    if EVENTS_BACKEND != "postgres":
+        return
+    if _listener_thread is not None and _listener_thread.is_alive():
+        return
+    _listener_stop.clear()
+    _listener_thread = threading.Thread(target=_listen, args=(_listener_stop,), name="event-listener", daemon=True)
+    _listener_thread.start()
+    logger.info("Event listener started")
+
+
+def stop_listener() -> None:
+    _listener_stop.set()
@@ -0,0 +1,62 @@
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.deps import get_current_user_for_stream
+from app.core.principal import Principal
+from app.groups.models import GroupMember
+from app.events.broker import broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Comment line sent when idle so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def event_stream(request: Request, group_id: int, keepalive_seconds: float = KEEPALIVE_SECONDS):
+    subscription = broker.subscribe(group_id)
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def require_group_member(
+    group_id: int,
+    # Closed before the stream starts, so an open stream holds no pooled connection
+    db: Session = Depends(get_db, scope="function"),
+    current_user: Principal = Depends(get_current_user_for_stream),
+) -> int:
+    member = db.query(GroupMember).filter(
+        GroupMember.group_id == group_id,
+        GroupMember.user_id == current_user.id,
+    ).first()
+    if member is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this group")
+    return group_id
+
+
+@router.get("/groups/{group_id}")
+async def stream_group_events(request: Request, group_id: int = Depends(require_group_member)):
+    """
+    Server-sent events for a group: game_rescheduled, duty_assigned, member_joined.
+    EventSource clients pass the token as ?access_token=...
+    """
+    return StreamingResponse(
+        event_stream(request, group_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1 @@
+# Games module
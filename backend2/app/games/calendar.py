@@ -0,0 +1,162 @@
+import os
+import hmac
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+from sqlalchemy.orm import Session
+from app.core.security import JWT_SECRET_KEY
+from app.groups.models import Group
+from app.games.models import Game, SeatDutyAssignment
+
+# Safety net for changes made by other workers, whose invalidations never reach this process
+CALENDAR_CACHE_TTL_SECONDS = int(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "900"))
+CALENDAR_CACHE_MAX_ENTRIES = int(os.getenv("CALENDAR_CACHE_MAX_ENTRIES", "10000"))
+# Games without an end time in the feed are shown as this long
+GAME_DURATION = timedelta(hours=2)
+# Duties stay in the feed for a while after the game so calendars do not drop them at kickoff
+PAST_DUTY_WINDOW = timedelta(days=7)
+
+
+def calendar_signature(user_id: int) -> str:
+    """Signature that makes a user's calendar URL unguessable without a login."""
+    return hmac.new(JWT_SECRET_KEY.encode(), f"calendar:{user_id}".encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_calendar_signature(user_id: int, signature: str) -> bool:
+    return hmac.compare_digest(calendar_signature(user_id), signature)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Do not split a UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return "\r\n ".join(parts)
+
+
+def _ical_time(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_calendar(duties: Iterable[tuple[SeatDutyAssignment, Game, Group]]) -> str:
+    """iCalendar body with one event per duty. Timestamps are naive UTC."""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//SeatDuty//Seat Duty//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:Seat duty",
+    ]
+    for assignment, game, group in duties:
+        title = f"Seat duty: {game.home_competitor_name or 'Home'} vs {game.away_competitor_name or 'Away'}"
+        description = f"Group: {group.name}"
+        if game.competition_display_name:
+            description += f"\nCompetition: {game.competition_display_name}"
+        if assignment.status == "completed":
+            description += "\nCompleted"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:assignment-{assignment.id}@seatduty",
+            # DTSTAMP must not change between renders of unchanged data, or every poll looks like an update;
+            # upsert_games leaves game.updated_at alone when a sync brings nothing new
+            f"DTSTAMP:{_ical_time(max(assignment.updated_at, game.updated_at))}",
+            f"DTSTART:{_ical_time(game.start_time)}",
+            f"DTEND:{_ical_time(game.start_time + GAME_DURATION)}",
+            f"SUMMARY:{_escape(title)}",
+            f"DESCRIPTION:{_escape(description)}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def load_duties(db: Session, user_id: int, now: Optional[datetime] = None) -> list[tuple[SeatDutyAssignment, Game, Group]]:
+    """A user's duties that are upcoming or just past, excluding declined ones."""
+    now = now or datetime.utcnow()
+    return (
+        db.query(SeatDutyAssignment, Game, Group)
+        .join(Game, Game.id == SeatDutyAssignment.game_id)
+        .join(Group, Group.id == SeatDutyAssignment.group_id)
+        .filter(
+            SeatDutyAssignment.user_id == user_id,
+            SeatDutyAssignment.status != "declined",
+            Game.start_time > now - PAST_DUTY_WINDOW,
+        )
+        .order_by(Game.start_time.asc(), SeatDutyAssignment.id.asc())
+        .all()
+    )
+
+
+class CalendarCache:
+    """
+    Rendered feeds by user ID with their ETag. Entries are dropped when one of the
+    user's assignments or games changes (see invalidate), so repeated polls are
+    answered without touching the database.
+    """
+
+    def __init__(self, ttl_seconds: float = CALENDAR_CACHE_TTL_SECONDS, max_entries: int = CALENDAR_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        # user_id -> (built at, etag, body)
+        self._entries: dict[int, tuple[float, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> tuple[str, str]:
+        """(etag, body) of the user's feed, rendering it only if not cached."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[0] < self._ttl:
+                return entry[1], entry[2]
+        body = render_calendar(load_duties(db, user_id))
+        etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (now, etag, body)
+        return etag, body
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+calendar_cache = CalendarCache()
+
+
+def invalidate_calendars(user_ids: Iterable[int]) -> None:
+    calendar_cache.invalidate(user_ids)
+
+
+def invalidate_calendars_for_games(db: Session, game_ids: Iterable[int]) -> None:
+    """Drop the feeds of everyone on duty for these games."""
+    game_ids = list(game_ids)
+    if not game_ids:
+        return
+    invalidate_calendars(
+        user_id for (user_id,) in
+        db.query(SeatDutyAssignment.user_id).filter(SeatDutyAssignment.game_id.in_(game_ids)).distinct()
+    )
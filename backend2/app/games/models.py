@@ -0,0 +1,83 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Float,
+    UniqueConstraint,
+    ForeignKey,
+    Index,
+)
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class Game(Base):
+    """A fixture as returned by 365scores. The primary key is the 365scores game ID."""
+    __tablename__ = "games"
+    __table_args__ = (
+        Index("ix_games_home_competitor_start_time", "home_competitor_id", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    competition_id = Column(Integer, nullable=True)
+    competition_display_name = Column(String(255), nullable=True)
+    season_num = Column(Integer, nullable=True)
+    round_name = Column(String(255), nullable=True)
+    # Stored as naive UTC, like the other timestamps
+    start_time = Column(DateTime, nullable=False)
+    status_group = Column(Integer, nullable=True)
+    status_text = Column(String(255), nullable=True)
+    short_status_text = Column(String(255), nullable=True)
+    game_time = Column(Float, nullable=True)
+    home_competitor_id = Column(Integer, nullable=True)
+    home_competitor_name = Column(String(255), nullable=True)
+    away_competitor_id = Column(Integer, nullable=True, index=True)
+    away_competitor_name = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SeatDutyAssignment(Base):
+    __tablename__ = "seat_duty_assignments"
+    __table_args__ = (
+        UniqueConstraint("group_id", "game_id", "user_id", name="uq_assignment_group_game_user"),
+        Index("ix_assignments_group_game", "group_id", "game_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # assigned, completed, declined
+    status = Column(String(50), nullable=False, default="assigned")
+    assigned_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User")
+
+
+class DutyLedger(Base):
+    """
+    Running seat duty totals of one member in one group, kept in step with
+    seat_duty_assignments so the planner never has to aggregate them.
+    """
+    __tablename__ = "duty_ledger"
+    __table_args__ = (
+        UniqueConstraint("group_id", "user_id", name="uq_duty_ledger_group_user"),
+        # Candidates are read in fairness order straight off this index
+        Index("ix_duty_ledger_group_score_user", "group_id", "score", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Assignments currently in each status
+    assigned_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    declined_count = Column(Integer, nullable=False, default=0)
+    # Sum of duty_weight(assigned_at) over assignments not declined, see services.duty_weight
+    score = Column(Float, nullable=False, default=0.0)
+    last_assigned_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,201 @@
+import os
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.groups.models import Group, Club
+from app.games.models import Game
+from app.games import services
+
+logger = logging.getLogger(__name__)
+
+GAME_POLLER_ENABLED = os.getenv("GAME_POLLER_ENABLED", "false").lower() == "true"
+# How often the poller re-reads games from the database to pick up new fixtures
+POLLER_RELOAD_MINUTES = int(os.getenv("POLLER_RELOAD_MINUTES", "10"))
+
+# 365scores statusGroup values
+STATUS_LIVE = 3
+STATUS_FINISHED = 4
+
+# Games that never report full time are dropped this long after kickoff
+GIVE_UP_AFTER_KICKOFF = timedelta(hours=12)
+
+# (time until kickoff at least, poll interval), checked in order
+PRE_KICKOFF_INTERVALS = [
+    (timedelta(days=14), timedelta(days=1)),
+    (timedelta(days=2), timedelta(hours=6)),
+    (timedelta(hours=6), timedelta(hours=1)),
+    (timedelta(hours=1), timedelta(minutes=15)),
+]
+NEAR_KICKOFF_INTERVAL = timedelta(minutes=1)
+
+
+def poll_interval(start_time: datetime, status_group: Optional[int], now: datetime) -> Optional[timedelta]:
+    """
+    How long to wait before polling a game again, or None to stop polling it.
+    Rare for games weeks away, every minute from an hour before kickoff until
+    full time.
+    """
+    if status_group == STATUS_FINISHED:
+        return None
+    if now - start_time > GIVE_UP_AFTER_KICKOFF:
+        return None
+    if status_group == STATUS_LIVE:
+        return NEAR_KICKOFF_INTERVAL
+    until_kickoff = start_time - now
+    for threshold, interval in PRE_KICKOFF_INTERVALS:
+        if until_kickoff >= threshold:
+            # Never sleep past the point where a shorter interval applies
+            return min(interval, until_kickoff - threshold + NEAR_KICKOFF_INTERVAL)
+    return NEAR_KICKOFF_INTERVAL
+
+
+class GameStatusPoller:
+    """
+    Keeps unfinished games of followed clubs on a priority queue ordered by
+    their next poll time. Due games are grouped by competitor so each poll
+    round costs one upstream call per competitor, not per game.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        fetch: Optional[Callable[[str], object]] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._session_factory = session_factory
+        self._fetch = fetch or services.fetch_fixtures_limited
+        self._clock = clock
+        self._queue: list[tuple[datetime, int]] = []
+        # game_id -> (due time, competitor polled for it); queue entries not matching are stale
+        self._scheduled: dict[int, tuple[datetime, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    def _schedule(self, game_id: int, due: datetime, competitor: str) -> None:
+        self._scheduled[game_id] = (due, competitor)
+        heapq.heappush(self._queue, (due, game_id))
+
+    def load(self, db: Session) -> None:
+        """(Re)schedule all unfinished games of clubs that at least one group follows."""
+        now = self._clock()
+        followed = {
+            external_id for (external_id,) in
+            db.query(Club.external_id).join(Group, Group.club_id == Club.id).distinct().all()
+        }
+        games = db.query(Game.id, Game.start_time, Game.status_group, Game.home_competitor_id, Game.away_competitor_id).filter(
+            Game.start_time > now - GIVE_UP_AFTER_KICKOFF,
+            (Game.status_group.is_(None)) | (Game.status_group != STATUS_FINISHED),
+        ).all()
+        with self._lock:
+            for game_id, start_time, status_group, home_id, away_id in games:
+                competitor = str(home_id) if str(home_id) in followed else str(away_id)
+                if competitor not in followed or game_id in self._scheduled:
+                    continue
+                interval = poll_interval(start_time, status_group, now)
+                if interval is not None:
+                    self._schedule(game_id, now + interval, competitor)
+
+    def next_due(self) -> Optional[datetime]:
+        with self._lock:
+            while self._queue:
+                due, game_id = self._queue[0]
+                if self._scheduled.get(game_id, (None,))[0] == due:
+                    return due
+                heapq.heappop(self._queue)
+        return None
+
+    def _pop_due(self, now: datetime) -> dict[str, set[int]]:
+        due_by_competitor: dict[str, set[int]] = {}
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                due, game_id = heapq.heappop(self._queue)
+                scheduled = self._scheduled.get(game_id)
+                if scheduled is None or scheduled[0] != due:
+                    continue
+                due_by_competitor.setdefault(scheduled[1], set()).add(game_id)
+        return due_by_competitor
+
+    def poll_once(self, db: Session) -> int:
+        """Poll every due game, one upstream call per competitor. Returns the number of calls made."""
+        now = self._clock()
+        due_by_competitor = self._pop_due(now)
+        for competitor, game_ids in due_by_competitor.items():
+            fixtures = self._fetch(competitor)
+            if isinstance(fixtures, Exception):
+                logger.warning(f"Status poll failed for competitor {competitor}: {fixtures}")
+                fixtures = []
+            rows = {row["id"]: row for row in (services.parse_game(raw) for raw in fixtures) if row is not None}
+
+            # Games of this competitor that were not due yet got fresh data too
+            with self._lock:
+                refreshed = game_ids | {
+                    game_id for game_id in rows
+                    if self._scheduled.get(game_id, (None, None))[1] == competitor
+                }
+            try:
+                rescheduled = services.find_rescheduled(db, list(rows.values()))
+                services.upsert_games(db, list(rows.values()))
+                db.commit()
+                services.handle_rescheduled(db, rescheduled)
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.warning(f"Failed to store polled statuses for competitor {competitor}: {e}")
+
+            for game_id in refreshed:
+                row = rows.get(game_id)
+                if row is not None:
+                    interval = poll_interval(row["start_time"], row["status_group"], now)
+                else:
+                    # Not in the response: keep trying on the schedule its stored data implies
+                    game = db.get(Game, game_id)
+                    interval = poll_interval(game.start_time, game.status_group, now) if game else None
+                with self._lock:
+                    if interval is None:
+                        self._scheduled.pop(game_id, None)
+                    else:
+                        self._schedule(game_id, now + interval, competitor)
+        return len(due_by_competitor)
+
+    def run(self, stop_event: threading.Event, max_sleep_seconds: float = 60) -> None:
+        """Poll until stop_event is set, reloading games every POLLER_RELOAD_MINUTES."""
+        next_reload = self._clock()
+        while not stop_event.is_set():
+            db = self._session_factory()
+            try:
+                if self._clock() >= next_reload:
+                    self.load(db)
+                    next_reload = self._clock() + timedelta(minutes=POLLER_RELOAD_MINUTES)
+                self.poll_once(db)
+            except Exception as e:
+                logger.error(f"Game status poller error: {e}")
+            finally:
+                db.close()
+            due = self.next_due()
+            wait = max_sleep_seconds if due is None else (due - self._clock()).total_seconds()
+            stop_event.wait(min(max(wait, 0), max_sleep_seconds))
+
+
+_poller_thread: Optional[threading.Thread] = None
+_poller_stop = threading.Event()
+
+
+def start_poller() -> None:
+    """Start the background poller thread (once per process)."""
+    global _poller_thread
+    if _poller_thread is not None and _poller_thread.is_alive():
+        return
+    _poller_stop.clear()
+    _poller_thread = threading.Thread(target=GameStatusPoller().run, args=(_poller_stop,), name="game-status-poller", daemon=True)
+    _poller_thread.start()
+    logger.info("Game status poller started")
+
+
+def stop_poller() -> None:
+    _poller_stop.set()
@@ -0,0 +1,186 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.deps import get_current_user
+from app.core.principal import Principal
+from app.groups.models import Group, GroupMember
+from app.games.models import SeatDutyAssignment, DutyLedger
+from app.games.schemas import (
+    AssignmentOut,
+    GroupGameOut,
+    GamesSyncOut,
+    AssignGamesOut,
+    AssignmentStatusUpdate,
+    LedgerEntryOut,
+    CalendarLinkOut,
+)
+from app.games.services import (
+    sync_group_games,
+    get_upcoming_home_games,
+    assign_group_games,
+    set_assignment_status,
+    decayed_score,
+)
+from app.games.calendar import calendar_cache, calendar_signature, verify_calendar_signature
+
+router = APIRouter(prefix="/games", tags=["games"])
+
+
+def _assignment_out(assignment: SeatDutyAssignment) -> AssignmentOut:
+    return AssignmentOut(
+        id=assignment.id,
+        group_id=assignment.group_id,
+        game_id=assignment.game_id,
+        user_id=assignment.user_id,
+        user_name=(assignment.user.name if getattr(assignment, "user", None) else None),
+        status=assignment.status,
+        assigned_at=assignment.assigned_at,
+    )
+
+
+def _get_group_for_member(db: Session, group_id: int, user_id: int, admin: bool = False) -> Group:
+    group = db.query(Group).filter(Group.id == group_id).first()
+    if group is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+    member = db.query(GroupMember).filter(
+        GroupMember.group_id == group_id,
+        GroupMember.user_id == user_id,
+    ).first()
+    if member is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this group")
+    if admin and not member.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return group
+
+
+@router.post("/sync", response_model=GamesSyncOut)
+def sync_all_games(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Sync fixtures for the clubs of all groups (superuser only)."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Superuser access required")
+    return sync_group_games(db)
+
+
+@router.post("/groups/{group_id}/sync", response_model=GamesSyncOut)
+def sync_games_for_group(
+    group_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Sync fixtures for the group's club. Only group admins can sync."""
+    group = _get_group_for_member(db, group_id, current_user.id, admin=True)
+    if group.club_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Group has no club")
+    return sync_group_games(db, group_ids=[group.id])
+
+
+@router.get("/groups/{group_id}", response_model=list[GroupGameOut])
+def list_group_games(
+    group_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Upcoming home games of the group's club with their seat duty assignments."""
+    group = _get_group_for_member(db, group_id, current_user.id)
+    games = get_upcoming_home_games(db, group)
+    if not games:
+        return []
+
+    assignments_by_game: dict[int, list[AssignmentOut]] = {}
+    assignments = db.query(SeatDutyAssignment).filter(
+        SeatDutyAssignment.group_id == group.id,
+        SeatDutyAssignment.game_id.in_([game.id for game in games]),
+    ).order_by(SeatDutyAssignment.assigned_at.asc()).all()
+    for assignment in assignments:
+        assignments_by_game.setdefault(assignment.game_id, []).append(_assignment_out(assignment))
+
+    result: list[GroupGameOut] = []
+    for game in games:
+        game_out = GroupGameOut.model_validate(game)
+        game_out.assignments = assignments_by_game.get(game.id, [])
+        result.append(game_out)
+    return result
+
+
+@router.post("/groups/{group_id}/assign", response_model=AssignGamesOut)
+def assign_games_for_group(
+    group_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Fill free seats of upcoming home games with group members. Only group admins can assign."""
+    group = _get_group_for_member(db, group_id, current_user.id, admin=True)
+    new_assignments = assign_group_games(db, group)
+    return AssignGamesOut(assignments_made=[_assignment_out(a) for a in new_assignments])
+
+
+@router.patch("/assignments/{assignment_id}", response_model=AssignmentOut)
+def update_assignment_status(
+    assignment_id: int,
+    update: AssignmentStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Mark an assignment completed or declined. The assigned member or a group admin can do this."""
+    assignment = db.query(SeatDutyAssignment).filter(SeatDutyAssignment.id == assignment_id).first()
+    if assignment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignment not found")
+    _get_group_for_member(db, assignment.group_id, current_user.id, admin=assignment.user_id != current_user.id)
+    return _assignment_out(set_assignment_status(db, assignment, update.status))
+
+
+@router.get("/groups/{group_id}/ledger", response_model=list[LedgerEntryOut])
+def get_group_ledger(
+    group_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Seat duty totals of the group's members, next in line first."""
+    group = _get_group_for_member(db, group_id, current_user.id)
+    entries = db.query(DutyLedger).filter(DutyLedger.group_id == group.id).order_by(
+        DutyLedger.score.asc(), DutyLedger.user_id.asc()
+    ).all()
+    return [
+        LedgerEntryOut(
+            user_id=entry.user_id,
+            assigned_count=entry.assigned_count,
+            completed_count=entry.completed_count,
+            declined_count=entry.declined_count,
+            score=decayed_score(entry.score),
+            last_assigned_at=entry.last_assigned_at,
+        )
+        for entry in entries
+    ]
+
+
+@router.get("/calendar", response_model=CalendarLinkOut)
+def get_calendar_link(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+):
+    """Private iCalendar URL of the current user's seat duties, for calendar apps."""
+    url = request.url_for("get_calendar_feed", user_id=current_user.id, signature=calendar_signature(current_user.id))
+    return CalendarLinkOut(url=str(url))
+
+
+@router.get("/calendar/{user_id}/{signature}.ics", name="get_calendar_feed")
+def get_calendar_feed(
+    user_id: int,
+    signature: str,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    iCalendar feed of a user's duties. Authenticated by the URL signature since
+    calendar apps cannot log in. Answers 304 when the client's ETag is current.
+    """
+    if not verify_calendar_signature(user_id, signature):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Calendar not found")
+    etag, body = calendar_cache.get(db, user_id)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="text/calendar; charset=utf-8", headers=headers)
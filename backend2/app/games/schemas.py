@@ -0,0 +1,68 @@
+from typing import Optional, List, Literal
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class GameOut(BaseModel):
+    id: int
+    competition_id: Optional[int] = None
+    competition_display_name: Optional[str] = None
+    round_name: Optional[str] = None
+    start_time: datetime
+    status_group: Optional[int] = None
+    status_text: Optional[str] = None
+    short_status_text: Optional[str] = None
+    game_time: Optional[float] = None
+    home_competitor_id: Optional[int] = None
+    home_competitor_name: Optional[str] = None
+    away_competitor_id: Optional[int] = None
+    away_competitor_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AssignmentOut(BaseModel):
+    id: int
+    group_id: int
+    game_id: int
+    user_id: int
+    user_name: Optional[str] = None
+    status: str
+    assigned_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class GroupGameOut(GameOut):
+    assignments: List[AssignmentOut] = []
+
+
+class GamesSyncOut(BaseModel):
+    clubs: int
+    groups: int
+    games: int
+    failed_clubs: List[str] = []
+
+
+class AssignGamesOut(BaseModel):
+    assignments_made: List[AssignmentOut] = []
+
+
+class AssignmentStatusUpdate(BaseModel):
+    status: Literal["assigned", "completed", "declined"]
+
+
+class LedgerEntryOut(BaseModel):
+    user_id: int
+    assigned_count: int
+    completed_count: int
+    declined_count: int
+    # Decayed to the time of the request
+    score: float
+    last_assigned_at: Optional[datetime] = None
+
+
+class CalendarLinkOut(BaseModel):
+    url: str
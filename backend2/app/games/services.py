@@ -0,0 +1,463 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Optional, Union
+import requests
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.groups.models import Group, GroupMember, Club
+from app.users.models import User
+from app.games.models import Game, SeatDutyAssignment, DutyLedger
+from app.events.broker import publish_group_event
+from app.games.calendar import invalidate_calendars, invalidate_calendars_for_games
+
+logger = logging.getLogger(__name__)
+
+SCORES_FIXTURES_URL = os.getenv("SCORES_FIXTURES_URL", "https://webws.365scores.com/web/games/fixtures/")
+SCORES_PARAMS = {
+    "appTypeId": 5,
+    "langId": 2,
+    "timezoneName": "Asia/Jerusalem",
+    "userCountryId": 6,
+}
+SCORES_TIMEOUT_SECONDS = 10
+# Upstream call limits shared by every sync running in this process
+SCORES_MAX_CONCURRENCY = int(os.getenv("SCORES_MAX_CONCURRENCY", "4"))
+SCORES_MAX_REQUESTS_PER_SECOND = float(os.getenv("SCORES_MAX_REQUESTS_PER_SECOND", "5"))
+
+# Number of members put on duty for each home game
+SEATS_PER_GAME = int(os.getenv("SEATS_PER_GAME", "2"))
+# An assignment counts half as much towards fairness after this many days
+FAIRNESS_HALF_LIFE_DAYS = float(os.getenv("FAIRNESS_HALF_LIFE_DAYS", "90"))
+# duty_weight overflows a float after 1024 half-lives; 30 days keeps that past the year 2100
+FAIRNESS_MIN_HALF_LIFE_DAYS = 30.0
+if FAIRNESS_HALF_LIFE_DAYS < FAIRNESS_MIN_HALF_LIFE_DAYS:
+    logger.warning(f"FAIRNESS_HALF_LIFE_DAYS={FAIRNESS_HALF_LIFE_DAYS} is below {FAIRNESS_MIN_HALF_LIFE_DAYS}, using {FAIRNESS_MIN_HALF_LIFE_DAYS}")
+    FAIRNESS_HALF_LIFE_DAYS = FAIRNESS_MIN_HALF_LIFE_DAYS
+FAIRNESS_EPOCH = datetime(2024, 1, 1)
+ASSIGNMENT_STATUSES = ("assigned", "completed", "declined")
+
+# Columns refreshed when a fixture is synced again
+GAME_SYNC_COLUMNS = [
+    "competition_id", "competition_display_name", "season_num", "round_name",
+    "start_time", "status_group", "status_text", "short_status_text", "game_time",
+    "home_competitor_id", "home_competitor_name", "away_competitor_id", "away_competitor_name",
+]
+
+
+def club_competitor_id(club: Optional[Club]) -> Optional[int]:
+    """365scores competitor ID of a club, or None if the club has no numeric external ID."""
+    if club is None:
+        return None
+    try:
+        return int(club.external_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Spaces out calls so that at most `rate` of them start per second, across threads."""
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+scores_rate_limiter = RateLimiter(SCORES_MAX_REQUESTS_PER_SECOND)
+_scores_semaphore = threading.BoundedSemaphore(max(SCORES_MAX_CONCURRENCY, 1))
+
+
+def fetch_fixtures(competitor_id: str) -> list[dict]:
+    """Fetch the fixtures of one competitor from 365scores. Raises requests.RequestException."""
+    response = requests.get(
+        SCORES_FIXTURES_URL,
+        params={**SCORES_PARAMS, "competitors": competitor_id},
+        timeout=SCORES_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+    return response.json().get("games", [])
+
+
+def fetch_fixtures_limited(competitor_id: str) -> Union[list[dict], Exception]:
+    """fetch_fixtures under the process-wide concurrency and rate limits; errors are returned, not raised."""
+    with _scores_semaphore:
+        scores_rate_limiter.acquire()
+        try:
+            return fetch_fixtures(competitor_id)
+        except (requests.RequestException, ValueError) as e:
+            return e
+
+
+def fetch_fixtures_for_clubs(external_ids: list[str], max_concurrency: int = SCORES_MAX_CONCURRENCY) -> Iterator[tuple[str, Union[list[dict], Exception]]]:
+    """
+    Fetch fixtures for several clubs concurrently and yield (external_id, fixtures)
+    as each call completes, so the caller can store one club while others are
+    still in flight. Calls are bounded by a process-wide semaphore and rate
+    limit; a failed club yields its exception instead of fixtures.
+    """
+    if not external_ids:
+        return
+    workers = max(1, min(max_concurrency, len(external_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_fixtures_limited, external_id): external_id for external_id in external_ids}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def parse_game(raw: dict) -> Optional[dict]:
+    """Map a 365scores game to Game column values. Returns None if it cannot be stored."""
+    try:
+        start_time = datetime.fromisoformat(raw["startTime"].replace("Z", "+00:00"))
+        game_id = int(raw["id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if start_time.tzinfo is not None:
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    home = raw.get("homeCompetitor") or {}
+    away = raw.get("awayCompetitor") or {}
+    return {
+        "id": game_id,
+        "competition_id": raw.get("competitionId"),
+        "competition_display_name": raw.get("competitionDisplayName"),
+        "season_num": raw.get("seasonNum"),
+        "round_name": raw.get("roundName"),
+        "start_time": start_time,
+        "status_group": raw.get("statusGroup"),
+        "status_text": raw.get("statusText"),
+        "short_status_text": raw.get("shortStatusText"),
+        "game_time": raw.get("gameTime"),
+        "home_competitor_id": home.get("id"),
+        "home_competitor_name": home.get("name"),
+        "away_competitor_id": away.get("id"),
+        "away_competitor_name": away.get("name"),
+    }
+
+
+def upsert_games(db: Session, rows: list[dict]) -> int:
+    """
+    Insert or update games in one multi-row statement. A stored game is only
+    written, and its updated_at only moved, when a synced column changed. Does not commit.
+    """
+    if not rows:
+        return 0
+    # Fixtures can repeat in one response; keep the last occurrence
+    rows = list({row["id"]: row for row in rows}.values())
+    now = datetime.utcnow()
+    for row in rows:
+        row.setdefault("created_at", now)
+        row["updated_at"] = now
+    insert = dialect_insert(db)
+    stmt = insert(Game).values(rows)
+    update_columns = {name: stmt.excluded[name] for name in GAME_SYNC_COLUMNS + ["updated_at"]}
+    changed = or_(*(getattr(Game, name).is_distinct_from(stmt.excluded[name]) for name in GAME_SYNC_COLUMNS))
+    db.execute(stmt.on_conflict_do_update(index_elements=[Game.id], set_=update_columns, where=changed))
+    return len(rows)
+
+
+def find_rescheduled(db: Session, rows: list[dict]) -> list[dict]:
+    """Rows whose start time differs from the stored game. New games are not included."""
+    if not rows:
+        return []
+    stored = dict(db.query(Game.id, Game.start_time).filter(Game.id.in_([row["id"] for row in rows])).all())
+    return [
+        row for row in rows
+        if row["id"] in stored and stored[row["id"]] != row["start_time"]
+    ]
+
+
+def handle_rescheduled(db: Session, rescheduled: list[dict]) -> None:
+    """
+    Send a game_rescheduled event to every group following either team of a
+    moved game, and drop the calendar feeds of members on duty for it.
+    """
+    if not rescheduled:
+        return
+    invalidate_calendars_for_games(db, [row["id"] for row in rescheduled])
+    competitors = {
+        str(row[key]) for row in rescheduled
+        for key in ("home_competitor_id", "away_competitor_id") if row.get(key) is not None
+    }
+    groups_by_club: dict[str, list[int]] = {}
+    for external_id, group_id in (
+        db.query(Club.external_id, Group.id)
+        .join(Group, Group.club_id == Club.id)
+        .filter(Club.external_id.in_(competitors))
+        .all()
+    ):
+        groups_by_club.setdefault(external_id, []).append(group_id)
+    for row in rescheduled:
+        group_ids = set(groups_by_club.get(str(row.get("home_competitor_id")), [])) | set(
+            groups_by_club.get(str(row.get("away_competitor_id")), [])
+        )
+        for group_id in group_ids:
+            publish_group_event(group_id, "game_rescheduled", {
+                "game_id": row["id"],
+                "start_time": row["start_time"].isoformat(),
+            })
+
+
+def sync_group_games(db: Session, group_ids: Optional[list[int]] = None) -> dict:
+    """
+    Refresh the fixtures of every group's club (or only of the given groups).
+    The team comes from Group.club.external_id; fixtures are fetched once per
+    distinct club (concurrently, see fetch_fixtures_for_clubs) and upserted in
+    one transaction per club, so a club followed by many groups costs a single
+    upstream call. Writes stay on the caller's session and thread.
+    """
+    query = db.query(Club.external_id, Group.id).join(Group, Group.club_id == Club.id)
+    if group_ids is not None:
+        query = query.filter(Group.id.in_(group_ids))
+
+    groups_by_club: dict[str, list[int]] = {}
+    for external_id, group_id in query.all():
+        groups_by_club.setdefault(external_id, []).append(group_id)
+
+    result = {
+        "clubs": len(groups_by_club),
+        "groups": sum(len(ids) for ids in groups_by_club.values()),
+        "games": 0,
+        "failed_clubs": [],
+    }
+    # One upstream call per distinct club, shared by every group that follows it
+    for external_id, fixtures in fetch_fixtures_for_clubs(list(groups_by_club)):
+        if isinstance(fixtures, Exception):
+            logger.warning(f"Failed to fetch fixtures for club {external_id}: {fixtures}")
+            result["failed_clubs"].append(external_id)
+            continue
+
+        rows = [row for row in (parse_game(raw) for raw in fixtures) if row is not None]
+        try:
+            rescheduled = find_rescheduled(db, rows)
+            result["games"] += upsert_games(db, rows)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Failed to store fixtures for club {external_id}: {e}")
+            result["failed_clubs"].append(external_id)
+            continue
+        handle_rescheduled(db, rescheduled)
+    return result
+
+
+def get_upcoming_home_games(db: Session, group: Group, now: Optional[datetime] = None) -> list[Game]:
+    """Upcoming home games of the group's club, ordered by start time."""
+    team_id = club_competitor_id(group.club)
+    if team_id is None:
+        return []
+    now = now or datetime.utcnow()
+    return (
+        db.query(Game)
+        .filter(Game.home_competitor_id == team_id, Game.start_time > now)
+        .order_by(Game.start_time.asc())
+        .all()
+    )
+
+
+def duty_weight(at: datetime) -> float:
+    """
+    Weight of an assignment made at `at`, growing by 2x every half-life.
+    Scores are stored as sums of these weights, so dividing any two by the same
+    duty_weight(now) gives their decayed values and the stored order is already
+    the decayed order. Nothing has to be rewritten as time passes.
+    """
+    return 2 ** ((at - FAIRNESS_EPOCH).total_seconds() / (FAIRNESS_HALF_LIFE_DAYS * 86400))
+
+
+def decayed_score(score: float, now: Optional[datetime] = None) -> float:
+    """A stored ledger score as of `now`: recent duty counts close to 1, old duty fades to 0."""
+    return score / duty_weight(now or datetime.utcnow())
+
+
+def apply_ledger_deltas(db: Session, group_id: int, deltas: dict[int, dict]) -> None:
+    """
+    Add per-user deltas (assigned_count, completed_count, declined_count, score,
+    optional last_assigned_at) to the group's ledger in one upsert. Does not commit,
+    so the caller's assignment change and the ledger land in the same transaction.
+    """
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "group_id": group_id,
+            "user_id": user_id,
+            "assigned_count": delta.get("assigned_count", 0),
+            "completed_count": delta.get("completed_count", 0),
+            "declined_count": delta.get("declined_count", 0),
+            "score": delta.get("score", 0.0),
+            "last_assigned_at": delta.get("last_assigned_at"),
+            "updated_at": now,
+        }
+        for user_id, delta in deltas.items()
+    ]
+    insert = dialect_insert(db)
+    stmt = insert(DutyLedger).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DutyLedger.group_id, DutyLedger.user_id],
+        set_={
+            "assigned_count": DutyLedger.assigned_count + stmt.excluded.assigned_count,
+            "completed_count": DutyLedger.completed_count + stmt.excluded.completed_count,
+            "declined_count": DutyLedger.declined_count + stmt.excluded.declined_count,
+            "score": DutyLedger.score + stmt.excluded.score,
+            "last_assigned_at": func.coalesce(stmt.excluded.last_assigned_at, DutyLedger.last_assigned_at),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+
+def rebuild_ledger(db: Session, group_id: Optional[int] = None) -> int:
+    """Recompute the ledger from seat_duty_assignments (all groups by default). Returns rows written."""
+    query = db.query(DutyLedger)
+    assignments = db.query(
+        SeatDutyAssignment.group_id, SeatDutyAssignment.user_id,
+        SeatDutyAssignment.status, SeatDutyAssignment.assigned_at,
+    )
+    if group_id is not None:
+        query = query.filter(DutyLedger.group_id == group_id)
+        assignments = assignments.filter(SeatDutyAssignment.group_id == group_id)
+    query.delete(synchronize_session=False)
+
+    deltas_by_group: dict[int, dict[int, dict]] = {}
+    for assignment_group_id, user_id, status, assigned_at in assignments.all():
+        delta = deltas_by_group.setdefault(assignment_group_id, {}).setdefault(user_id, {"last_assigned_at": assigned_at})
+        delta[f"{status}_count"] = delta.get(f"{status}_count", 0) + 1
+        if status != "declined":
+            delta["score"] = delta.get("score", 0.0) + duty_weight(assigned_at)
+        delta["last_assigned_at"] = max(delta["last_assigned_at"], assigned_at)
+    for ledger_group_id, deltas in deltas_by_group.items():
+        apply_ledger_deltas(db, ledger_group_id, deltas)
+    db.commit()
+    return sum(len(deltas) for deltas in deltas_by_group.values())
+
+
+def set_assignment_status(db: Session, assignment: SeatDutyAssignment, status: str) -> SeatDutyAssignment:
+    """Change an assignment's status and move it between the member's ledger counters."""
+    if status not in ASSIGNMENT_STATUSES:
+        raise ValueError(f"Unknown assignment status: {status}")
+    previous = assignment.status
+    if previous == status:
+        return assignment
+    delta = {f"{previous}_count": -1, f"{status}_count": 1}
+    # Declined duty does not count towards fairness
+    if status == "declined":
+        delta["score"] = -duty_weight(assignment.assigned_at)
+    elif previous == "declined":
+        delta["score"] = duty_weight(assignment.assigned_at)
+    assignment.status = status
+    apply_ledger_deltas(db, assignment.group_id, {assignment.user_id: delta})
+    db.commit()
+    db.refresh(assignment)
+    invalidate_calendars([assignment.user_id])
+    return assignment
+
+
+def assign_group_games(db: Session, group: Group, seats_per_game: int = SEATS_PER_GAME, _retry: bool = True) -> list[SeatDutyAssignment]:
+    """
+    Put active group members on duty for upcoming home games that have free seats.
+    Members with the lowest decayed duty score in this group go first (ties by
+    user ID); scores come from the duty ledger. Returns the new assignments.
+
+    Runs for the same group take turns on a lock of the group's row, so each one
+    plans from the seats and ledger the previous one committed.
+    """
+    games = get_upcoming_home_games(db, group)
+    if not games:
+        return []
+
+    member_ids = [
+        user_id for (user_id,) in db.query(GroupMember.user_id)
+        .join(User, User.id == GroupMember.user_id)
+        .filter(GroupMember.group_id == group.id, User.is_active == True)
+        .all()
+    ]
+    if not member_ids:
+        return []
+
+    # Held until the commit below; SQLite has no FOR UPDATE, see the IntegrityError retry
+    db.query(Group.id).filter(Group.id == group.id).with_for_update().one()
+    scores = dict(
+        db.query(DutyLedger.user_id, DutyLedger.score)
+        .filter(DutyLedger.group_id == group.id)
+        .order_by(DutyLedger.score.asc(), DutyLedger.user_id.asc())
+        .all()
+    )
+    taken: dict[int, set[int]] = {}
+    declined: dict[int, set[int]] = {}
+    for game_id, user_id, status in (
+        db.query(SeatDutyAssignment.game_id, SeatDutyAssignment.user_id, SeatDutyAssignment.status)
+        .filter(
+            SeatDutyAssignment.group_id == group.id,
+            SeatDutyAssignment.game_id.in_([game.id for game in games]),
+        )
+        .all()
+    ):
+        taken.setdefault(game_id, set()).add(user_id)
+        if status == "declined":
+            # A declined seat is free again, but the member is not asked twice
+            declined.setdefault(game_id, set()).add(user_id)
+
+    now = datetime.utcnow()
+    weight = duty_weight(now)
+    new_assignments: list[SeatDutyAssignment] = []
+    deltas: dict[int, dict] = {}
+    for game in games:
+        game_users = taken.setdefault(game.id, set())
+        needed = seats_per_game - (len(game_users) - len(declined.get(game.id, ())))
+        if needed <= 0:
+            continue
+        candidates = sorted(
+            (user_id for user_id in member_ids if user_id not in game_users),
+            key=lambda user_id: (scores.get(user_id, 0.0), user_id),
+        )
+        for user_id in candidates[:needed]:
+            scores[user_id] = scores.get(user_id, 0.0) + weight
+            game_users.add(user_id)
+            delta = deltas.setdefault(user_id, {"assigned_count": 0, "score": 0.0, "last_assigned_at": now})
+            delta["assigned_count"] += 1
+            delta["score"] += weight
+            new_assignments.append(SeatDutyAssignment(group_id=group.id, game_id=game.id, user_id=user_id, assigned_at=now))
+
+    if not new_assignments:
+        # Releases the lock
+        db.commit()
+        return new_assignments
+
+    try:
+        db.add_all(new_assignments)
+        apply_ledger_deltas(db, group.id, deltas)
+        db.commit()
+    except IntegrityError:
+        # Another run took some of these seats first; plan again from what it committed
+        db.rollback()
+        if not _retry:
+            raise
+        return assign_group_games(db, group, seats_per_game, _retry=False)
+    invalidate_calendars(deltas)
+    user_ids_by_game: dict[int, list[int]] = {}
+    for assignment in new_assignments:
+        db.refresh(assignment)
+        user_ids_by_game.setdefault(assignment.game_id, []).append(assignment.user_id)
+    for game_id, user_ids in user_ids_by_game.items():
+        publish_group_event(group.id, "duty_assigned", {"game_id": game_id, "user_ids": user_ids})
+    return new_assignments
@@ -4,8 +4,11 @@ from datetime import datetime, timedelta
 import secrets
 from app.core.database import get_db
 from app.core.deps import get_current_user
-from app.users.models import User
+from app.core.principal import Principal
 from app.groups.models import Group, GroupMember, InvitationToken, Club
+from app.games.models import SeatDutyAssignment, DutyLedger
+from app.events.broker import publish_group_event
+from app.games.calendar import invalidate_calendars
 from app.groups.schemas import (
     GroupCreate, GroupOut, GroupMemberOut,
     InvitationCreate, InvitationOut, ClubOut,
@@ -18,7 +21,7 @@ router = APIRouter(prefix="/groups", tags=["groups"])
 def create_group(
     payload: GroupCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a group. Limit: max 2 groups created per user."""
     created_count = db.query(Group).filter(Group.creator_id == current_user.id).count()
@@ -52,7 +55,7 @@ def create_group(
 @router.get("", response_model=list[GroupOut])
 def list_my_groups(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """List groups where current user is a member, including associated clubs."""
     group_ids = [gm.group_id for gm in db.query(GroupMember).filter(GroupMember.user_id == current_user.id).all()]
@@ -73,7 +76,7 @@ def list_my_groups(
 def get_group(
     group_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get group details including associated club information."""
     group = db.query(Group).filter(Group.id == group_id).first()
@@ -99,7 +102,7 @@ def add_admin(
     group_id: int,
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Add admin to group. Only creator or existing admins can promote."""
     group = db.query(Group).filter(Group.id == group_id).first()
@@ -136,7 +139,7 @@ def create_invite_token(
     group_id: int,
     payload: InvitationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     group = db.query(Group).filter(Group.id == group_id).first()
     if group is None:
@@ -170,7 +173,7 @@ def create_invite_token(
 def join_group_by_token(
     token: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     invite = db.query(InvitationToken).filter(InvitationToken.token == token).first()
     if invite is None or invite.is_revoked:
@@ -190,6 +193,7 @@ def join_group_by_token(
     db.add(member)
     db.commit()
     db.refresh(member)
+    publish_group_event(member.group_id, "member_joined", {"user_id": current_user.id, "user_name": current_user.name})
     return member
 
 
@@ -197,7 +201,7 @@ def join_group_by_token(
 def revoke_invite(
     token: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     invite = db.query(InvitationToken).filter(InvitationToken.token == token).first()
     if invite is None:
@@ -221,7 +225,7 @@ def revoke_invite(
 def delete_group(
     group_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete group. Only creator or admin can delete."""
     group = db.query(Group).filter(Group.id == group_id).first()
@@ -243,10 +247,17 @@ def delete_group(
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only creator or admin can delete group")
 
     # Delete all related data
+    on_duty = [
+        user_id for (user_id,) in
+        db.query(SeatDutyAssignment.user_id).filter(SeatDutyAssignment.group_id == group_id).distinct()
+    ]
+    db.query(SeatDutyAssignment).filter(SeatDutyAssignment.group_id == group_id).delete()
+    db.query(DutyLedger).filter(DutyLedger.group_id == group_id).delete()
     db.query(InvitationToken).filter(InvitationToken.group_id == group_id).delete()
     db.query(GroupMember).filter(GroupMember.group_id == group_id).delete()
     db.delete(group)
     db.commit()
+    invalidate_calendars(on_duty)
     
     return {"message": "Group deleted successfully"}
 
@@ -255,7 +266,7 @@ def delete_group(
 def get_group_members(
     group_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get group members. Only group members can see the list."""
     # Check if user is a member
@@ -285,7 +296,7 @@ def remove_member(
     group_id: int,
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Remove member from group. Only admins can remove members."""
     group = db.query(Group).filter(Group.id == group_id).first()
@@ -325,7 +336,7 @@ def remove_member(
 def leave_group(
     group_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Leave group. Members can leave themselves."""
     group = db.query(Group).filter(Group.id == group_id).first()
@@ -353,7 +364,7 @@ def update_group_club(
     group_id: int,
     payload: UpdateGroupClub,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Update the club associated with a group. Only admins can update."""
     group = db.query(Group).filter(Group.id == group_id).first()
@@ -0,0 +1,146 @@
+import os
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+from sqlalchemy import delete, or_, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.cache import TTLCache
+from app.core.principal import invalidate_principals, record_token_versions
+from app.auth.models import PasswordResetToken
+from app.auth.sessions import revoke_user_sessions
+from app.games.calendar import invalidate_calendars
+from app.games.models import SeatDutyAssignment, DutyLedger
+from app.groups.models import Group, GroupMember, InvitationToken
+from app.users.models import User
+
+logger = logging.getLogger(__name__)
+
+# Users changed per statement and per commit, so no batch holds locks on users for long
+USER_BULK_BATCH_SIZE = int(os.getenv("USER_BULK_BATCH_SIZE", "500"))
+# Bulk operations on more users than this run in the background as a job
+USER_BULK_JOB_THRESHOLD = int(os.getenv("USER_BULK_JOB_THRESHOLD", "5000"))
+# How long a job's progress can be polled after it started
+USER_BULK_JOB_TTL_SECONDS = float(os.getenv("USER_BULK_JOB_TTL_SECONDS", "3600"))
+
+# Progress callback: (users processed, users affected) so far
+Progress = Callable[[int, int], None]
+
+
+def _returning_ids(db: Session, stmt, user_ids: List[int], returning: bool) -> List[int]:
+    """Run an UPDATE or DELETE on users and return the ids it touched."""
+    if returning:
+        return [user_id for (user_id,) in db.execute(stmt.returning(User.id))]
+    found = [user_id for (user_id,) in db.query(User.id).filter(User.id.in_(user_ids))]
+    db.execute(stmt)
+    return found
+
+
+def delete_users(db: Session, user_ids: List[int]) -> List[int]:
+    """
+    Delete one batch of users together with everything that refers to them:
+    their memberships, duty assignments, ledger rows, invitations, sessions and
+    reset tokens, and the groups they created with all of those groups' rows.
+    Commits. Returns the ids of the users deleted.
+    """
+    groups = [group_id for (group_id,) in db.query(Group.id).filter(Group.creator_id.in_(user_ids))]
+    # Members of deleted groups lose duties from their calendars
+    on_duty = [
+        user_id for (user_id,) in
+        db.query(SeatDutyAssignment.user_id).filter(SeatDutyAssignment.group_id.in_(groups)).distinct()
+    ]
+    for model in (SeatDutyAssignment, DutyLedger, GroupMember):
+        db.query(model).filter(
+            or_(model.user_id.in_(user_ids), model.group_id.in_(groups))
+        ).delete(synchronize_session=False)
+    db.query(InvitationToken).filter(
+        or_(InvitationToken.created_by_user_id.in_(user_ids), InvitationToken.group_id.in_(groups))
+    ).delete(synchronize_session=False)
+    db.query(Group).filter(Group.id.in_(groups)).delete(synchronize_session=False)
+    revoke_user_sessions(db, user_ids)
+    db.query(PasswordResetToken).filter(PasswordResetToken.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+    stmt = delete(User).where(User.id.in_(user_ids)).execution_options(synchronize_session=False)
+    deleted = _returning_ids(db, stmt, user_ids, db.get_bind().dialect.delete_returning)
+    db.commit()
+    invalidate_principals(user_ids)
+    record_token_versions(db, user_ids)
+    invalidate_calendars(on_duty)
+    return deleted
+
+
+def update_users(db: Session, user_ids: List[int], values: dict) -> List[int]:
+    """Apply `values` to one batch of users and commit. Returns the ids of the users updated."""
+    stmt = update(User).where(User.id.in_(user_ids)).values(values).execution_options(synchronize_session=False)
+    updated = _returning_ids(db, stmt, user_ids, db.get_bind().dialect.update_returning)
+    db.commit()
+    invalidate_principals(user_ids)
+    record_token_versions(db, user_ids)
+    return updated
+
+
+def run_in_batches(db: Session, operation: Callable[[Session, List[int]], List[int]], user_ids: Iterable[int],
+                   batch_size: Optional[int] = None, progress: Optional[Progress] = None) -> int:
+    """Run `operation` over `user_ids` a batch at a time, one transaction each. Returns the users affected."""
+    user_ids = list(dict.fromkeys(user_ids))
+    batch_size = batch_size or USER_BULK_BATCH_SIZE
+    affected = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        affected += len(operation(db, batch))
+        if progress is not None:
+            progress(start + len(batch), affected)
+    return affected
+
+
+@dataclass
+class BulkJob:
+    """Progress of a bulk operation running in the background."""
+    id: str
+    operation: str
+    total: int
+    processed: int = 0
+    affected: int = 0
+    # running, done, failed
+    status: str = "running"
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+# Jobs of this process by id; a job can only be polled on the worker that runs it
+bulk_jobs = TTLCache(1000, USER_BULK_JOB_TTL_SECONDS)
+
+
+def _run_job(job: BulkJob, session_factory: Callable[[], Session], run: Callable[[Session, Progress], int]) -> None:
+    def progress(processed: int, affected: int) -> None:
+        job.processed, job.affected = processed, affected
+
+    db = session_factory()
+    try:
+        job.affected = run(db, progress)
+        job.processed = job.total
+        job.status = "done"
+        logger.info(f"Bulk {job.operation} job {job.id} affected {job.affected} of {job.total} users")
+    except Exception as e:
+        db.rollback()
+        job.status, job.error = "failed", str(e)
+        logger.error(f"Bulk {job.operation} job {job.id} failed after {job.processed} users: {e}")
+    finally:
+        job.finished_at = datetime.utcnow()
+        db.close()
+
+
+def start_job(db: Session, operation: str, total: int, run: Callable[[Session, Progress], int]) -> BulkJob:
+    """
+    Run `run(session, progress)` on a background thread with its own session on
+    the same engine as `db`, and return the job to poll. Batches already
+    committed stay done if a later one fails.
+    """
+    job = BulkJob(id=uuid.uuid4().hex, operation=operation, total=total)
+    bulk_jobs.set(job.id, job)
+    session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+    threading.Thread(target=_run_job, args=(job, session_factory, run), name=f"user-bulk-{job.id[:8]}", daemon=True).start()
+    return job
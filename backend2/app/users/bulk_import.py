@@ -0,0 +1,138 @@
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.core.hashing import hash_passwords
+from app.users.models import User
+from app.users.schemas import UserCreate, UserImportIssue, UserImportResult
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+# Rows accepted per import; larger files should be split
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "10000"))
+# Users per INSERT statement (and per commit)
+IMPORT_INSERT_BATCH_SIZE = int(os.getenv("IMPORT_INSERT_BATCH_SIZE", "500"))
+
+IMPORT_FIELDS = ("email", "password", "name", "phone")
+
+
+class ImportTooLarge(ValueError):
+    pass
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (row number, fields, error) for each record, reading `lines` once.
+    CSV needs a header row with at least email and password; row numbers are file lines.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # Empty cells mean "not given"; columns beyond the header land under None
+            yield reader.line_num, {key: value for key, value in record.items() if key and value != ""}, None
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+def import_users(db: Session, lines: Iterable[str], fmt: str = "csv") -> UserImportResult:
+    """
+    Create users from CSV or NDJSON lines. Rows are validated in one pass,
+    passwords are hashed in batches through the hashing pool, and users are
+    inserted with multi-row INSERT ... ON CONFLICT DO NOTHING, committing per batch.
+    Invalid rows are reported in `errors`, emails that already exist (or repeat
+    in the file) in `conflicts`; neither stops the rest of the import.
+    """
+    result = UserImportResult()
+    pending: dict[str, tuple[int, UserCreate]] = {}
+
+    for row, record, error in parse_rows(lines, fmt):
+        if error is None:
+            try:
+                user = UserCreate(**{field: record[field] for field in IMPORT_FIELDS if field in record})
+            except ValidationError as e:
+                error = _validation_detail(e)
+        if error is not None:
+            email = record.get("email") if record else None
+            result.errors.append(UserImportIssue(row=row, email=email, detail=error))
+            continue
+        if user.email in pending:
+            result.conflicts.append(UserImportIssue(row=row, email=user.email, detail=f"Duplicate of row {pending[user.email][0]}"))
+            continue
+        if len(pending) >= IMPORT_MAX_ROWS:
+            raise ImportTooLarge(f"Imports are limited to {IMPORT_MAX_ROWS} users")
+        pending[user.email] = (row, user)
+
+    # Drop existing users before spending any hashing on them
+    emails = list(pending)
+    for start in range(0, len(emails), IMPORT_INSERT_BATCH_SIZE):
+        chunk = emails[start:start + IMPORT_INSERT_BATCH_SIZE]
+        for (email,) in db.query(User.email).filter(User.email.in_(chunk)).all():
+            result.conflicts.append(UserImportIssue(row=pending.pop(email)[0], email=email, detail="Email already registered"))
+
+    entries = list(pending.values())
+    hashed = hash_passwords([user.password for _, user in entries])
+
+    insert = dialect_insert(db)
+    now = datetime.utcnow()
+    for start in range(0, len(entries), IMPORT_INSERT_BATCH_SIZE):
+        batch = entries[start:start + IMPORT_INSERT_BATCH_SIZE]
+        values = [
+            {
+                "email": user.email,
+                "hashed_password": hashed_password,
+                "name": user.name,
+                "phone": user.phone,
+                "is_active": True,
+                "is_superuser": False,
+                "token_version": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (_, user), hashed_password in zip(batch, hashed[start:start + IMPORT_INSERT_BATCH_SIZE])
+        ]
+        stmt = insert(User).values(values).on_conflict_do_nothing(index_elements=[User.email])
+        if db.get_bind().dialect.insert_returning:
+            inserted = {email for (email,) in db.execute(stmt.returning(User.email))}
+        else:
+            # SQLite before 3.35: ours are the rows carrying the (salted, so unique) hash we sent
+            db.execute(stmt)
+            ours = {value["email"]: value["hashed_password"] for value in values}
+            inserted = {
+                email for email, hashed_password in
+                db.query(User.email, User.hashed_password).filter(User.email.in_(ours))
+                if ours[email] == hashed_password
+            }
+        db.commit()
+        result.created += len(inserted)
+        # Registered by someone else since the check above
+        result.conflicts.extend(
+            UserImportIssue(row=row, email=user.email, detail="Email already registered")
+            for row, user in batch if user.email not in inserted
+        )
+
+    result.conflicts.sort(key=lambda issue: issue.row)
+    logger.info(f"Imported {result.created} users ({len(result.conflicts)} conflicts, {len(result.errors)} errors)")
+    return result
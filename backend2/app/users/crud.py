@@ -1,15 +1,27 @@
+from functools import partial
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import func, not_, update, Row
 from app.users.models import User
-from app.users.schemas import UserCreate, UserUpdate, UserSearch
-from app.core.security import get_password_hash
+from app.users.schemas import UserCreate, UserUpdate, UserSearch, UserOut
+from app.users.search import (
+    UserPage, filter_users, apply_keyset, cursor_after, estimate_count, search_terms,
+)
+from app.core.hashing import hash_password
+from app.core.principal import invalidate_principals, record_token_versions
+from app.users.bulk import Progress, delete_users, update_users, run_in_batches
+
+# Changing any of these makes the user's stateless access tokens stale
+TOKEN_CLAIM_FIELDS = {"is_active", "is_superuser", "hashed_password"}
+
+# What read paths select: the UserOut fields only, as plain rows instead of entities
+USER_OUT_COLUMNS = tuple(getattr(User, field) for field in UserOut.model_fields)
 
 
 class UserCRUD:
     def create(self, db: Session, user: UserCreate) -> User:
         """Create a new user."""
-        hashed_password = get_password_hash(user.password)
+        hashed_password = hash_password(user.password)
         db_user = User(
             email=user.email,
             hashed_password=hashed_password,
@@ -25,96 +37,115 @@ class UserCRUD:
         """Get user by ID."""
         return db.query(User).filter(User.id == user_id).first()
 
+    def read(self, db: Session, user_id: int) -> Optional[Row]:
+        """Get the UserOut columns of a user by ID."""
+        return db.query(*USER_OUT_COLUMNS).filter(User.id == user_id).first()
+
     def get_by_email(self, db: Session, email: str) -> Optional[User]:
         """Get user by email."""
         return db.query(User).filter(User.email == email).first()
 
-    def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+    def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[Row]:
         """Get multiple users with pagination."""
-        return db.query(User).offset(skip).limit(limit).all()
+        return db.query(*USER_OUT_COLUMNS).order_by(User.id).offset(skip).limit(limit).all()
 
-    def search(self, db: Session, search: UserSearch) -> tuple[List[User], int]:
-        """Search users with filters and pagination."""
-        query = db.query(User)
+    def search(self, db: Session, search: UserSearch) -> UserPage:
+        """
+        Search users with filters, best text matches first. With `sort`, pages
+        by keyset from `cursor` instead of by page number. Users come back as
+        rows of the UserOut columns.
+        """
+        query, ranked = filter_users(db, db.query(*USER_OUT_COLUMNS), search)
         
-        # Apply filters
-        if search.email:
-            query = query.filter(User.email.ilike(f"%{search.email}%"))
-        if search.name:
-            query = query.filter(User.name.ilike(f"%{search.name}%"))
-        if search.is_active is not None:
-            query = query.filter(User.is_active == search.is_active)
+        if search.sort:
+            rows = apply_keyset(query.order_by(None), search.sort, search.cursor).limit(search.limit + 1).all()
+            users = rows[:search.limit]
+            next_cursor = cursor_after(search.sort, users[-1]) if len(rows) > search.limit else None
+            total, estimated = self._total(db, query, search.total)
+            return UserPage(users, total, next_cursor, estimated)
         
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
+        if not ranked:
+            query = query.order_by(User.id)
         offset = (search.page - 1) * search.limit
-        users = query.offset(offset).limit(search.limit).all()
-        
-        return users, total
+        # A text match is too costly to run twice, so its exact total rides along on
+        # every row; without one, a COUNT is far cheaper than a window over every user
+        if search.total != "exact" or not search_terms(search):
+            users = query.offset(offset).limit(search.limit).all()
+            total, estimated = self._total(db, query, search.total)
+            return UserPage(users, total, total_estimated=estimated)
+        rows = query.add_columns(func.count().over().label("total")).offset(offset).limit(search.limit).all()
+        if rows:
+            # UserOut ignores the extra column
+            return UserPage(rows, rows[0].total)
+        # Past the last page there is no row to carry it
+        return UserPage([], query.order_by(None).count() if offset else 0)
 
-    def update(self, db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
-        """Update user."""
-        db_user = self.get_by_id(db, user_id)
-        if not db_user:
-            return None
-        
+    def _total(self, db: Session, query, mode: str) -> tuple[Optional[int], bool]:
+        """(total, whether it is estimated) of a filtered query; an estimate falls back to counting where unavailable."""
+        if mode == "none":
+            return None, False
+        if mode == "estimate":
+            estimate = estimate_count(db, query)
+            if estimate is not None:
+                return estimate, True
+        return query.order_by(None).count(), False
+
+    def update(self, db: Session, user_id: int, user_update: UserUpdate) -> Optional[Row]:
+        """Update user; returns the UserOut columns of the updated row."""
         update_data = user_update.dict(exclude_unset=True)
+        if not update_data:
+            return self.read(db, user_id)
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
-        
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
-        
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
+            update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        if TOKEN_CLAIM_FIELDS & update_data.keys():
+            update_data["token_version"] = User.token_version + 1
+        return self._update_one(db, user_id, update_data)
 
     def delete(self, db: Session, user_id: int) -> bool:
-        """Delete user."""
-        db_user = self.get_by_id(db, user_id)
-        if not db_user:
-            return False
-        
-        db.delete(db_user)
-        db.commit()
-        return True
+        """Delete user and everything that refers to them."""
+        return bool(delete_users(db, [user_id]))
 
-    def bulk_delete(self, db: Session, user_ids: List[int]) -> int:
-        """Delete multiple users."""
-        deleted_count = db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
-        db.commit()
-        return deleted_count
+    def bulk_delete(self, db: Session, user_ids: List[int], progress: Optional[Progress] = None) -> int:
+        """Delete multiple users and everything that refers to them, a batch per transaction."""
+        return run_in_batches(db, delete_users, user_ids, progress=progress)
 
-    def bulk_update(self, db: Session, user_ids: List[int], update_data: dict) -> int:
-        """Update multiple users."""
-        updated_count = db.query(User).filter(User.id.in_(user_ids)).update(
-            update_data, synchronize_session=False
-        )
-        db.commit()
-        return updated_count
+    def bulk_update(self, db: Session, user_ids: List[int], update_data: dict, progress: Optional[Progress] = None) -> int:
+        """Update multiple users, a batch per transaction."""
+        if TOKEN_CLAIM_FIELDS & update_data.keys():
+            update_data = {**update_data, "token_version": User.token_version + 1}
+        return run_in_batches(db, partial(update_users, values=update_data), user_ids, progress=progress)
 
-    def toggle_active(self, db: Session, user_id: int) -> Optional[User]:
-        """Toggle user active status."""
-        db_user = self.get_by_id(db, user_id)
-        if not db_user:
-            return None
-        
-        db_user.is_active = not db_user.is_active
-        db.add(db_user)
+    def toggle_active(self, db: Session, user_id: int) -> Optional[Row]:
+        """Toggle user active status; returns the UserOut columns of the updated row."""
+        return self._update_one(db, user_id, {
+            "is_active": not_(User.is_active),
+            "token_version": User.token_version + 1,
+        })
+
+    def _update_one(self, db: Session, user_id: int, values: dict) -> Optional[Row]:
+        """
+        Apply `values` to one user and commit. One UPDATE ... RETURNING round trip
+        where the database supports it (Postgres, SQLite 3.35+), otherwise the
+        UPDATE and a read of the new row. None if there is no such user.
+        """
+        stmt = update(User).where(User.id == user_id).values(values)
+        if db.get_bind().dialect.update_returning:
+            user = db.execute(stmt.returning(*USER_OUT_COLUMNS)).first()
+        else:
+            user = self.read(db, user_id) if db.execute(stmt).rowcount else None
         db.commit()
-        db.refresh(db_user)
-        return db_user
+        if user is not None:
+            invalidate_principals([user_id])
+            record_token_versions(db, [user_id])
+        return user
 
-    def get_active_users(self, db: Session) -> List[User]:
+    def get_active_users(self, db: Session) -> List[Row]:
         """Get all active users."""
-        return db.query(User).filter(User.is_active == True).all()
+        return db.query(*USER_OUT_COLUMNS).filter(User.is_active == True).all()
 
-    def get_superusers(self, db: Session) -> List[User]:
+    def get_superusers(self, db: Session) -> List[Row]:
         """Get all superusers."""
-        return db.query(User).filter(User.is_superuser == True).all()
+        return db.query(*USER_OUT_COLUMNS).filter(User.is_superuser == True).all()
 
 
 # Create instance
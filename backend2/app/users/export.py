@@ -0,0 +1,122 @@
+import os
+import io
+import csv
+import json
+import queue
+import logging
+import threading
+from contextlib import closing, suppress
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterator, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Query, Session, sessionmaker
+from app.users.models import User
+from app.users.schemas import UserSearch
+from app.users.search import filter_users, apply_keyset
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = ("id", "email", "name", "phone", "is_active", "is_superuser", "created_at", "updated_at")
+# Rows fetched from the server-side cursor at a time; each batch becomes one chunk of the response
+USER_EXPORT_BATCH_SIZE = int(os.getenv("USER_EXPORT_BATCH_SIZE", "1000"))
+# Chunks read ahead of a slow client
+USER_EXPORT_BUFFER_CHUNKS = 4
+
+
+def export_query(db: Session, search: UserSearch) -> Query:
+    """The users matching `search`, in its sort order or by id. Paging fields are ignored."""
+    query, _ = filter_users(db, db.query(*(getattr(User, field) for field in EXPORT_FIELDS)), search)
+    query = query.order_by(None)
+    if search.sort:
+        return apply_keyset(query, search.sort, None)
+    return query.order_by(User.id)
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_rows(rows, fmt: str, header: bool = False) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(EXPORT_FIELDS)
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=datetime.isoformat) + "\n" for row in rows)
+
+
+def iter_export(db: Session, search: UserSearch, fmt: str, batch_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Encoded chunks of every user matching `search`, read through a server-side
+    cursor (stream_results) a batch at a time, so memory does not grow with the table.
+    """
+    batch_size = batch_size or USER_EXPORT_BATCH_SIZE
+    result = db.execute(export_query(db, search).statement, execution_options={"yield_per": batch_size})
+    header = fmt == "csv"
+    for rows in result.partitions():
+        yield encode_rows(rows, fmt, header)
+        header = False
+    if header:
+        yield encode_rows([], fmt, header)
+
+
+def _produce(session_factory: Callable[[], Session], search: UserSearch, fmt: str,
+             chunks: queue.Queue, stop: threading.Event) -> None:
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    db = session_factory()
+    try:
+        with closing(iter_export(db, search, fmt)) as encoded:
+            for chunk in encoded:
+                if not put(chunk):
+                    return
+        put(None)
+    except Exception as e:
+        logger.error(f"User export failed: {e}")
+        put(e)
+    finally:
+        db.close()
+        if stop.is_set():
+            # A reader may still be blocked on get()
+            with suppress(queue.Full):
+                chunks.put_nowait(None)
+
+
+async def stream_export(db: Session, search: UserSearch, fmt: str) -> AsyncIterator[str]:
+    """
+    Response body of an export. The cursor is read on one dedicated thread with
+    its own session on `db`'s engine: a sync generator would be resumed on
+    whichever threadpool thread is free, and a connection (SQLite's, with
+    check_same_thread) cannot follow it. Chunks come through a small bounded
+    queue, so a slow client pauses the read instead of buffering the table.
+    """
+    chunks = queue.Queue(maxsize=USER_EXPORT_BUFFER_CHUNKS)
+    stop = threading.Event()
+    session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+    threading.Thread(target=_produce, args=(session_factory, search, fmt, chunks, stop), name="user-export", daemon=True).start()
+    try:
+        while True:
+            chunk = await run_in_threadpool(chunks.get)
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # The client went away or the export ended; either way the reader stops
+        stop.set()
@@ -1,12 +1,16 @@
+import logging
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, UniqueConstraint, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, UniqueConstraint, Index, event, func, literal_column, text
 from app.core.database import Base
 
+logger = logging.getLogger(__name__)
+
 
 class User(Base):
     __tablename__ = "users"
     __table_args__ = (
         UniqueConstraint("email", name="uq_users_email"),
+        Index("idx_users_token_version", "token_version", postgresql_where=text("token_version > 0")),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -18,8 +22,54 @@ class User(Base):
     is_superuser = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
-    # Refresh token for JWT refresh functionality
-    refresh_token = Column(Text, nullable=True)
-    # Password reset token
-    reset_token = Column(String(255), nullable=True)
-    reset_token_expires = Column(DateTime, nullable=True)
+    # Bumped whenever access tokens issued so far must stop working (see app/core/principal.py)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+# Sort keys of keyset-paginated user listings (app/users/search.py); NULL names sort as ''
+USER_SORT_NAME = func.coalesce(User.name, literal_column("''"))
+Index("idx_users_created_at_id", User.created_at, User.id)
+Index("idx_users_name_id", USER_SORT_NAME, User.id)
+
+
+# Substring search indexes for app/users/search.py. They live outside the ORM
+# metadata because they depend on database extensions: pg_trgm GIN indexes on
+# Postgres, an FTS5 trigram table kept in sync by triggers on SQLite.
+SEARCH_INDEX_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING gin (email gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING gin (name gin_trgm_ops)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+        "email, name, content='users', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN "
+        "INSERT INTO users_fts(rowid, email, name) VALUES (new.id, new.email, new.name); END",
+        "CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN "
+        "INSERT INTO users_fts(users_fts, rowid, email, name) VALUES ('delete', old.id, old.email, old.name); END",
+        "CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF email, name ON users BEGIN "
+        "INSERT INTO users_fts(users_fts, rowid, email, name) VALUES ('delete', old.id, old.email, old.name); "
+        "INSERT INTO users_fts(rowid, email, name) VALUES (new.id, new.email, new.name); END",
+        "INSERT INTO users_fts(users_fts) VALUES ('rebuild')",
+    ],
+}
+
+
+@event.listens_for(User.__table__, "after_create")
+def create_search_index(target, connection, **kw):
+    statements = SEARCH_INDEX_DDL.get(connection.dialect.name, [])
+    try:
+        # A savepoint, so a missing extension leaves search on the unindexed fallback instead of failing create_all
+        with connection.begin_nested():
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+    except Exception as e:
+        logger.warning(f"User search index not created, search will not be indexed: {e}")
+
+
+@event.listens_for(User.__table__, "before_drop")
+def drop_search_index(target, connection, **kw):
+    # The external-content FTS table would otherwise outlive users and match stale rows
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS users_fts")
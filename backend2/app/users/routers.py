@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal
 from app.core.database import get_db
 from app.core.deps import get_current_user
-from app.users.models import User
+from app.core.principal import Principal
 from app.users.schemas import (
     UserList, UserSearch, UserUpdate, UserOut,
 )
 from app.users.crud import user_crud
+from app.users.search import InvalidCursor
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -17,26 +18,32 @@ def get_users(
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
     email: str = Query(None, description="Filter by email"),
     name: str = Query(None, description="Filter by name"),
+    q: str = Query(None, description="Search email or name"),
     is_active: bool = Query(None, description="Filter by active status"),
+    sort: Literal["created_at", "-created_at", "name", "-name"] = Query(None, description="Keyset pagination order; use next_cursor for further pages"),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    total: Literal["exact", "estimate", "none"] = Query("exact", description="How to compute total"),
     db: Session = Depends(get_db)
 ):
     """Get users list with pagination and filtering."""
     search = UserSearch(
         email=email,
         name=name,
+        q=q,
         is_active=is_active,
         page=page,
-        limit=limit
+        limit=limit,
+        sort=sort,
+        cursor=cursor,
+        total=total,
     )
     
-    users, total = user_crud.search(db, search)
+    try:
+        result = user_crud.search(db, search)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return UserList(
-        users=users,
-        total=total,
-        page=page,
-        limit=limit
-    )
+    return Response(result.to_json(page, limit), media_type="application/json")
 
 @router.get("/find/{user_id}", response_model=UserOut)
 def get_user(
@@ -44,20 +51,26 @@ def get_user(
     db: Session = Depends(get_db)
 ):
     """Get user by ID."""
-    user = user_crud.get_by_id(db, user_id)
+    user = user_crud.read(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 @router.get("/profile", response_model=UserOut)
-def get_profile(current_user: User = Depends(get_current_user)):
+def get_profile(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
     """Get current user's profile."""
-    return current_user
+    user = user_crud.read(db, current_user.id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
 
 @router.put("/profile", response_model=UserOut)
 def update_profile(
     user_data: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update current user's profile."""
     updated_user = user_crud.update(db, current_user.id, user_data)
@@ -68,7 +81,7 @@ def update_profile(
 @router.delete("/account", status_code=status.HTTP_204_NO_CONTENT)
 def delete_account(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete current user's account."""
     success = user_crud.delete(db, current_user.id)
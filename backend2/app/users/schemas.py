@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Literal
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 from datetime import datetime
 
 
@@ -20,6 +20,8 @@ class UserUpdate(BaseModel):
 
 
 class UserOut(UserBase):
+    # Validated on the way in; checking every stored address again would dominate list responses
+    email: str
     id: int
     is_active: bool
     is_superuser: bool
@@ -32,19 +34,33 @@ class UserOut(UserBase):
 
 class UserList(BaseModel):
     users: List[UserOut]
-    total: int
+    # None when the caller asked for no total
+    total: Optional[int]
     page: int
     limit: int
+    # Pass as `cursor` for the next page of a sorted listing; None on the last page
+    next_cursor: Optional[str] = None
+    # The total is a planner estimate rather than an exact count
+    total_estimated: bool = False
 
 
+# Built once: validates user listings straight from row tuples and dumps them to JSON
+user_list_adapter = TypeAdapter(UserList)
+user_out_list = TypeAdapter(List[UserOut])
 
 
 class UserSearch(BaseModel):
     email: Optional[str] = None
     name: Optional[str] = None
+    # Matches email or name
+    q: Optional[str] = None
     is_active: Optional[bool] = None
     page: int = Field(default=1, ge=1)
     limit: int = Field(default=10, ge=1, le=100)
+    # Keyset pagination instead of pages: "-" sorts descending
+    sort: Optional[Literal["created_at", "-created_at", "name", "-name"]] = None
+    cursor: Optional[str] = None
+    total: Literal["exact", "estimate", "none"] = "exact"
 
 
 class UserBulkDelete(BaseModel):
@@ -57,6 +73,34 @@ class UserBulkUpdate(BaseModel):
     is_superuser: Optional[bool] = None
 
 
+class UserBulkJob(BaseModel):
+    id: str
+    operation: str
+    # running, done, failed
+    status: str
+    total: int
+    processed: int
+    affected: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserImportIssue(BaseModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+
+class UserImportResult(BaseModel):
+    created: int = 0
+    conflicts: List[UserImportIssue] = []
+    errors: List[UserImportIssue] = []
+
+
 class AdminUserUpdate(BaseModel):
     name: Optional[str] = None
     phone: Optional[str] = None
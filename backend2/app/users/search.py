@@ -0,0 +1,186 @@
+import json
+import base64
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import func, literal_column, or_, select, text
+from sqlalchemy.orm import Query, Session
+from app.users.models import User, USER_SORT_NAME
+from app.users.schemas import UserSearch, user_list_adapter
+
+# Trigrams need at least three characters; shorter terms fall back to a scan
+SEARCH_MIN_TERM_LENGTH = 3
+
+# bind -> "trigram" (Postgres with pg_trgm), "fts5" (SQLite with users_fts) or "like"
+_backends: dict = {}
+
+
+def search_backend(db: Session) -> str:
+    """Which index user search can use on this database, detected once per engine."""
+    bind = db.get_bind()
+    backend = _backends.get(bind)
+    if backend is None:
+        dialect = bind.dialect.name
+        if dialect == "postgresql" and db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first():
+            backend = "trigram"
+        elif dialect == "sqlite" and db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'users_fts'")).first():
+            backend = "fts5"
+        else:
+            backend = "like"
+        _backends[bind] = backend
+    return backend
+
+
+def search_terms(search: UserSearch) -> list[tuple[tuple[str, ...], str]]:
+    """(columns, term) pairs of the text filters that are set; `q` matches either column."""
+    terms = [(("email",), search.email), (("name",), search.name), (("email", "name"), search.q)]
+    return [(columns, term) for columns, term in terms if term]
+
+
+def _ilike(columns: tuple[str, ...], term: str):
+    return or_(*(getattr(User, column).ilike(f"%{term}%") for column in columns))
+
+
+def _fts_query(columns: tuple[str, ...], term: str) -> str:
+    phrase = '"' + term.replace('"', '""') + '"'
+    return f"{{{' '.join(columns)}}} : {phrase}"
+
+
+def filter_users(db: Session, query: Query, search: UserSearch) -> tuple[Query, bool]:
+    """Apply every filter of `search` to a query on users. Returns the query and whether it is ordered by relevance."""
+    if search.is_active is not None:
+        query = query.filter(User.is_active == search.is_active)
+    return apply_text_search(db, query, search)
+
+
+def apply_text_search(db: Session, query: Query, search: UserSearch) -> tuple[Query, bool]:
+    """
+    Filter `query` by the text terms of `search` as case-insensitive substring
+    matches, through the trigram index where there is one, best matches first.
+    Returns the query and whether it is ordered by relevance.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query, False
+    backend = search_backend(db)
+
+    if backend == "fts5":
+        match = []
+        for columns, term in terms:
+            if len(term) >= SEARCH_MIN_TERM_LENGTH:
+                match.append(_fts_query(columns, term))
+            else:
+                query = query.filter(_ilike(columns, term))
+        if not match:
+            return query, False
+        fts = (
+            select(literal_column("rowid").label("id"), literal_column("rank").label("rank"))
+            .select_from(text("users_fts"))
+            .where(text("users_fts MATCH :match").bindparams(match=" AND ".join(match)))
+            .subquery()
+        )
+        # FTS5 rank is bm25 over trigrams: lower is better
+        return query.join(fts, fts.c.id == User.id).order_by(fts.c.rank, User.id), True
+
+    for columns, term in terms:
+        # Served by the gin_trgm_ops indexes on Postgres
+        query = query.filter(_ilike(columns, term))
+    if backend != "trigram":
+        return query, False
+    scores = [
+        func.similarity(func.coalesce(getattr(User, column), ""), term)
+        for columns, term in terms for column in columns
+    ]
+    score = scores[0] if len(scores) == 1 else func.greatest(*scores)
+    return query.order_by(score.desc(), User.id), True
+
+
+# Sort name -> key expression; each has a (key, id) index
+SORT_KEYS = {
+    "created_at": User.created_at,
+    "name": USER_SORT_NAME,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class UserPage(NamedTuple):
+    # Rows of the UserOut columns
+    users: list
+    total: Optional[int]
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
+
+    def to_json(self, page: int, limit: int) -> bytes:
+        """The UserList response body, validated and serialized in one pass."""
+        return user_list_adapter.dump_json(user_list_adapter.validate_python({
+            "users": self.users,
+            "total": self.total,
+            "page": page,
+            "limit": limit,
+            "next_cursor": self.next_cursor,
+            "total_estimated": self.total_estimated,
+        }, from_attributes=True))
+
+
+def encode_cursor(sort: str, value, user_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "k": [value, user_id]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def cursor_after(sort: str, user) -> str:
+    """Cursor of the page that follows `user` (a User or a row with its columns)."""
+    value = user.created_at if sort.lstrip("-") == "created_at" else (user.name or "")
+    return encode_cursor(sort, value, user.id)
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, user_id = payload["k"]
+        if payload["s"] != sort or not isinstance(user_id, int):
+            raise ValueError
+        if sort.lstrip("-") == "created_at":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, str):
+            raise ValueError
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+    return value, user_id
+
+
+def apply_keyset(query: Query, sort: str, cursor: Optional[str]) -> Query:
+    """
+    Order by (sort key, id) and start after the cursor's row. Each page is one
+    index range scan from the previous page's last row, however deep it is.
+    """
+    key = SORT_KEYS[sort.lstrip("-")]
+    descending = sort.startswith("-")
+    if cursor:
+        value, user_id = decode_cursor(cursor, sort)
+        # (key, id) past the cursor, spelled so that the key bound seeks into the index on SQLite too
+        if descending:
+            query = query.filter(key <= value, or_(key < value, User.id < user_id))
+        else:
+            query = query.filter(key >= value, or_(key > value, User.id > user_id))
+    if descending:
+        return query.order_by(key.desc(), User.id.desc())
+    return query.order_by(key, User.id)
+
+
+def estimate_count(db: Session, query: Query) -> Optional[int]:
+    """
+    Rows the Postgres planner expects `query` to return, from table statistics
+    and without running it. None where no estimate is available (SQLite).
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,20 @@
+-- Migration: Move password reset tokens from users to a password_reset_tokens table
+-- Date: 2026-10-19
+
+-- One row per outstanding reset, looked up by the SHA-256 of its token
+CREATE TABLE IF NOT EXISTS password_reset_tokens (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token_hash VARCHAR(64) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL,
+    CONSTRAINT uq_password_reset_tokens_token_hash UNIQUE (token_hash)
+);
+
+CREATE INDEX IF NOT EXISTS ix_password_reset_tokens_id ON password_reset_tokens(id);
+CREATE INDEX IF NOT EXISTS ix_password_reset_tokens_user_id ON password_reset_tokens(user_id);
+CREATE INDEX IF NOT EXISTS ix_password_reset_tokens_expires_at ON password_reset_tokens(expires_at);
+
+-- Outstanding reset links are not carried over; users request a new one
+ALTER TABLE users DROP COLUMN IF EXISTS reset_token;
+ALTER TABLE users DROP COLUMN IF EXISTS reset_token_expires;
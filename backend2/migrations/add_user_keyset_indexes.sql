@@ -0,0 +1,6 @@
+-- Migration: Indexes for keyset pagination of user listings
+-- Date: 2026-10-19
+
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at, id);
+-- Users without a name sort as ''
+CREATE INDEX IF NOT EXISTS idx_users_name_id ON users((coalesce(name, '')), id);
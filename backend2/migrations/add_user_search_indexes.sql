@@ -0,0 +1,9 @@
+-- Migration: Trigram indexes for user search
+-- Date: 2026-10-19
+
+-- pg_trgm ships with Postgres contrib; creating it needs CREATE privilege on the database
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Serve ILIKE '%term%' on email and name, and similarity() ranking
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING gin (name gin_trgm_ops);
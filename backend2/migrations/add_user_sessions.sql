@@ -0,0 +1,22 @@
+-- Migration: Move refresh tokens from users to a user_sessions table
+-- Date: 2026-10-19
+
+-- One row per logged-in device, looked up by the SHA-256 of its refresh token
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token_hash VARCHAR(64) NOT NULL,
+    user_agent VARCHAR(255),
+    ip_address VARCHAR(64),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_used_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL,
+    CONSTRAINT uq_user_sessions_token_hash UNIQUE (token_hash)
+);
+
+CREATE INDEX IF NOT EXISTS ix_user_sessions_id ON user_sessions(id);
+CREATE INDEX IF NOT EXISTS ix_user_sessions_user_id ON user_sessions(user_id);
+CREATE INDEX IF NOT EXISTS ix_user_sessions_expires_at ON user_sessions(expires_at);
+
+-- Stored refresh tokens are not carried over; users log in again once
+ALTER TABLE users DROP COLUMN IF EXISTS refresh_token;
@@ -0,0 +1,7 @@
+-- Migration: Add token version to users for stateless auth mode
+-- Date: 2026-10-19
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+
+-- Workers load the versions of users that were ever bumped
+CREATE INDEX IF NOT EXISTS idx_users_token_version ON users(token_version) WHERE token_version > 0;
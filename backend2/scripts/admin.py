@@ -70,6 +70,79 @@ def list_admins():
         db.close()
 
 
+def rebuild_ledger(group_id=None):
+    """Recompute the seat duty ledger from existing assignments."""
+    from app.games.services import rebuild_ledger as rebuild
+
+    db = SessionLocal()
+    try:
+        rows = rebuild(db, group_id)
+        print(f"✅ Rebuilt {rows} ledger entries")
+        return True
+    except Exception as e:
+        print(f"❌ Error rebuilding ledger: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def calibrate_hash(target_ms: float, scheme=None, samples: int = 5):
+    """Suggest password hash rounds for a target hashing latency on this host."""
+    from app.core.security import PASSWORD_HASH_SCHEME, PASSWORD_HASH_ROUNDS, calibrate_rounds
+
+    scheme = scheme or PASSWORD_HASH_SCHEME
+    try:
+        result = calibrate_rounds(scheme, target_ms, samples)
+    except (KeyError, ValueError) as e:
+        print(f"❌ Cannot calibrate {scheme}: {e}")
+        return None
+    print(f"🔧 Scheme: {result['scheme']} (configured rounds: {PASSWORD_HASH_ROUNDS or 'default'})")
+    print(f"⏱️  Default {result['base_rounds']} rounds: {result['base_ms']:.1f} ms per hash")
+    print(f"✅ Suggested {result['suggested_rounds']} rounds: {result['suggested_ms']:.1f} ms per hash, "
+          f"~{result['logins_per_core_per_second']:.0f} logins/s per core")
+    print(f"   PASSWORD_HASH_SCHEME={result['scheme']} PASSWORD_HASH_ROUNDS={result['suggested_rounds']}")
+    return result
+
+
+def sweep_auth():
+    """Delete expired sessions and reset tokens now instead of waiting for the sweeper."""
+    from app.auth.sweeper import sweep_expired
+
+    db = SessionLocal()
+    try:
+        for table, deleted in sweep_expired(db).items():
+            print(f"✅ Deleted {deleted} expired rows from {table}")
+        return True
+    except Exception as e:
+        print(f"❌ Error sweeping expired auth rows: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def import_users_file(path: str, fmt=None):
+    """Create users from a CSV or NDJSON file, hashing passwords in the process pool."""
+    from app.core.hashing import password_hasher
+    from app.users.bulk_import import import_users, ImportTooLarge
+
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    db = SessionLocal()
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            result = import_users(db, f, fmt)
+    except (OSError, ImportTooLarge) as e:
+        print(f"❌ Import failed: {e}")
+        return None
+    finally:
+        db.close()
+        password_hasher.shutdown()
+    print(f"✅ Created {result.created} users")
+    for label, issues in (("⚠️  Conflict", result.conflicts), ("❌ Error", result.errors)):
+        for issue in issues:
+            print(f"{label} on row {issue.row} ({issue.email or '-'}): {issue.detail}")
+    return result
+
+
 def main():
     parser = argparse.ArgumentParser(description="SeatDuty Admin Management")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -88,6 +161,24 @@ def main():
     # List admins command
     subparsers.add_parser("list", help="List all admin users")
     
+    # Rebuild duty ledger command
+    ledger_parser = subparsers.add_parser("rebuild-ledger", help="Recompute the seat duty ledger from assignments")
+    ledger_parser.add_argument("--group-id", type=int, default=None, help="Only this group")
+    
+    # Calibrate password hashing command
+    calibrate_parser = subparsers.add_parser("calibrate-hash", help="Suggest password hash rounds for a target latency")
+    calibrate_parser.add_argument("--target-ms", type=float, default=250, help="Target time per hash in milliseconds")
+    calibrate_parser.add_argument("--scheme", default=None, help="passlib scheme (default: PASSWORD_HASH_SCHEME)")
+    calibrate_parser.add_argument("--samples", type=int, default=5, help="Hashes timed per measurement")
+    
+    # Bulk import users command
+    import_parser = subparsers.add_parser("import-users", help="Create users from a CSV or NDJSON file")
+    import_parser.add_argument("path", help="File with email,password[,name,phone] per row")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="Default: from the file extension")
+    
+    # Sweep expired auth rows command
+    subparsers.add_parser("sweep-auth", help="Delete expired sessions and password reset tokens")
+    
     args = parser.parse_args()
     
     if args.command == "create":
@@ -96,6 +187,14 @@ def main():
         reset_password(args.email, args.password)
     elif args.command == "list":
         list_admins()
+    elif args.command == "rebuild-ledger":
+        rebuild_ledger(args.group_id)
+    elif args.command == "calibrate-hash":
+        calibrate_hash(args.target_ms, args.scheme, args.samples)
+    elif args.command == "import-users":
+        import_users_file(args.path, args.format)
+    elif args.command == "sweep-auth":
+        sweep_auth()
     else:
         parser.print_help()
 
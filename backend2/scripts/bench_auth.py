@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of per-request authentication overhead.
+
+Times the work get_current_user does for one bearer token (token
+verification plus the user lookup) against an in-memory SQLite database,
+with the decoded-token and principal caches cold on every call and warm,
+and in stateless mode (principal read from the token's claims).
+
+    python scripts/bench_auth.py --requests 20000
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.core import deps
+from app.core import principal
+from app.core.principal import principal_cache, access_token_claims
+from app.core.security import create_access_token
+from app.users.models import User
+
+
+def time_calls(fn, count: int) -> float:
+    """Mean microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Authentication overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="bench@example.com", hashed_password="x", name="Bench")
+    db.add(user)
+    db.commit()
+    token = create_access_token(str(user.id))
+
+    def cold():
+        deps.token_claims_cache.clear()
+        principal_cache.clear()
+        deps._authenticate(token, db)
+
+    def token_cached():
+        principal_cache.clear()
+        deps._authenticate(token, db)
+
+    def warm():
+        deps._authenticate(token, db)
+
+    principal.AUTH_MODE = "stateless"
+    stateless_token = create_access_token(str(user.id), claims=access_token_claims(user))
+    principal.AUTH_MODE = "cached"
+
+    def stateless():
+        principal.AUTH_MODE = "stateless"
+        try:
+            deps._authenticate(stateless_token, db)
+        finally:
+            principal.AUTH_MODE = "cached"
+
+    def stateless_uncached():
+        deps.token_claims_cache.clear()
+        stateless()
+
+    def decode_cold():
+        deps.token_claims_cache.clear()
+        deps.decode_token_cached(token)
+
+    def decode_warm():
+        deps.decode_token_cached(token)
+
+    rows = [
+        ("token decode, uncached", decode_cold),
+        ("token decode, cached", decode_warm),
+        ("get_current_user, uncached", cold),
+        ("get_current_user, token cached", token_cached),
+        ("get_current_user, token+principal", warm),
+        ("stateless, token uncached", stateless_uncached),
+        ("stateless, token cached", stateless),
+    ]
+    print(f"{args.requests} calls each")
+    print(f"{'path':<34} {'us/request':>11}")
+    for label, fn in rows:
+        fn()
+        print(f"{label:<34} {time_calls(fn, args.requests):>11.1f}")
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
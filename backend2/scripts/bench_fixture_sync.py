@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark fixture sync time against a local 365scores stand-in.
+
+Starts an HTTP server that answers /web/games/fixtures/ after a fixed delay,
+creates N clubs (each followed by several groups) in an in-memory SQLite
+database and times sync_group_games for increasing N, sequentially and with
+the configured concurrency.
+
+    python scripts/bench_fixture_sync.py --latency-ms 150 --clubs 1 5 10 20 40
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.users.models import User
+from app.groups.models import Group, Club
+from app.games import models as _games_models  # noqa: F401  (registers the tables)
+from app.games import services
+
+
+def make_handler(latency: float, games_per_club: int):
+    class FixturesHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            competitor = int(parse_qs(urlparse(self.path).query)["competitors"][0])
+            start = datetime.now(timezone.utc)
+            games = [
+                {
+                    "id": competitor * 1000 + i,
+                    "startTime": (start + timedelta(days=7 * (i + 1))).isoformat(),
+                    "statusGroup": 2,
+                    "homeCompetitor": {"id": competitor if i % 2 == 0 else 1, "name": "Home"},
+                    "awayCompetitor": {"id": 1 if i % 2 == 0 else competitor, "name": "Away"},
+                }
+                for i in range(games_per_club)
+            ]
+            time.sleep(latency)
+            body = json.dumps({"games": games}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixturesHandler
+
+
+def run_sync(club_count: int, groups_per_club: int, concurrency: int) -> float:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        owner = User(email="bench@example.com", hashed_password="x", name="Bench")
+        db.add(owner)
+        db.commit()
+        for i in range(club_count):
+            club = Club(name=f"Club {i}", external_id=str(10_000 + i))
+            db.add(club)
+            db.commit()
+            db.add_all([
+                Group(name=f"Club {i} group {j}", creator_id=owner.id, club_id=club.id)
+                for j in range(groups_per_club)
+            ])
+        db.commit()
+
+        original = services.fetch_fixtures_for_clubs
+        services.fetch_fixtures_for_clubs = lambda ids: original(ids, max_concurrency=concurrency)
+        try:
+            started = time.perf_counter()
+            result = services.sync_group_games(db)
+            elapsed = time.perf_counter() - started
+        finally:
+            services.fetch_fixtures_for_clubs = original
+        assert not result["failed_clubs"], result
+        return elapsed
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixture sync benchmark")
+    parser.add_argument("--clubs", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--groups-per-club", type=int, default=3)
+    parser.add_argument("--games-per-club", type=int, default=38)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--concurrency", type=int, default=services.SCORES_MAX_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=0, help="Requests per second limit (0 = unlimited)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000, args.games_per_club))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    services.SCORES_FIXTURES_URL = f"http://127.0.0.1:{server.server_port}/web/games/fixtures/"
+    services.scores_rate_limiter = services.RateLimiter(args.rate)
+    # The process-wide cap was sized from SCORES_MAX_CONCURRENCY at import; it would silently lower --concurrency
+    services._scores_semaphore = threading.BoundedSemaphore(max(args.concurrency, 1))
+
+    print(f"Upstream latency {args.latency_ms:.0f} ms, {args.groups_per_club} groups per club, "
+          f"concurrency {args.concurrency}, rate limit {args.rate or 'off'}")
+    print(f"{'clubs':>6} {'groups':>7} {'sequential s':>13} {'concurrent s':>13} {'speedup':>8}")
+    try:
+        for club_count in args.clubs:
+            sequential = run_sync(club_count, args.groups_per_club, 1)
+            concurrent = run_sync(club_count, args.groups_per_club, args.concurrency)
+            print(f"{club_count:>6} {club_count * args.groups_per_club:>7} "
+                  f"{sequential:>13.3f} {concurrent:>13.3f} {sequential / concurrent:>7.1f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Throughput of GET /users?limit=100: the lean read path (UserOut columns as
+rows, one TypeAdapter pass to JSON) against the previous one (whole User
+entities, UserList built from them and validated again as response_model).
+
+Both run in-process through the ASGI app against a temporary SQLite
+database seeded with --users users; the previous path is mounted as an
+extra route for the comparison.
+
+    python scripts/bench_user_list.py --requests 500
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def seed(db, count: int) -> None:
+    from app.users.models import User
+
+    rows = [
+        {"email": f"user{i}@example.com", "hashed_password": "$pbkdf2-sha256$29000$" + "x" * 64, "name": f"User {i}", "phone": "050-0000000"}
+        for i in range(count)
+    ]
+    for start in range(0, count, 5000):
+        db.execute(User.__table__.insert(), rows[start:start + 5000])
+    db.commit()
+
+
+def mount_entity_listing(app) -> None:
+    """/bench/users: the listing as it was before lean reads."""
+    from typing import List
+    from fastapi import Depends, Query
+    from pydantic import EmailStr
+    from sqlalchemy import func
+    from app.core.database import get_db
+    from app.users.models import User
+    from app.users.schemas import UserList, UserOut
+
+    class EntityUserOut(UserOut):
+        email: EmailStr
+
+    class EntityUserList(UserList):
+        users: List[EntityUserOut]
+
+    @app.get("/bench/users", response_model=EntityUserList)
+    def entity_listing(page: int = Query(1), limit: int = Query(10), db=Depends(get_db)):
+        rows = db.query(User).add_columns(func.count().over().label("total")).order_by(User.id) \
+            .offset((page - 1) * limit).limit(limit).all()
+        return EntityUserList(users=[user for user, _ in rows], total=rows[0].total if rows else 0, page=page, limit=limit)
+
+
+def throughput(client, path: str, requests: int) -> float:
+    """Requests per second."""
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User list throughput benchmark")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_list.db"
+    from fastapi.testclient import TestClient
+    from app.core.database import Base, SessionLocal, engine
+    import server
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, args.users)
+    finally:
+        db.close()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mount_entity_listing(server.app)
+    client = TestClient(server.app)
+
+    paths = [("User entities", "/bench/users?limit=100&page=3"), ("UserOut rows", "/users?limit=100&page=3")]
+    assert client.get(paths[0][1]).json() == client.get(paths[1][1]).json()
+    print(f"{args.users} users, {args.requests} requests of 100")
+    print(f"{'path':<16} {'req/s':>8} {'ms/req':>8}")
+    for label, path in paths:
+        throughput(client, path, 20)
+        rate = throughput(client, path, args.requests)
+        print(f"{label:<16} {rate:>8.1f} {1000 / rate:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark user search: the old unindexed ILIKE plus separate COUNT against
+UserCRUD.search on the trigram index (FTS5 on SQLite, pg_trgm on Postgres),
+then a deep page by OFFSET against the same page by keyset cursor.
+
+Seeds --users users into a temporary SQLite database, or into DATABASE_URL
+when --url is given (the users table there must be empty).
+
+    python scripts/bench_user_search.py --users 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+FIRST_NAMES = ["Noa", "Itai", "Maya", "Yossi", "Tamar", "Omer", "Shira", "Eitan", "Yael", "Amit", "Lior", "Dana"]
+LAST_NAMES = ["Cohen", "Levi", "Mizrahi", "Peretz", "Biton", "Dahan", "Avraham", "Friedman", "Azulay", "Katz"]
+DOMAINS = ["example.com", "mail.co.il", "club.org", "fans.net"]
+TERMS = ["cohen", "tamar.k", "yael.a12", "zzz-none", "club.org"]
+
+
+def seed(db, count: int) -> None:
+    from app.users.models import User
+
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rows.append({
+            "email": f"{first.lower()}.{last[0].lower()}{i}@{rng.choice(DOMAINS)}",
+            "hashed_password": "x",
+            "name": f"{first} {last}",
+        })
+    for start in range(0, count, 5000):
+        db.execute(User.__table__.insert(), rows[start:start + 5000])
+    db.commit()
+
+
+def old_search(db, term: str, limit: int = 10):
+    """UserCRUD.search before the trigram index: ILIKE scan, then COUNT."""
+    from app.users.models import User
+
+    query = db.query(User).filter(User.email.ilike(f"%{term}%") | User.name.ilike(f"%{term}%"))
+    total = query.count()
+    return query.offset(0).limit(limit).all(), total
+
+
+def new_search(db, term: str, limit: int = 10):
+    from app.users.crud import user_crud
+    from app.users.schemas import UserSearch
+
+    page = user_crud.search(db, UserSearch(q=term, limit=limit))
+    return page.users, page.total
+
+
+def timed(fn, db, term: str, repeat: int) -> tuple[float, int]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, total = fn(db, term)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), total
+
+
+def deep_page(db, depth: int, limit: int, repeat: int) -> tuple[float, float]:
+    """Milliseconds for the page starting at row `depth`: OFFSET with COUNT, then keyset from a cursor."""
+    from app.users.crud import user_crud
+    from app.users.models import User
+    from app.users.schemas import UserSearch
+    from app.users.search import cursor_after
+
+    before = db.query(User).order_by(User.created_at, User.id).offset(depth - 1).limit(1).one()
+    cursor = cursor_after("created_at", before)
+    offset_search = UserSearch(page=depth // limit + 1, limit=limit)
+    keyset_search = UserSearch(sort="created_at", cursor=cursor, limit=limit, total="none")
+    results = []
+    for search in (offset_search, keyset_search):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            user_crud.search(db, search)
+            samples.append((time.perf_counter() - start) * 1000)
+        results.append(statistics.median(samples))
+    return results[0], results[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User search benchmark")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", action="store_true", help="Use DATABASE_URL instead of a temporary SQLite file")
+    args = parser.parse_args()
+
+    if not args.url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_search.db"
+    from app.core.database import Base, SessionLocal, engine
+    from app.users.search import search_backend
+    import server  # noqa: F401 - registers every model
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        seed(db, args.users)
+        print(f"Seeded {args.users} users in {time.perf_counter() - start:.1f}s, search backend: {search_backend(db)}")
+        print(f"{'term':<12} {'matches':>8} {'ILIKE+COUNT ms':>15} {'indexed ms':>11}")
+        for term in TERMS:
+            old_ms, old_total = timed(old_search, db, term, args.repeat)
+            new_ms, new_total = timed(new_search, db, term, args.repeat)
+            assert old_total == new_total, (term, old_total, new_total)
+            print(f"{term:<12} {new_total:>8} {old_ms:>15.1f} {new_ms:>11.1f}")
+        depth = args.users - args.users // 10
+        offset_ms, keyset_ms = deep_page(db, depth, 100, args.repeat)
+        print(f"Page of 100 at row {depth}: OFFSET + total {offset_ms:.1f} ms, keyset {keyset_ms:.1f} ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Load test: does a burst of logins slow down the other routes?
+
+Serves the app with uvicorn on a temporary SQLite database, keeps
+--concurrency threads logging in, and meanwhile measures the latency of
+GET /health. Runs once with password hashing inline on the server's threads
+and once through the hashing process pool.
+
+    python scripts/load_test_login.py --concurrency 8 --seconds 10
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+import statistics
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/load_test.db"
+os.environ.setdefault("DEBUG", "false")
+# Measures hashing, not the login rate limit
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import requests
+import uvicorn
+from app.core import hashing
+from app.core.database import SessionLocal
+from app.core.security import get_password_hash
+from app.users.models import User
+from server import app
+
+EMAIL = "load@example.com"
+PASSWORD = "load-test-password"
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run(base_url: str, concurrency: int, seconds: float) -> dict:
+    stop = threading.Event()
+    logins = {"ok": 0, "busy": 0}
+    lock = threading.Lock()
+
+    def login_loop():
+        session = requests.Session()
+        while not stop.is_set():
+            status = session.post(f"{base_url}/auth/login", json={"email": EMAIL, "password": PASSWORD}).status_code
+            with lock:
+                logins["ok" if status == 200 else "busy"] += 1
+
+    threads = [threading.Thread(target=login_loop) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    latencies = []
+    session = requests.Session()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        session.get(f"{base_url}/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 0.95),
+        "max": max(latencies),
+        "logins_per_s": logins["ok"] / seconds,
+        "rejected": logins["busy"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login burst load test")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=max(1, hashing.PASSWORD_HASH_WORKERS))
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    db = SessionLocal()
+    db.add(User(email=EMAIL, hashed_password=get_password_hash(PASSWORD), name="Load"))
+    db.commit()
+    db.close()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"{args.concurrency} login threads, {args.seconds:.0f}s per run, {os.cpu_count()} CPUs")
+    print(f"{'hashing':<14} {'health p50 ms':>14} {'p95 ms':>8} {'max ms':>8} {'logins/s':>9} {'503s':>6}")
+    try:
+        for label, workers in [("idle", None), ("inline", 0), (f"pool x{args.workers}", args.workers)]:
+            hashing.password_hasher.shutdown()
+            hashing.password_hasher = hashing.PasswordHasher(workers=workers or 0)
+            if workers:
+                # Start the pool before measuring
+                hashing.password_hasher.hash("warm-up")
+            result = run(base_url, 0 if workers is None else args.concurrency, args.seconds)
+            print(f"{label:<14} {result['p50']:>14.1f} {result['p95']:>8.1f} {result['max']:>8.1f} "
+                  f"{result['logins_per_s']:>9.1f} {result['rejected']:>6}")
+    finally:
+        hashing.password_hasher.shutdown()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
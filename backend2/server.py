@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.database import Base, engine
 from app.auth.routers import router as auth_router
@@ -6,6 +7,12 @@ from app.users.routers import router as users_router
 from app.admin.routers import router as admin_router
 from app.groups.routers import router as groups_router
 from app.clubs.routers import router as clubs_router
+from app.games.routers import router as games_router
+from app.games.poller import GAME_POLLER_ENABLED, start_poller, stop_poller
+from app.events.routers import router as events_router
+from app.events.broker import start_listener, stop_listener
+from app.core.hashing import PasswordHashingBusy, password_hasher
+from app.auth.sweeper import start_sweeper, stop_sweeper
 import time
 import logging
 import os
@@ -31,6 +38,15 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(PasswordHashingBusy)
+def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.on_event("startup")
 def on_startup():
     """Startup event with database connection retry and initialization."""
@@ -57,6 +73,19 @@ def on_startup():
                 logger.error("Failed to connect to database after all retries")
                 raise
 
+    start_listener()
+    start_sweeper()
+    if GAME_POLLER_ENABLED:
+        start_poller()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_poller()
+    stop_listener()
+    stop_sweeper()
+    password_hasher.shutdown()
+
 
 @app.get("/health")
 def health_check():
@@ -73,6 +102,8 @@ app.include_router(users_router)
 app.include_router(admin_router)
 app.include_router(groups_router)
 app.include_router(clubs_router)
+app.include_router(games_router)
+app.include_router(events_router)
 
 logger.info("🔒 Test endpoints disabled")
 
@@ -73,6 +73,45 @@ def auth_headers(client, test_user):
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def superuser_headers(client, db_session):
+    """Authentication headers for a superuser created directly in the database."""
+    db_session.add(User(email="root@example.com", hashed_password=get_password_hash("rootpassword"), name="Root", is_superuser=True))
+    db_session.commit()
+    response = client.post("/auth/login", json={"email": "root@example.com", "password": "rootpassword"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def sql_statements(db_session):
+    """SQL sent to the test database while the test runs, in order. Clear it to start counting."""
+    from sqlalchemy import event
+
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """In-process caches and rate limit buckets are keyed by IDs that repeat across tests."""
+    from app.games.calendar import calendar_cache
+    from app.core.deps import token_claims_cache
+    from app.core.principal import principal_cache, token_versions
+    from app.core.ratelimit import rate_limiter
+    calendar_cache.clear()
+    token_claims_cache.clear()
+    principal_cache.clear()
+    token_versions.clear()
+    rate_limiter.reset()
+    yield
+
+
 @pytest.fixture(scope="session", autouse=True)
 def cleanup_test_db():
     """Remove the SQLite test DB file after test session completes."""
@@ -218,3 +218,558 @@ class TestAuth:
         assert token_data["sub"] == str(test_user.id)
         assert token_data["type"] == "access"
         assert "exp" in token_data
+
+
+class TestTokenCache:
+    """Test the decoded-token cache used by get_current_user."""
+
+    def test_ttl_cache_expires_and_evicts(self):
+        from app.core.cache import TTLCache
+
+        now = [100.0]
+        cache = TTLCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2, expires_at=103)
+        assert cache.get("a") == 1
+
+        now[0] = 104
+        assert cache.get("b") is None
+        cache.set("c", 3)
+        cache.set("d", 4)
+        # "a" was least recently used
+        assert cache.get("a") is None
+        assert (cache.get("c"), cache.get("d")) == (3, 4)
+
+        now[0] = 115
+        assert cache.get("c") is None
+
+    def test_token_verified_once(self, monkeypatch, test_user):
+        from app.core import deps
+        from app.core.security import create_access_token
+
+        token = create_access_token(str(test_user.id))
+        calls = []
+        monkeypatch.setattr(deps, "decode_token", lambda t: calls.append(t) or decode_token(t))
+
+        for _ in range(3):
+            assert deps.decode_token_cached(token)["sub"] == str(test_user.id)
+        assert len(calls) == 1
+
+    def test_entry_never_outlives_token(self, monkeypatch, test_user):
+        from datetime import timedelta
+        from app.core import deps
+        from app.core.security import create_access_token
+
+        token = create_access_token(str(test_user.id), expires_delta=timedelta(seconds=30))
+        payload = deps.decode_token_cached(token)
+        calls = []
+        monkeypatch.setattr(deps, "decode_token", lambda t: calls.append(t))
+        monkeypatch.setattr(deps.token_claims_cache, "_clock", lambda: payload["exp"] + 1)
+
+        # Past exp the cached claims are gone and the token is verified (and rejected) again
+        assert deps.decode_token_cached(token) is None
+        assert calls == [token]
+
+    def test_invalid_token_not_cached(self, client: TestClient):
+        from app.core import deps
+
+        response = client.get("/users/profile", headers={"Authorization": "Bearer not-a-token"})
+        assert response.status_code == 401
+        assert len(deps.token_claims_cache) == 0
+
+
+@pytest.fixture
+def user_queries(db_session: Session):
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+class TestPrincipalCache:
+    """Test the principal cache that spares get_current_user the users lookup."""
+
+    def test_repeat_requests_skip_users_lookup(self, client: TestClient, auth_headers: dict, user_queries):
+        client.get("/groups", headers=auth_headers)
+        first = len(user_queries)
+        client.get("/groups", headers=auth_headers)
+        assert len(user_queries) == first
+
+    def test_lookup_selects_only_principal_columns(self, client: TestClient, auth_headers: dict, user_queries):
+        client.get("/groups", headers=auth_headers)
+        assert user_queries
+        assert all("refresh_token" not in statement for statement in user_queries)
+
+    def test_deactivation_takes_effect_immediately(self, client: TestClient, auth_headers: dict, superuser_headers: dict, test_user):
+        assert client.get("/groups", headers=auth_headers).status_code == 200
+
+        response = client.patch(f"/admin/users/{test_user.id}/toggle-active", headers=superuser_headers)
+        assert response.status_code == 200
+
+        assert client.get("/groups", headers=auth_headers).status_code == 401
+
+    def test_profile_update_and_password_reset_invalidate(self, client: TestClient, auth_headers: dict, test_user):
+        from app.core.principal import principal_cache
+
+        client.get("/groups", headers=auth_headers)
+        assert principal_cache.get(test_user.id).name == "Test User"
+
+        client.put("/users/profile", json={"name": "Renamed"}, headers=auth_headers)
+        assert principal_cache.get(test_user.id) is None
+        assert client.get("/users/profile", headers=auth_headers).json()["name"] == "Renamed"
+
+        reset_token = client.post("/auth/forgot-password", json={"email": "test@example.com"}).json()["reset_token"]
+        client.post("/auth/reset-password", json={"token": reset_token, "new_password": "newpassword123"})
+        assert principal_cache.get(test_user.id) is None
+
+
+class TestStatelessAuth:
+    """Test AUTH_MODE=stateless: principal claims in the access token, checked against token versions."""
+
+    @pytest.fixture(autouse=True)
+    def stateless(self, monkeypatch):
+        from app.core import principal
+        monkeypatch.setattr(principal, "AUTH_MODE", "stateless")
+
+    def test_token_carries_principal(self, client: TestClient, auth_headers: dict, test_user):
+        payload = decode_token(auth_headers["Authorization"].split(" ", 1)[1])
+        assert (payload["active"], payload["superuser"], payload["ver"], payload["name"]) == (True, False, 0, "Test User")
+
+    def test_admin_route_skips_users_lookup(self, client: TestClient, superuser_headers: dict, user_queries):
+        client.get("/admin/list-admins", headers=superuser_headers)
+        user_queries.clear()
+
+        response = client.get("/admin/users/stats/active", headers=superuser_headers)
+
+        assert response.status_code == 200
+        # Only the route's own query touches users
+        assert len(user_queries) == 1
+
+    def test_deactivation_rejects_issued_tokens(self, client: TestClient, auth_headers: dict, superuser_headers: dict, test_user):
+        assert client.get("/groups", headers=auth_headers).status_code == 200
+
+        client.patch(f"/admin/users/{test_user.id}/toggle-active", headers=superuser_headers)
+        assert client.get("/groups", headers=auth_headers).status_code == 401
+
+        client.patch(f"/admin/users/{test_user.id}/toggle-active", headers=superuser_headers)
+        # Reactivation does not revive old tokens, a new login does
+        assert client.get("/groups", headers=auth_headers).status_code == 401
+        login = client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"})
+        assert client.get("/groups", headers={"Authorization": f"Bearer {login.json()['access_token']}"}).status_code == 200
+
+    def test_password_reset_rejects_issued_tokens(self, client: TestClient, auth_headers: dict, test_user):
+        reset_token = client.post("/auth/forgot-password", json={"email": "test@example.com"}).json()["reset_token"]
+        client.post("/auth/reset-password", json={"token": reset_token, "new_password": "newpassword123"})
+
+        assert client.get("/groups", headers=auth_headers).status_code == 401
+
+    def test_bump_from_other_worker_seen_after_refresh(self, client: TestClient, auth_headers: dict, db_session: Session, test_user, monkeypatch):
+        from app.core.principal import token_versions
+
+        assert client.get("/groups", headers=auth_headers).status_code == 200
+        # Another worker bumped the version; this one has not reloaded yet
+        db_session.query(User).filter(User.id == test_user.id).update({"token_version": User.token_version + 1})
+        db_session.commit()
+        assert client.get("/groups", headers=auth_headers).status_code == 200
+
+        monkeypatch.setattr(token_versions, "_loaded_at", None)
+        assert client.get("/groups", headers=auth_headers).status_code == 401
+
+
+class TestPasswordHashingPool:
+    """Test the bounded password hashing pool."""
+
+    def test_pool_hashes_and_verifies(self):
+        from app.core.hashing import PasswordHasher
+
+        hasher = PasswordHasher(workers=1, max_pending=2)
+        try:
+            hashed = hasher.hash("s3cret-password")
+            assert hasher.verify("s3cret-password", hashed)
+            assert not hasher.verify("wrong", hashed)
+        finally:
+            hasher.shutdown()
+
+    def test_saturated_pool_rejects_immediately(self, monkeypatch):
+        import threading
+        from app.core import hashing
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow_hash(password: str) -> str:
+            started.set()
+            release.wait(5)
+            return "hashed"
+
+        monkeypatch.setattr(hashing, "get_password_hash", slow_hash)
+        hasher = hashing.PasswordHasher(workers=0, max_pending=1)
+        worker = threading.Thread(target=hasher.hash, args=("first",))
+        worker.start()
+        started.wait(5)
+
+        with pytest.raises(hashing.PasswordHashingBusy):
+            hasher.hash("second")
+
+        release.set()
+        worker.join()
+        # The slot is free again
+        assert hasher.hash("third") == "hashed"
+
+    def test_stuck_job_times_out_as_busy(self, monkeypatch):
+        from concurrent.futures import Future
+        from app.core import hashing
+
+        hasher = hashing.PasswordHasher(workers=1, timeout=0.01)
+        stuck = []
+        monkeypatch.setattr(hasher, "_submit", lambda fn, *args, wait=False: stuck.append(Future()) or stuck[-1])
+
+        with pytest.raises(hashing.PasswordHashingBusy):
+            hasher.hash("password")
+        with pytest.raises(hashing.PasswordHashingBusy):
+            hasher.hash_many(["a", "b", "c"], batch_size=1)
+        assert all(future.cancelled() for future in stuck)
+
+    def test_login_returns_503_when_job_times_out(self, client: TestClient, test_user, monkeypatch):
+        from concurrent.futures import Future
+        from app.core import hashing
+
+        monkeypatch.setattr(hashing.password_hasher, "timeout", 0.01)
+        monkeypatch.setattr(hashing.password_hasher, "_submit", lambda fn, *args, wait=False: Future())
+
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+    def test_login_returns_503_when_saturated(self, client: TestClient, test_user, monkeypatch):
+        import threading
+        from app.core import hashing
+
+        monkeypatch.setattr(hashing.password_hasher, "_slots", threading.BoundedSemaphore(1))
+        hashing.password_hasher._slots.acquire()
+
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+
+class TestPasswordHashCost:
+    """Test configurable hash cost and rehash on login."""
+
+    @pytest.fixture
+    def cheaper_rounds(self, monkeypatch):
+        from app.core import security, hashing
+
+        # Inline hashing so the patched context is the one used
+        monkeypatch.setattr(hashing, "password_hasher", hashing.PasswordHasher(workers=0))
+        monkeypatch.setattr(security, "pwd_context", security.build_crypt_context("pbkdf2_sha256", rounds=1000))
+
+    def test_context_flags_other_costs(self):
+        from app.core.security import build_crypt_context
+
+        old = build_crypt_context("pbkdf2_sha256").hash("password")
+        context = build_crypt_context("pbkdf2_sha256", rounds=1000)
+        assert context.needs_update(old)
+        assert not context.needs_update(context.hash("password"))
+
+    def test_login_rehashes_outdated_hash(self, client: TestClient, test_user, db_session: Session, cheaper_rounds):
+        old_hash = test_user.hashed_password
+
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"})
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        new_hash = db_session.query(User).filter(User.id == test_user.id).one().hashed_password
+        assert new_hash != old_hash
+        assert new_hash.startswith("$pbkdf2-sha256$1000$")
+
+        # Up-to-date hashes are left alone
+        client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"})
+        db_session.expire_all()
+        assert db_session.query(User).filter(User.id == test_user.id).one().hashed_password == new_hash
+
+    def test_wrong_password_does_not_rehash(self, client: TestClient, test_user, db_session: Session, cheaper_rounds):
+        old_hash = test_user.hashed_password
+
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "wrong"})
+
+        assert response.status_code == 401
+        db_session.expire_all()
+        assert db_session.query(User).filter(User.id == test_user.id).one().hashed_password == old_hash
+
+    def test_calibrate_rounds_scales_to_target(self):
+        from app.core.security import calibrate_rounds
+
+        result = calibrate_rounds("pbkdf2_sha256", target_ms=2, samples=1)
+        assert result["suggested_rounds"] < result["base_rounds"] or result["base_ms"] <= 2
+        assert result["logins_per_core_per_second"] > 0
+
+
+class TestRateLimit:
+    """Test token-bucket rate limiting of the auth endpoints."""
+
+    class FakeClock:
+        def __init__(self):
+            self.now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        from app.core import ratelimit
+
+        clock = self.FakeClock()
+        limits = {
+            "login": {"ip": ratelimit.Limit(5, 50), "email": ratelimit.Limit(2, 20)},
+            "forgot-password": {"ip": ratelimit.Limit(5, 50), "email": ratelimit.Limit(1, 60)},
+        }
+        monkeypatch.setattr(ratelimit, "rate_limiter", ratelimit.RateLimiter(ratelimit.MemoryBucketStore(clock=clock), limits, enabled=True))
+        return clock
+
+    def login(self, client, email="test@example.com", ip=None):
+        headers = {"X-Forwarded-For": ip} if ip else {}
+        return client.post("/auth/login", json={"email": email, "password": "wrong"}, headers=headers)
+
+    def test_bucket_refills_over_time(self):
+        from app.core.ratelimit import Limit, MemoryBucketStore
+
+        clock = self.FakeClock()
+        store = MemoryBucketStore(clock=clock)
+        limit = Limit(2, 10)
+        assert store.take("k", limit) == 0
+        assert store.take("k", limit) == 0
+        assert store.take("k", limit) == pytest.approx(5)
+
+        clock.now += 5
+        assert store.take("k", limit) == 0
+        assert store.take("k", limit) > 0
+
+        # Refill stops at capacity
+        clock.now += 1000
+        assert [store.take("k", limit) for _ in range(3)][-1] > 0
+
+    def test_login_limited_per_email_with_retry_after(self, client: TestClient, test_user, clock):
+        assert [self.login(client).status_code for _ in range(2)] == [401, 401]
+
+        response = self.login(client)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "10"
+
+        # Other accounts are unaffected
+        assert self.login(client, email="other@example.com").status_code == 401
+
+        clock.now += 10
+        assert self.login(client).status_code == 401
+
+    def test_login_limited_per_ip(self, client: TestClient, test_user, clock):
+        statuses = [self.login(client, email=f"user{i}@example.com").status_code for i in range(6)]
+        assert statuses == [401] * 5 + [429]
+
+    def test_forwarded_ip_used_only_when_trusted(self, client: TestClient, test_user, clock, monkeypatch):
+        from app.core import ratelimit
+
+        # Untrusted: all of these come from the test client's address
+        statuses = [self.login(client, email=f"user{i}@example.com", ip=f"10.0.0.{i}").status_code for i in range(6)]
+        assert statuses[-1] == 429
+
+        monkeypatch.setattr(ratelimit, "RATE_LIMIT_TRUST_FORWARDED", True)
+        assert self.login(client, email="new@example.com", ip="10.0.0.1").status_code == 401
+
+    def test_trusted_forwarded_ip_keys_the_bucket(self, client: TestClient, test_user, clock, monkeypatch):
+        from app.core import ratelimit
+
+        monkeypatch.setattr(ratelimit, "RATE_LIMIT_TRUST_FORWARDED", True)
+        # Behind the proxy, clients no longer share the proxy's bucket
+        statuses = [self.login(client, email=f"user{i}@example.com", ip=f"10.0.0.{i}").status_code for i in range(6)]
+        assert statuses == [401] * 6
+
+        # The proxy appends the address it saw; hops the client sent are ignored
+        statuses = [
+            self.login(client, email=f"spoof{i}@example.com", ip=f"192.168.0.{i}, 10.0.1.1").status_code
+            for i in range(6)
+        ]
+        assert statuses == [401] * 5 + [429]
+
+    def test_forgot_password_has_its_own_limits(self, client: TestClient, test_user, clock):
+        assert self.login(client).status_code == 401
+
+        assert client.post("/auth/forgot-password", json={"email": "test@example.com"}).status_code == 200
+        response = client.post("/auth/forgot-password", json={"email": "test@example.com"})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "60"
+
+    def test_database_store_shares_buckets(self, db_session: Session):
+        from app.auth.models import RateLimitBucket
+        from app.core.ratelimit import Limit, DatabaseBucketStore
+        from tests.conftest import TestingSessionLocal
+
+        clock = self.FakeClock()
+        # Two workers backed by the same table
+        first = DatabaseBucketStore(TestingSessionLocal, retention_seconds=100, clock=clock)
+        second = DatabaseBucketStore(TestingSessionLocal, retention_seconds=100, clock=clock)
+        limit = Limit(2, 10)
+        assert first.take("k", limit) == 0
+        assert second.take("k", limit) == 0
+        assert first.take("k", limit) > 0
+
+        clock.now += 200
+        first.take("other", limit)
+        assert first.prune() == 1
+        assert [bucket.key for bucket in db_session.query(RateLimitBucket).all()] == ["other"]
+
+
+class TestSessions:
+    """Test per-device sessions keyed by refresh token hash."""
+
+    def login(self, client, agent="phone"):
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"},
+                               headers={"User-Agent": agent})
+        return response.json()
+
+    def test_refresh_token_stored_only_as_hash(self, client: TestClient, test_user, db_session: Session):
+        from app.auth.models import UserSession
+        from app.core.security import hash_token
+
+        tokens = self.login(client)
+
+        session = db_session.query(UserSession).one()
+        assert session.user_id == test_user.id
+        assert session.token_hash == hash_token(tokens["refresh_token"])
+        assert session.user_agent == "phone"
+
+    def test_devices_stay_logged_in_independently(self, client: TestClient, test_user, db_session: Session):
+        phone = self.login(client, "phone")
+        laptop = self.login(client, "laptop")
+        assert phone["refresh_token"] != laptop["refresh_token"]
+
+        headers = {"Authorization": f"Bearer {phone['access_token']}"}
+        sessions = client.get("/auth/sessions", headers=headers).json()
+        assert sorted(session["user_agent"] for session in sessions) == ["laptop", "phone"]
+
+        # Logging the phone out leaves the laptop's refresh token working
+        assert client.post("/auth/logout", json={"refresh_token": phone["refresh_token"]}).status_code == 200
+        assert client.post("/auth/refresh", json={"refresh_token": phone["refresh_token"]}).status_code == 401
+        assert client.post("/auth/refresh", json={"refresh_token": laptop["refresh_token"]}).status_code == 200
+
+    def test_refresh_rotates_token(self, client: TestClient, test_user):
+        tokens = self.login(client)
+
+        rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+        assert rotated["refresh_token"] != tokens["refresh_token"]
+        assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        assert client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 200
+
+    def test_revoke_other_device(self, client: TestClient, test_user):
+        phone = self.login(client, "phone")
+        laptop = self.login(client, "laptop")
+        headers = {"Authorization": f"Bearer {phone['access_token']}"}
+        laptop_id = next(s["id"] for s in client.get("/auth/sessions", headers=headers).json() if s["user_agent"] == "laptop")
+
+        assert client.delete(f"/auth/sessions/{laptop_id}", headers=headers).status_code == 200
+        assert client.post("/auth/refresh", json={"refresh_token": laptop["refresh_token"]}).status_code == 401
+        assert client.delete(f"/auth/sessions/{laptop_id}", headers=headers).status_code == 404
+
+    def test_password_reset_logs_out_every_device(self, client: TestClient, test_user):
+        tokens = [self.login(client, agent) for agent in ("phone", "laptop")]
+        reset_token = client.post("/auth/forgot-password", json={"email": "test@example.com"}).json()["reset_token"]
+
+        client.post("/auth/reset-password", json={"token": reset_token, "new_password": "newpassword"})
+
+        for device in tokens:
+            assert client.post("/auth/refresh", json={"refresh_token": device["refresh_token"]}).status_code == 401
+
+    def test_oldest_session_dropped_past_limit(self, client: TestClient, test_user, db_session: Session, monkeypatch):
+        from app.auth import sessions
+        from app.auth.models import UserSession
+
+        monkeypatch.setattr(sessions, "MAX_SESSIONS_PER_USER", 2)
+        first = self.login(client, "first")
+        self.login(client, "second")
+        self.login(client, "third")
+
+        assert sorted(s.user_agent for s in db_session.query(UserSession).all()) == ["second", "third"]
+        assert client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).status_code == 401
+
+    def test_purge_expired_in_batches(self, test_user, db_session: Session):
+        from datetime import datetime, timedelta
+        from app.auth.models import UserSession
+        from app.auth.sweeper import purge_expired
+
+        now = datetime.utcnow()
+        for i in range(5):
+            db_session.add(UserSession(user_id=test_user.id, token_hash=f"expired{i}", expires_at=now - timedelta(minutes=1)))
+        db_session.add(UserSession(user_id=test_user.id, token_hash="live", expires_at=now + timedelta(days=1)))
+        db_session.commit()
+
+        assert purge_expired(db_session, UserSession, batch_size=2, now=now) == 5
+        assert [s.token_hash for s in db_session.query(UserSession).all()] == ["live"]
+
+
+class TestResetTokens:
+    """Test hashed, single-use password reset tokens."""
+
+    def forgot(self, client):
+        return client.post("/auth/forgot-password", json={"email": "test@example.com"}).json()["reset_token"]
+
+    def reset(self, client, token, password="newpassword"):
+        return client.post("/auth/reset-password", json={"token": token, "new_password": password})
+
+    def test_token_stored_only_as_hash(self, client: TestClient, test_user, db_session: Session):
+        from app.auth.models import PasswordResetToken
+        from app.core.security import hash_token
+
+        token = self.forgot(client)
+
+        stored = db_session.query(PasswordResetToken).one()
+        assert stored.user_id == test_user.id
+        assert stored.token_hash == hash_token(token)
+
+    def test_token_is_single_use(self, client: TestClient, test_user):
+        token = self.forgot(client)
+
+        assert self.reset(client, token).status_code == 200
+        response = self.reset(client, token, "otherpassword")
+        assert response.status_code == 400
+        assert "Invalid reset token" in response.json()["detail"]
+
+    def test_new_token_replaces_outstanding_one(self, client: TestClient, test_user):
+        first = self.forgot(client)
+        second = self.forgot(client)
+
+        assert self.reset(client, first).status_code == 400
+        assert self.reset(client, second).status_code == 200
+
+    def test_expired_token_rejected(self, client: TestClient, test_user, db_session: Session):
+        from datetime import datetime, timedelta
+        from app.auth.models import PasswordResetToken
+
+        token = self.forgot(client)
+        db_session.query(PasswordResetToken).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        db_session.commit()
+
+        response = self.reset(client, token)
+        assert response.status_code == 400
+        assert "expired" in response.json()["detail"]
+
+    def test_sweep_deletes_expired_tokens(self, client: TestClient, test_user, db_session: Session):
+        from datetime import datetime, timedelta
+        from app.auth.models import PasswordResetToken
+        from app.auth.sweeper import sweep_expired
+
+        self.forgot(client)
+        db_session.add(PasswordResetToken(user_id=test_user.id, token_hash="old", expires_at=datetime.utcnow() - timedelta(hours=1)))
+        db_session.commit()
+
+        assert sweep_expired(db_session)["password_reset_tokens"] == 1
+        assert db_session.query(PasswordResetToken).count() == 1
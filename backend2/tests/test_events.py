@@ -0,0 +1,202 @@
+import json
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.users.models import User
+from app.groups.models import Group, GroupMember, Club
+from app.games.models import Game
+from app.games import services
+from app.events.broker import broker, EventBroker
+from app.events.routers import event_stream, format_sse
+from app.core.security import get_password_hash
+from tests.test_games import make_fixture, add_members
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Record every event the broker dispatches."""
+    events = []
+    monkeypatch.setattr(broker, "dispatch", events.append)
+    return events
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+class TestEventBroker:
+    def test_publish_from_another_thread_reaches_subscriber(self):
+        local_broker = EventBroker()
+
+        async def consume():
+            subscription = local_broker.subscribe(7)
+            threading.Thread(target=local_broker.publish, args=(7, "member_joined", {"user_id": 1})).start()
+            try:
+                return await asyncio.wait_for(subscription.queue.get(), timeout=1)
+            finally:
+                local_broker.unsubscribe(subscription)
+
+        event = asyncio.run(consume())
+
+        assert event["type"] == "member_joined"
+        assert event["group_id"] == 7
+        assert event["data"] == {"user_id": 1}
+        assert local_broker.subscriber_count(7) == 0
+
+    def test_other_groups_do_not_receive_event(self):
+        local_broker = EventBroker()
+
+        async def consume():
+            subscription = local_broker.subscribe(1)
+            local_broker.publish(2, "duty_assigned")
+            await asyncio.sleep(0)
+            return subscription.queue.qsize()
+
+        assert asyncio.run(consume()) == 0
+
+    def test_event_stream_formats_events(self):
+        request = FakeRequest()
+
+        async def read():
+            stream = event_stream(request, 3, keepalive_seconds=1)
+            chunks = [await stream.__anext__()]
+            broker.publish(3, "game_rescheduled", {"game_id": 1001})
+            chunks.append(await stream.__anext__())
+            await stream.aclose()
+            return chunks
+
+        hello, chunk = asyncio.run(read())
+
+        assert hello.startswith("retry:")
+        assert chunk.startswith("id: ")
+        assert "event: game_rescheduled\n" in chunk
+        payload = json.loads(chunk.split("data: ", 1)[1])
+        assert payload["data"] == {"game_id": 1001}
+        assert broker.subscriber_count(3) == 0
+
+    def test_format_sse(self):
+        event = {"id": 5, "group_id": 1, "type": "member_joined", "data": {}, "created_at": "2025-01-01T00:00:00"}
+        assert format_sse(event).startswith("id: 5\nevent: member_joined\ndata: {")
+        assert format_sse(event).endswith("\n\n")
+
+
+class TestGroupEventsEndpoint:
+    def test_requires_token(self, client: TestClient, db: Session):
+        response = client.get("/events/groups/1")
+        assert response.status_code == 401
+
+    def test_non_member_forbidden(self, client: TestClient, auth_headers: dict, db: Session):
+        other = User(email="owner@example.com", hashed_password=get_password_hash("password123"), name="Owner")
+        db.add(other)
+        db.commit()
+        group = Group(name="Private", creator_id=other.id)
+        db.add(group)
+        db.commit()
+
+        token = auth_headers["Authorization"].split(" ", 1)[1]
+        response = client.get(f"/events/groups/{group.id}?access_token={token}")
+        assert response.status_code == 403
+
+
+    def test_open_stream_holds_no_connection(self, db: Session, auth_headers: dict, test_user):
+        from server import app
+        from tests.conftest import engine
+
+        group = Group(name="Streamed", creator_id=test_user.id)
+        db.add(group)
+        db.flush()
+        db.add(GroupMember(group_id=group.id, user_id=test_user.id))
+        db.commit()
+        group_id = group.id
+        db.close()
+
+        async def open_stream():
+            disconnect = asyncio.Event()
+            first_chunk = asyncio.Event()
+            messages = []
+
+            async def receive():
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                messages.append(message)
+                if message["type"] == "http.response.body":
+                    first_chunk.set()
+
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                "scheme": "http", "path": f"/events/groups/{group_id}", "raw_path": f"/events/groups/{group_id}".encode(),
+                "query_string": b"", "root_path": "", "client": ("testclient", 50000), "server": ("testserver", 80),
+                "headers": [(b"authorization", auth_headers["Authorization"].encode())],
+            }
+            task = asyncio.create_task(app(scope, receive, send))
+            await asyncio.wait_for(first_chunk.wait(), timeout=5)
+            checked_out = engine.pool.checkedout()
+            disconnect.set()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return messages[0]["status"], checked_out
+
+        status_code, checked_out = asyncio.run(open_stream())
+
+        assert status_code == 200
+        assert checked_out == 0
+
+
+class TestPublishedEvents:
+    def test_join_publishes_member_joined(self, client: TestClient, auth_headers: dict, db: Session, published):
+        group_id = client.post("/groups", json={"name": "G"}, headers=auth_headers).json()["id"]
+        token = client.post(f"/groups/{group_id}/invites", json={"expires_in_minutes": 60}, headers=auth_headers).json()["token"]
+        db.add(User(email="joiner@example.com", hashed_password=get_password_hash("password123"), name="Joiner"))
+        db.commit()
+        login = client.post("/auth/login", json={"email": "joiner@example.com", "password": "password123"})
+
+        response = client.post(f"/groups/join/{token}", headers={"Authorization": f"Bearer {login.json()['access_token']}"})
+
+        assert response.status_code == 200
+        assert [(e["group_id"], e["type"], e["data"]["user_name"]) for e in published] == [(group_id, "member_joined", "Joiner")]
+
+    def test_assign_publishes_duty_assigned(self, db: Session, test_user, published):
+        club = Club(name="Club", external_id="579")
+        db.add(club)
+        db.commit()
+        group = Group(name="G", creator_id=test_user.id, club_id=club.id)
+        db.add(group)
+        db.commit()
+        db.add(GroupMember(group_id=group.id, user_id=test_user.id, is_admin=True))
+        db.commit()
+        add_members(db, group, 1)
+        services.upsert_games(db, [services.parse_game(make_fixture(1001, 579, 1, 7))])
+        db.commit()
+
+        services.assign_group_games(db, group, seats_per_game=2)
+
+        assert [(e["type"], e["data"]["game_id"], len(e["data"]["user_ids"])) for e in published] == [("duty_assigned", 1001, 2)]
+
+    def test_sync_publishes_game_rescheduled(self, db: Session, test_user, published, monkeypatch):
+        club = Club(name="Club", external_id="579")
+        db.add(club)
+        db.commit()
+        group = Group(name="G", creator_id=test_user.id, club_id=club.id)
+        db.add(group)
+        db.commit()
+        fixture = make_fixture(1001, 579, 1, 7)
+        monkeypatch.setattr(services, "fetch_fixtures", lambda competitor_id: [fixture])
+        services.sync_group_games(db)
+        assert published == []
+
+        moved = datetime.fromisoformat(fixture["startTime"]) + timedelta(days=1)
+        fixture["startTime"] = moved.isoformat()
+        services.sync_group_games(db)
+
+        assert [(e["group_id"], e["type"], e["data"]["game_id"]) for e in published] == [(group.id, "game_rescheduled", 1001)]
+        assert db.get(Game, 1001).start_time == moved.replace(tzinfo=None)
@@ -0,0 +1,478 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.users.models import User
+from app.groups.models import Group, GroupMember, Club
+from app.games.models import Game, SeatDutyAssignment, DutyLedger
+from app.games import services
+from app.core.security import get_password_hash
+
+
+def make_fixture(game_id: int, home_id: int, away_id: int, days: int, **extra) -> dict:
+    start = datetime.now(timezone.utc) + timedelta(days=days)
+    return {
+        "id": game_id,
+        "startTime": start.replace(microsecond=0).isoformat(),
+        "competitionId": 42,
+        "competitionDisplayName": "Ligat Ha'Al",
+        "statusGroup": 2,
+        "statusText": "Scheduled",
+        "homeCompetitor": {"id": home_id, "name": f"Team {home_id}"},
+        "awayCompetitor": {"id": away_id, "name": f"Team {away_id}"},
+        **extra,
+    }
+
+
+@pytest.fixture
+def fake_fixtures(monkeypatch):
+    """Replace the 365scores call with in-memory fixtures per competitor."""
+    fixtures = {
+        "579": [make_fixture(1001, 579, 1, 7), make_fixture(1002, 2, 579, 14), make_fixture(1003, 579, 3, 21)],
+        "600": [make_fixture(2001, 600, 579, 10)],
+    }
+    calls = []
+
+    def fetch(competitor_id: str) -> list[dict]:
+        calls.append(competitor_id)
+        return fixtures[competitor_id]
+
+    monkeypatch.setattr(services, "fetch_fixtures", fetch)
+    return calls
+
+
+@pytest.fixture
+def club_groups(db: Session, test_user):
+    """Two groups following club 579 and one following club 600."""
+    club_a = Club(name="Hapoel Beer Sheva", external_id="579")
+    club_b = Club(name="Other Club", external_id="600")
+    db.add_all([club_a, club_b])
+    db.commit()
+    groups = [
+        Group(name="A1", creator_id=test_user.id, club_id=club_a.id),
+        Group(name="A2", creator_id=test_user.id, club_id=club_a.id),
+        Group(name="B1", creator_id=test_user.id, club_id=club_b.id),
+    ]
+    db.add_all(groups)
+    db.commit()
+    for group in groups:
+        db.add(GroupMember(group_id=group.id, user_id=test_user.id, is_admin=True))
+    db.commit()
+    return groups
+
+
+def add_members(db: Session, group: Group, count: int) -> list[User]:
+    users = []
+    for i in range(count):
+        user = User(email=f"member{group.id}_{i}@example.com", hashed_password=get_password_hash("password123"), name=f"Member {i}")
+        db.add(user)
+        db.commit()
+        db.add(GroupMember(group_id=group.id, user_id=user.id, is_admin=False))
+        db.commit()
+        users.append(user)
+    return users
+
+
+class TestGameSync:
+    def test_sync_fetches_each_club_once(self, db: Session, club_groups, fake_fixtures):
+        result = services.sync_group_games(db)
+
+        assert sorted(fake_fixtures) == ["579", "600"]
+        assert result["clubs"] == 2
+        assert result["groups"] == 3
+        assert result["games"] == 4
+        assert result["failed_clubs"] == []
+        assert db.query(Game).count() == 4
+
+    def test_sync_updates_existing_games(self, db: Session, club_groups, fake_fixtures, monkeypatch):
+        services.sync_group_games(db)
+        moved = make_fixture(1001, 579, 1, 8, statusText="Postponed")
+        monkeypatch.setattr(services, "fetch_fixtures", lambda competitor_id: [moved])
+
+        services.sync_group_games(db, group_ids=[club_groups[0].id])
+
+        db.expire_all()
+        game = db.query(Game).filter(Game.id == 1001).first()
+        assert game.status_text == "Postponed"
+        assert db.query(Game).count() == 4
+
+    def test_resync_of_unchanged_game_keeps_updated_at(self, db: Session, club_groups, monkeypatch):
+        fixtures = [make_fixture(1001, 579, 1, 7), make_fixture(1003, 579, 3, 21)]
+        monkeypatch.setattr(services, "fetch_fixtures", lambda competitor_id: fixtures)
+        services.sync_group_games(db, group_ids=[club_groups[0].id])
+        stamps = dict(db.query(Game.id, Game.updated_at).all())
+
+        fixtures[0] = make_fixture(1001, 579, 1, 8)
+        services.sync_group_games(db, group_ids=[club_groups[0].id])
+
+        db.expire_all()
+        after = dict(db.query(Game.id, Game.updated_at).all())
+        assert after[1001] > stamps[1001]
+        assert after[1003] == stamps[1003]
+
+    def test_sync_reports_failed_club(self, db: Session, club_groups, monkeypatch):
+        import requests
+
+        def fetch(competitor_id: str) -> list[dict]:
+            if competitor_id == "600":
+                raise requests.ConnectionError("down")
+            return [make_fixture(1001, 579, 1, 7)]
+
+        monkeypatch.setattr(services, "fetch_fixtures", fetch)
+        result = services.sync_group_games(db)
+        assert result["failed_clubs"] == ["600"]
+        assert result["games"] == 1
+
+    def test_sync_endpoint_requires_superuser(self, client: TestClient, auth_headers: dict):
+        response = client.post("/games/sync", headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_group_admin_can_sync_group(self, client: TestClient, auth_headers: dict, club_groups, fake_fixtures):
+        response = client.post(f"/games/groups/{club_groups[0].id}/sync", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["clubs"] == 1
+        assert fake_fixtures == ["579"]
+
+
+class TestSeatDuty:
+    def test_list_group_games_only_home_games(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures):
+        services.sync_group_games(db)
+        response = client.get(f"/games/groups/{club_groups[0].id}", headers=auth_headers)
+        assert response.status_code == 200
+        assert [g["id"] for g in response.json()] == [1001, 1003]
+
+    def test_assign_fills_seats_fairly(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures):
+        services.sync_group_games(db)
+        group = club_groups[0]
+        add_members(db, group, 3)
+
+        response = client.post(f"/games/groups/{group.id}/assign", headers=auth_headers)
+        assert response.status_code == 200
+        made = response.json()["assignments_made"]
+        assert len(made) == 4
+
+        per_user: dict[int, int] = {}
+        for assignment in made:
+            per_user[assignment["user_id"]] = per_user.get(assignment["user_id"], 0) + 1
+        # 4 seats over the creator and 3 members
+        assert sorted(per_user.values()) == [1, 1, 1, 1]
+
+        # Running again does not add more
+        again = client.post(f"/games/groups/{group.id}/assign", headers=auth_headers)
+        assert again.json()["assignments_made"] == []
+        assert db.query(SeatDutyAssignment).filter(SeatDutyAssignment.group_id == group.id).count() == 4
+
+    def test_assign_updates_ledger(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures):
+        services.sync_group_games(db)
+        group = club_groups[0]
+        add_members(db, group, 1)
+
+        client.post(f"/games/groups/{group.id}/assign", headers=auth_headers)
+
+        entries = db.query(DutyLedger).filter(DutyLedger.group_id == group.id).all()
+        assert sorted(entry.assigned_count for entry in entries) == [2, 2]
+        for entry in entries:
+            assert services.decayed_score(entry.score) == pytest.approx(2, rel=1e-3)
+        assert db.query(DutyLedger).filter(DutyLedger.group_id == club_groups[1].id).count() == 0
+
+    def test_decline_frees_seat_and_lowers_score(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures, test_user):
+        services.sync_group_games(db)
+        group = club_groups[0]
+        member = add_members(db, group, 3)[0]
+        made = client.post(f"/games/groups/{group.id}/assign", headers=auth_headers).json()["assignments_made"]
+        # One seat each for the creator and 3 members
+        mine = next(a for a in made if a["user_id"] == test_user.id)
+
+        response = client.patch(f"/games/assignments/{mine['id']}", json={"status": "declined"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "declined"
+
+        db.expire_all()
+        entry = db.query(DutyLedger).filter(DutyLedger.group_id == group.id, DutyLedger.user_id == test_user.id).one()
+        assert (entry.assigned_count, entry.declined_count) == (0, 1)
+        assert services.decayed_score(entry.score) == pytest.approx(0, abs=1e-6)
+
+        ledger = client.get(f"/games/groups/{group.id}/ledger", headers=auth_headers).json()
+        assert ledger[0]["user_id"] == test_user.id
+
+        # The declined seat goes to someone else, not back to the decliner
+        refill = client.post(f"/games/groups/{group.id}/assign", headers=auth_headers).json()["assignments_made"]
+        assert [(a["game_id"], a["user_id"] != test_user.id) for a in refill] == [(mine["game_id"], True)]
+        assert member.id in {a["user_id"] for a in made + refill}
+
+    def test_only_assignee_or_admin_changes_status(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures, test_user):
+        services.sync_group_games(db)
+        group = club_groups[0]
+        member = add_members(db, group, 1)[0]
+        made = client.post(f"/games/groups/{group.id}/assign", headers=auth_headers).json()["assignments_made"]
+        admins = next(a for a in made if a["user_id"] == test_user.id)
+        login = client.post("/auth/login", json={"email": member.email, "password": "password123"})
+        member_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        response = client.patch(f"/games/assignments/{admins['id']}", json={"status": "completed"}, headers=member_headers)
+        assert response.status_code == 403
+
+    def test_rebuild_ledger_matches_incremental(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures):
+        services.sync_group_games(db)
+        group = club_groups[0]
+        add_members(db, group, 2)
+        made = client.post(f"/games/groups/{group.id}/assign", headers=auth_headers).json()["assignments_made"]
+        client.patch(f"/games/assignments/{made[0]['id']}", json={"status": "completed"}, headers=auth_headers)
+        db.expire_all()
+
+        def snapshot():
+            return sorted(
+                (e.user_id, e.assigned_count, e.completed_count, e.declined_count, round(e.score, 6))
+                for e in db.query(DutyLedger).filter(DutyLedger.group_id == group.id)
+            )
+
+        before = snapshot()
+        services.rebuild_ledger(db, group.id)
+        db.expire_all()
+        assert snapshot() == before
+
+    def test_concurrent_assign_does_not_overfill(self, db: Session, club_groups, fake_fixtures, monkeypatch):
+        from tests.conftest import TestingSessionLocal
+
+        services.sync_group_games(db)
+        group = club_groups[0]
+        add_members(db, group, 3)
+        duty_weight = services.duty_weight
+        competing = []
+
+        def weight_after_competing_run(at):
+            # Another worker assigns the group after this run has read the free seats
+            monkeypatch.setattr(services, "duty_weight", duty_weight)
+            other = TestingSessionLocal()
+            try:
+                competing.extend(services.assign_group_games(other, other.get(Group, group.id)))
+            finally:
+                other.close()
+            return duty_weight(at)
+
+        monkeypatch.setattr(services, "duty_weight", weight_after_competing_run)
+        assert services.assign_group_games(db, group) == []
+
+        assert len(competing) == 4
+        assert db.query(SeatDutyAssignment).filter(SeatDutyAssignment.group_id == group.id).count() == 4
+        assert sum(entry.assigned_count for entry in db.query(DutyLedger).filter(DutyLedger.group_id == group.id)) == 4
+
+    def test_duty_weight_stays_finite(self, monkeypatch):
+        assert services.FAIRNESS_HALF_LIFE_DAYS >= services.FAIRNESS_MIN_HALF_LIFE_DAYS
+        monkeypatch.setattr(services, "FAIRNESS_HALF_LIFE_DAYS", services.FAIRNESS_MIN_HALF_LIFE_DAYS)
+
+        assert services.duty_weight(datetime(2100, 1, 1)) < float("inf")
+
+    def test_non_member_cannot_list_games(self, client: TestClient, auth_headers: dict, db: Session):
+        other = User(email="other@test.com", hashed_password=get_password_hash("password123"), name="Other")
+        db.add(other)
+        db.commit()
+        group = Group(name="Other Group", creator_id=other.id)
+        db.add(group)
+        db.commit()
+
+        response = client.get(f"/games/groups/{group.id}", headers=auth_headers)
+        assert response.status_code == 403
+
+
+class TestFixtureFanOut:
+    def test_rate_limiter_spaces_calls(self):
+        now = [10.0]
+        sleeps = []
+        limiter = services.RateLimiter(2, clock=lambda: now[0], sleep=sleeps.append)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert sleeps == [0.5, 1.0]
+
+    def test_clubs_fetched_once_with_bounded_concurrency(self, db: Session, test_user, monkeypatch):
+        import threading
+        import time
+
+        clubs = [Club(name=f"Club {i}", external_id=str(700 + i)) for i in range(6)]
+        db.add_all(clubs)
+        db.commit()
+        for club in clubs:
+            db.add_all([
+                Group(name=f"{club.name} fans", creator_id=test_user.id, club_id=club.id),
+                Group(name=f"{club.name} ultras", creator_id=test_user.id, club_id=club.id),
+            ])
+        db.commit()
+
+        lock = threading.Lock()
+        state = {"active": 0, "max_active": 0}
+        calls = []
+
+        def fetch(competitor_id: str) -> list[dict]:
+            with lock:
+                calls.append(competitor_id)
+                state["active"] += 1
+                state["max_active"] = max(state["max_active"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return [make_fixture(int(competitor_id) * 10, int(competitor_id), 1, 7)]
+
+        monkeypatch.setattr(services, "fetch_fixtures", fetch)
+        monkeypatch.setattr(services, "scores_rate_limiter", services.RateLimiter(0))
+
+        result = services.sync_group_games(db)
+
+        assert sorted(calls) == [str(700 + i) for i in range(6)]
+        assert result["groups"] == 12
+        assert result["games"] == 6
+        assert 1 < state["max_active"] <= services.SCORES_MAX_CONCURRENCY
+
+
+class TestGameStatusPoller:
+    NOW = datetime(2030, 3, 1, 12, 0, 0)
+
+    def test_poll_interval_adapts_to_kickoff(self):
+        from app.games.poller import poll_interval
+
+        now = self.NOW
+        assert poll_interval(now + timedelta(days=30), 2, now) == timedelta(days=1)
+        assert poll_interval(now + timedelta(days=5), 2, now) == timedelta(hours=6)
+        assert poll_interval(now + timedelta(hours=3), 2, now) == timedelta(minutes=15)
+        assert poll_interval(now + timedelta(minutes=30), 2, now) == timedelta(minutes=1)
+        assert poll_interval(now - timedelta(minutes=30), 3, now) == timedelta(minutes=1)
+        assert poll_interval(now - timedelta(minutes=100), 4, now) is None
+        assert poll_interval(now - timedelta(days=1), 3, now) is None
+        # Never sleeps past a threshold: 14 days + 2 hours away polls again in ~2 hours
+        assert poll_interval(now + timedelta(days=14, hours=2), 2, now) == timedelta(hours=2, minutes=1)
+
+    def test_due_games_batched_per_competitor(self, db: Session, club_groups):
+        from app.games.poller import GameStatusPoller
+
+        now = self.NOW
+        db.add_all([
+            Game(id=1, start_time=now + timedelta(minutes=30), status_group=2, home_competitor_id=579, away_competitor_id=1),
+            Game(id=2, start_time=now + timedelta(minutes=40), status_group=2, home_competitor_id=2, away_competitor_id=579),
+            Game(id=3, start_time=now + timedelta(days=30), status_group=2, home_competitor_id=579, away_competitor_id=3),
+            Game(id=4, start_time=now - timedelta(hours=3), status_group=4, home_competitor_id=579, away_competitor_id=5),
+            Game(id=5, start_time=now + timedelta(minutes=30), status_group=2, home_competitor_id=800, away_competitor_id=801),
+        ])
+        db.commit()
+
+        clock = [now]
+        calls = []
+
+        def fetch(competitor_id: str) -> list[dict]:
+            calls.append(competitor_id)
+            return [
+                {"id": 1, "startTime": (clock[0] - timedelta(minutes=1)).isoformat(), "statusGroup": 3,
+                 "homeCompetitor": {"id": 579}, "awayCompetitor": {"id": 1}},
+                {"id": 2, "startTime": (now + timedelta(minutes=40)).isoformat(), "statusGroup": 2,
+                 "homeCompetitor": {"id": 2}, "awayCompetitor": {"id": 579}},
+            ]
+
+        poller = GameStatusPoller(fetch=fetch, clock=lambda: clock[0])
+        poller.load(db)
+        # Finished game and the game of an unfollowed club are not scheduled
+        assert len(poller) == 3
+
+        clock[0] = now + timedelta(minutes=1)
+        assert poller.poll_once(db) == 1
+        assert calls == ["579"]
+
+        db.expire_all()
+        assert db.get(Game, 1).status_group == 3
+
+        # Nothing is due again until the next minute; the far game is not polled
+        assert poller.poll_once(db) == 0
+        assert poller.next_due() == now + timedelta(minutes=2)
+
+    def test_finished_game_stops_polling(self, db: Session, club_groups):
+        from app.games.poller import GameStatusPoller
+
+        now = self.NOW
+        db.add(Game(id=1, start_time=now - timedelta(minutes=100), status_group=3, home_competitor_id=579, away_competitor_id=1))
+        db.commit()
+        clock = [now]
+
+        def fetch(competitor_id: str) -> list[dict]:
+            return [{"id": 1, "startTime": (now - timedelta(minutes=100)).isoformat(), "statusGroup": 4,
+                     "homeCompetitor": {"id": 579}, "awayCompetitor": {"id": 1}}]
+
+        poller = GameStatusPoller(fetch=fetch, clock=lambda: clock[0])
+        poller.load(db)
+        clock[0] = now + timedelta(minutes=1)
+        poller.poll_once(db)
+
+        assert len(poller) == 0
+        assert poller.next_due() is None
+
+
+class TestCalendarFeed:
+    def feed_url(self, client: TestClient, auth_headers: dict) -> str:
+        response = client.get("/games/calendar", headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()["url"]
+
+    def test_feed_lists_duties(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures):
+        services.sync_group_games(db)
+        client.post(f"/games/groups/{club_groups[0].id}/assign", headers=auth_headers)
+
+        response = client.get(self.feed_url(client, auth_headers))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/calendar")
+        body = response.text
+        assert body.startswith("BEGIN:VCALENDAR\r\n")
+        assert body.count("BEGIN:VEVENT") == 2
+        assert "SUMMARY:Seat duty: Team 579 vs Team 1" in body
+        assert all(len(line.encode()) <= 75 for line in body.split("\r\n"))
+
+    def test_bad_signature_not_found(self, client: TestClient, test_user, db: Session):
+        response = client.get(f"/games/calendar/{test_user.id}/{'0' * 32}.ics")
+        assert response.status_code == 404
+
+    def test_etag_reused_until_assignments_change(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures, test_user, monkeypatch):
+        from app.games import calendar
+
+        services.sync_group_games(db)
+        made = client.post(f"/games/groups/{club_groups[0].id}/assign", headers=auth_headers).json()["assignments_made"]
+        url = self.feed_url(client, auth_headers)
+        first = client.get(url)
+        etag = first.headers["etag"]
+
+        renders = []
+        original = calendar.render_calendar
+        monkeypatch.setattr(calendar, "render_calendar", lambda duties: renders.append(1) or original(duties))
+
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert renders == []
+
+        client.patch(f"/games/assignments/{made[0]['id']}", json={"status": "declined"}, headers=auth_headers)
+        changed = client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.text.count("BEGIN:VEVENT") == 1
+        assert renders == [1]
+
+    def test_resync_without_changes_keeps_etag(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures, test_user):
+        from app.games import calendar
+
+        services.sync_group_games(db)
+        client.post(f"/games/groups/{club_groups[0].id}/assign", headers=auth_headers)
+        url = self.feed_url(client, auth_headers)
+        etag = client.get(url).headers["etag"]
+
+        services.sync_group_games(db)
+        calendar.calendar_cache.invalidate([test_user.id])
+
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    def test_reschedule_invalidates_feed(self, client: TestClient, auth_headers: dict, db: Session, club_groups, fake_fixtures, monkeypatch):
+        services.sync_group_games(db)
+        client.post(f"/games/groups/{club_groups[0].id}/assign", headers=auth_headers)
+        url = self.feed_url(client, auth_headers)
+        etag = client.get(url).headers["etag"]
+
+        moved = make_fixture(1001, 579, 1, 9)
+        monkeypatch.setattr(services, "fetch_fixtures", lambda competitor_id: [moved])
+        services.sync_group_games(db, group_ids=[club_groups[0].id])
+
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
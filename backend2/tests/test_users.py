@@ -188,3 +188,425 @@ class TestUsers:
         assert r.status_code == 200
         data = r.json()
         assert any("filter0@" in u["email"] for u in data["users"]) or data["total"] >= 1
+
+
+class TestUserImport:
+    """Test bulk user import."""
+
+    @pytest.fixture(autouse=True)
+    def inline_hashing(self, monkeypatch):
+        from app.core import hashing
+
+        monkeypatch.setattr(hashing, "password_hasher", hashing.PasswordHasher(workers=0))
+
+    def post(self, client, headers, body, content_type="text/csv"):
+        return client.post("/admin/users/import", content=body, headers={**headers, "Content-Type": content_type})
+
+    def test_csv_import_reports_conflicts_and_errors(self, client: TestClient, superuser_headers: dict, test_user, db_session: Session):
+        body = "\n".join([
+            "email,password,name,phone",
+            "a@example.com,password1,Alice,",
+            "b@example.com,password2,,555",
+            "test@example.com,password3,Existing,",
+            "a@example.com,password4,Again,",
+            "not-an-email,password5,,",
+            "c@example.com,short,,",
+        ])
+
+        response = self.post(client, superuser_headers, body)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert [(c["row"], c["email"]) for c in data["conflicts"]] == [(4, "test@example.com"), (5, "a@example.com")]
+        assert [e["row"] for e in data["errors"]] == [6, 7]
+        alice = db_session.query(User).filter(User.email == "a@example.com").one()
+        assert alice.name == "Alice" and alice.phone is None and alice.is_active
+
+        login = client.post("/auth/login", json={"email": "b@example.com", "password": "password2"})
+        assert login.status_code == 200
+
+    def test_ndjson_import(self, client: TestClient, superuser_headers: dict, db_session: Session):
+        body = '{"email": "n1@example.com", "password": "password1"}\n\n[1]\n{"email": "n2@example.com", "password": "password2", "name": "N"}\n{bad'
+
+        response = self.post(client, superuser_headers, body, "application/x-ndjson")
+
+        data = response.json()
+        assert data["created"] == 2
+        assert [e["row"] for e in data["errors"]] == [3, 5]
+        assert db_session.query(User).filter(User.email.like("n%@example.com")).count() == 2
+
+    def test_inserts_in_multi_row_batches(self, client: TestClient, superuser_headers: dict, sql_statements, monkeypatch):
+        from app.users import bulk_import
+
+        monkeypatch.setattr(bulk_import, "IMPORT_INSERT_BATCH_SIZE", 10)
+        body = "email,password\n" + "\n".join(f"user{i}@example.com,password{i}" for i in range(25))
+        sql_statements.clear()
+
+        response = self.post(client, superuser_headers, body)
+
+        assert response.json()["created"] == 25
+        assert len([s for s in sql_statements if s.startswith("INSERT INTO users")]) == 3
+
+    def test_falls_back_without_returning(self, client: TestClient, superuser_headers: dict, db_session: Session, monkeypatch):
+        from app.users import bulk_import
+
+        monkeypatch.setattr(db_session.get_bind().dialect, "insert_returning", False)
+        hash_passwords = bulk_import.hash_passwords
+
+        def hash_then_race(passwords):
+            # Someone registers b@ after the existing-email check
+            db_session.add(User(email="b@example.com", hashed_password="theirs", name="Racer"))
+            db_session.commit()
+            return hash_passwords(passwords)
+
+        monkeypatch.setattr(bulk_import, "hash_passwords", hash_then_race)
+        body = "email,password\na@example.com,password1\nb@example.com,password2\n"
+
+        data = self.post(client, superuser_headers, body).json()
+
+        assert data["created"] == 1
+        assert [(c["row"], c["email"]) for c in data["conflicts"]] == [(3, "b@example.com")]
+        db_session.expire_all()
+        assert db_session.query(User).filter(User.email == "b@example.com").one().name == "Racer"
+
+    def test_row_limit(self, client: TestClient, superuser_headers: dict, db_session: Session, monkeypatch):
+        from app.users import bulk_import
+
+        monkeypatch.setattr(bulk_import, "IMPORT_MAX_ROWS", 2)
+        body = "email,password\n" + "\n".join(f"user{i}@example.com,password{i}" for i in range(3))
+
+        assert self.post(client, superuser_headers, body).status_code == 413
+        assert db_session.query(User).count() == 1
+
+    def test_requires_superuser(self, client: TestClient, auth_headers: dict):
+        assert self.post(client, auth_headers, "email,password\n").status_code == 403
+
+    def test_hash_many_keeps_order(self):
+        from app.core.hashing import PasswordHasher
+        from app.core.security import verify_password
+
+        hasher = PasswordHasher(workers=1, max_pending=4)
+        try:
+            passwords = [f"password{i}" for i in range(5)]
+            hashed = hasher.hash_many(passwords, batch_size=2)
+        finally:
+            hasher.shutdown()
+
+        assert len(hashed) == 5
+        assert all(verify_password(p, h) for p, h in zip(passwords, hashed))
+
+
+class TestUserSearch:
+    """Test indexed user search."""
+
+    @pytest.fixture
+    def members(self, db_session: Session):
+        users = [
+            User(email="alice.cohen@example.com", hashed_password="x", name="Alice Cohen"),
+            User(email="bob@example.com", hashed_password="x", name="Bob Levi", is_active=False),
+            User(email="carol@club.org", hashed_password="x", name="Carol Alicen"),
+            User(email="dan@club.org", hashed_password="x", name=None),
+        ]
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def emails(self, client, **params):
+        response = client.get("/users", params=params)
+        assert response.status_code == 200
+        return [u["email"] for u in response.json()["users"]]
+
+    def test_uses_fts_index_on_sqlite(self, db_session: Session):
+        from app.users.search import search_backend
+
+        assert search_backend(db_session) == "fts5"
+
+    def test_substring_matches_are_case_insensitive(self, client: TestClient, members):
+        assert sorted(self.emails(client, email="CLUB")) == ["carol@club.org", "dan@club.org"]
+        assert self.emails(client, name="levi") == ["bob@example.com"]
+        assert self.emails(client, name="levi", is_active=True) == []
+
+    def test_q_matches_email_or_name_best_first(self, client: TestClient, members):
+        # "alice" is in both of alice's fields but only in carol's name
+        assert self.emails(client, q="alice") == ["alice.cohen@example.com", "carol@club.org"]
+
+    def test_short_terms_fall_back_to_scan(self, client: TestClient, members):
+        assert sorted(self.emails(client, email="bo")) == ["bob@example.com"]
+
+    def test_index_follows_updates_and_deletes(self, client: TestClient, members, db_session: Session):
+        members[3].name = "Dana Alice"
+        db_session.delete(members[0])
+        db_session.commit()
+
+        assert sorted(self.emails(client, q="alice")) == ["carol@club.org", "dan@club.org"]
+
+    def test_total_without_count_query(self, client: TestClient, members, sql_statements):
+        sql_statements.clear()
+
+        data = client.get("/users", params={"q": "example", "limit": 1}).json()
+
+        assert data["total"] == 2 and len(data["users"]) == 1
+        assert len(sql_statements) == 1
+
+        # Past the last page the total still comes back
+        assert client.get("/users", params={"q": "example", "limit": 1, "page": 5}).json()["total"] == 2
+
+
+class TestKeysetPagination:
+    """Test cursor-based user listings."""
+
+    @pytest.fixture
+    def members(self, db_session: Session):
+        from datetime import datetime, timedelta
+
+        start = datetime(2026, 1, 1)
+        # Ties on created_at and on name, and a user without a name
+        names = ["Eve", "Bob", None, "Bob", "Alice", "Dan", "Carol"]
+        users = [
+            User(email=f"m{i}@example.com", hashed_password="x", name=name, created_at=start + timedelta(days=i // 2))
+            for i, name in enumerate(names)
+        ]
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def walk(self, client, **params):
+        pages, cursor = [], None
+        while True:
+            response = client.get("/users", params={**params, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            data = response.json()
+            pages.append([u["email"] for u in data["users"]])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return pages, data
+
+    def test_walks_every_user_once_in_order(self, client: TestClient, members):
+        pages, _ = self.walk(client, sort="created_at", limit=3)
+        assert pages == [["m0@example.com", "m1@example.com", "m2@example.com"],
+                         ["m3@example.com", "m4@example.com", "m5@example.com"],
+                         ["m6@example.com"]]
+
+        pages, _ = self.walk(client, sort="-created_at", limit=4)
+        assert sum(pages, []) == [f"m{i}@example.com" for i in reversed(range(7))]
+
+    def test_name_sort_handles_ties_and_missing_names(self, client: TestClient, members):
+        pages, _ = self.walk(client, sort="name", limit=2)
+        # No name sorts first; Bob's tie is broken by id
+        assert sum(pages, []) == ["m2@example.com", "m4@example.com", "m1@example.com", "m3@example.com",
+                                  "m6@example.com", "m5@example.com", "m0@example.com"]
+
+    def test_filters_apply_to_every_page(self, client: TestClient, members):
+        pages, data = self.walk(client, sort="name", name="o", limit=1)
+        assert sum(pages, []) == ["m1@example.com", "m3@example.com", "m6@example.com"]
+        assert data["total"] == 3
+
+    def test_pages_do_not_offset(self, client: TestClient, members, sql_statements):
+        first = client.get("/users", params={"sort": "created_at", "limit": 3, "total": "none"}).json()
+        sql_statements.clear()
+
+        second = client.get("/users", params={"sort": "created_at", "limit": 3, "total": "none", "cursor": first["next_cursor"]}).json()
+
+        assert second["total"] is None
+        # One range condition from the previous page's last row, not an offset
+        assert len(sql_statements) == 1 and "users.created_at >= ?" in sql_statements[0]
+
+    def test_invalid_cursor(self, client: TestClient, members):
+        first = client.get("/users", params={"sort": "name", "limit": 1}).json()
+
+        assert client.get("/users", params={"sort": "name", "cursor": "garbage"}).status_code == 400
+        # A cursor only continues the sort it came from
+        assert client.get("/users", params={"sort": "created_at", "cursor": first["next_cursor"]}).status_code == 400
+
+    def test_estimate_falls_back_to_count_on_sqlite(self, client: TestClient, members):
+        data = client.get("/users", params={"total": "estimate", "limit": 2}).json()
+
+        assert data["total"] == 7
+        assert data["total_estimated"] is False
+
+
+class TestLeanReads:
+    """Test that user reads select only the UserOut columns."""
+
+    def test_list_skips_private_columns(self, client: TestClient, test_user, sql_statements):
+        data = client.get("/users", params={"q": "test@example"}).json()
+
+        assert data["total"] == 1
+        assert data["users"][0].keys() == {"id", "email", "name", "phone", "is_active", "is_superuser", "created_at", "updated_at"}
+        users_query = [s for s in sql_statements if "FROM users" in s]
+        assert len(users_query) == 1 and "hashed_password" not in users_query[0]
+
+    def test_find_matches_user_out(self, client: TestClient, test_user, sql_statements):
+        data = client.get(f"/users/find/{test_user.id}").json()
+
+        assert (data["id"], data["email"], data["name"]) == (test_user.id, "test@example.com", "Test User")
+        assert not any("hashed_password" in s for s in sql_statements)
+
+    def test_active_users_stats_hide_password_hash(self, client: TestClient, superuser_headers: dict, test_user):
+        response = client.get("/admin/users/stats/active", headers=superuser_headers)
+
+        assert response.status_code == 200
+        users = response.json()["active_users"]
+        assert {u["email"] for u in users} == {"root@example.com", "test@example.com"}
+        assert all("hashed_password" not in u and "token_version" not in u for u in users)
+
+
+class TestUpdateReturning:
+    """Test that user mutations are one UPDATE ... RETURNING."""
+
+    def test_profile_update_is_one_statement(self, client: TestClient, auth_headers: dict, test_user, sql_statements):
+        # Warm the principal cache so only the update touches users
+        client.get("/users/profile", headers=auth_headers)
+        sql_statements.clear()
+
+        response = client.put("/users/profile", json={"name": "Renamed"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+        users = [s for s in sql_statements if "users" in s]
+        assert len(users) == 1 and users[0].startswith("UPDATE users") and "RETURNING" in users[0]
+
+    def test_toggle_active_bumps_token_version(self, client: TestClient, superuser_headers: dict, test_user, db_session: Session):
+        updated_at = test_user.updated_at
+
+        response = client.patch(f"/admin/users/{test_user.id}/toggle-active", headers=superuser_headers)
+
+        assert response.json()["message"] == "User deactivated successfully"
+        db_session.refresh(test_user)
+        assert (test_user.is_active, test_user.token_version) == (False, 1)
+        assert test_user.updated_at > updated_at
+        assert client.patch("/admin/users/999999/toggle-active", headers=superuser_headers).status_code == 404
+
+    def test_falls_back_without_returning(self, client: TestClient, auth_headers: dict, test_user, db_session: Session, sql_statements, monkeypatch):
+        monkeypatch.setattr(db_session.get_bind().dialect, "update_returning", False)
+        client.get("/users/profile", headers=auth_headers)
+        sql_statements.clear()
+
+        response = client.put("/users/profile", json={"phone": "555"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["phone"] == "555"
+        assert not any("RETURNING" in s for s in sql_statements)
+
+
+class TestBulkOperations:
+    """Test batched bulk deletes and updates."""
+
+    @pytest.fixture
+    def people(self, db_session: Session):
+        users = [User(email=f"p{i}@example.com", hashed_password="x", name=f"P{i}") for i in range(5)]
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def test_delete_removes_dependent_rows(self, client: TestClient, superuser_headers: dict, people, db_session: Session):
+        from datetime import datetime
+        from app.games.models import Game, SeatDutyAssignment, DutyLedger
+        from app.groups.models import Group, GroupMember, InvitationToken
+
+        leaving, staying = people[0], people[1]
+        own = Group(name="Leaving's", creator_id=leaving.id)
+        other = Group(name="Staying's", creator_id=staying.id)
+        db_session.add_all([own, other, Game(id=1, start_time=datetime(2026, 11, 1))])
+        db_session.flush()
+        db_session.add_all([
+            GroupMember(group_id=own.id, user_id=staying.id),
+            GroupMember(group_id=other.id, user_id=leaving.id),
+            SeatDutyAssignment(group_id=own.id, game_id=1, user_id=staying.id),
+            SeatDutyAssignment(group_id=other.id, game_id=1, user_id=leaving.id),
+            DutyLedger(group_id=other.id, user_id=leaving.id),
+            InvitationToken(group_id=other.id, token="t", created_by_user_id=leaving.id),
+        ])
+        db_session.commit()
+
+        response = client.post("/admin/users/bulk-delete", json={"user_ids": [leaving.id]}, headers=superuser_headers)
+
+        assert response.json()["message"] == "Successfully deleted 1 users"
+        db_session.expire_all()
+        assert [g.name for g in db_session.query(Group)] == ["Staying's"]
+        assert db_session.query(GroupMember).count() == 0
+        assert db_session.query(SeatDutyAssignment).count() == 0
+        assert db_session.query(DutyLedger).count() == 0
+        assert db_session.query(InvitationToken).count() == 0
+        assert db_session.get(User, staying.id) is not None
+
+    def test_runs_in_batches(self, client: TestClient, superuser_headers: dict, people, sql_statements, monkeypatch):
+        from app.users import bulk
+
+        monkeypatch.setattr(bulk, "USER_BULK_BATCH_SIZE", 2)
+
+        response = client.post("/admin/users/bulk-delete", json={"user_ids": [u.id for u in people] + [999999]}, headers=superuser_headers)
+
+        assert response.json()["message"] == "Successfully deleted 5 users"
+        deletes = [s for s in sql_statements if s.startswith("DELETE FROM users")]
+        assert len(deletes) == 3 and all(s.endswith("RETURNING id") for s in deletes)
+
+    def test_large_update_runs_as_job(self, client: TestClient, superuser_headers: dict, people, db_session: Session, monkeypatch):
+        import time
+        from app.admin import routers as admin_routers
+
+        monkeypatch.setattr(admin_routers, "USER_BULK_JOB_THRESHOLD", 2)
+
+        response = client.put("/admin/users/bulk-update", json={"user_ids": [u.id for u in people], "is_active": False}, headers=superuser_headers)
+
+        assert response.status_code == 202
+        job_url = f"/admin/users/jobs/{response.json()['job_id']}"
+        for _ in range(100):
+            job = client.get(job_url, headers=superuser_headers).json()
+            if job["status"] != "running":
+                break
+            time.sleep(0.05)
+        assert (job["status"], job["operation"], job["total"], job["processed"], job["affected"]) == ("done", "update", 5, 5, 5)
+        db_session.expire_all()
+        assert all(not u.is_active and u.token_version == 1 for u in db_session.query(User).filter(User.email.like("p%")))
+        assert client.get("/admin/users/jobs/unknown", headers=superuser_headers).status_code == 404
+
+
+class TestUserExport:
+    """Test the streaming user export."""
+
+    @pytest.fixture
+    def members(self, db_session: Session):
+        users = [
+            User(email="alice@example.com", hashed_password="x", name="Alice, A."),
+            User(email="bob@example.com", hashed_password="x", name="Bob", is_active=False),
+            User(email="carol@club.org", hashed_password="x", name=None),
+        ]
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def test_csv(self, client: TestClient, superuser_headers: dict, members):
+        import csv
+        import io
+
+        response = client.get("/admin/users/export", headers=superuser_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [r["email"] for r in rows] == ["root@example.com", "alice@example.com", "bob@example.com", "carol@club.org"]
+        assert (rows[1]["name"], rows[2]["is_active"], rows[3]["name"]) == ("Alice, A.", "false", "")
+        assert "hashed_password" not in rows[0]
+
+    def test_ndjson_with_filters(self, client: TestClient, superuser_headers: dict, members, monkeypatch):
+        import json
+        from app.users import export
+
+        # Several cursor batches
+        monkeypatch.setattr(export, "USER_EXPORT_BATCH_SIZE", 1)
+        response = client.get("/admin/users/export", params={"format": "ndjson", "q": "example", "is_active": True, "sort": "-name"}, headers=superuser_headers)
+
+        users = [json.loads(line) for line in response.text.splitlines()]
+        assert [u["email"] for u in users] == ["root@example.com", "alice@example.com"]
+        assert users[1]["id"] == members[0].id and users[1]["created_at"] == members[0].created_at.isoformat()
+
+    def test_empty_csv_has_header(self, client: TestClient, superuser_headers: dict, members):
+        response = client.get("/admin/users/export", params={"q": "zzz-none"}, headers=superuser_headers)
+
+        assert response.text.strip() == "id,email,name,phone,is_active,is_superuser,created_at,updated_at"
+
+    def test_requires_superuser_and_known_format(self, client: TestClient, auth_headers: dict, superuser_headers: dict):
+        assert client.get("/admin/users/export", headers=auth_headers).status_code == 403
+        assert client.get("/admin/users/export", params={"format": "xml"}, headers=superuser_headers).status_code == 400